@@ -17,13 +17,12 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from src.preprocessing.clean_text import clean_text
 from src.preprocessing.tokenizer import tokenize
-from src.translation.translation_model import (
-    load_parallel_corpus,
-    train_translation_model,
-)
-from src.translation.language_model import train_bigram_language_model
+from src.translation.model_io import DEFAULT_MODEL_FILE
+from src.translation.training import load_or_train_models
 from src.translation.decoder import decode_sentence
+from src.translation.model_registry import ModelRegistry
 from src.evaluation.bleu_score import compute_bleu_score
+from src.utils.metrics import METRICS, stage
 
 # --------------------------------------------------
 # Page Config
@@ -108,7 +107,7 @@ with st.sidebar:
     st.markdown(
         """
         **Features**
-        - IBM Model-1 inspired SMT
+        - IBM Model-1 SMT (EM-trained)
         - Bigram Language Model
         - Word-level decoding
         - BLEU score evaluation
@@ -122,30 +121,60 @@ with st.sidebar:
         """
     )
     st.divider()
+    use_cache = st.checkbox("Cache translations", value=True)
+    show_metrics = st.checkbox("Show stage timings", value=False)
+    st.divider()
     st.caption("Built using Python & Streamlit")
 
 # --------------------------------------------------
 # Load & Train Models (Cached)
 # --------------------------------------------------
-@st.cache_data
-def load_models():
-    source_file = "data/train/source.txt"
-    target_file = "data/train/target.txt"
-
-    src_sentences, tgt_sentences = load_parallel_corpus(
-        source_file, target_file
+@st.cache_resource
+def load_registry():
+    # Serves the newest models/smt_model*.bin (scripts/build_model.py,
+    # scripts/update_model.py) and hot-reloads it in a background
+    # thread; trains from data/train if there is no model file yet
+    registry = ModelRegistry(
+        str(ROOT_DIR / "models"),
+        cache_size=10000,
+        fallback=lambda: load_or_train_models(
+            str(ROOT_DIR / DEFAULT_MODEL_FILE),
+            source_file="data/train/source.txt",
+            target_file="data/train/target.txt",
+        ),
+    ).start()
+
+    # Metrics are process-wide and shared by every session, so they are
+    # enabled once here; the sidebar switch only shows or hides them
+    METRICS.enable()
+    METRICS.register(
+        "translation_cache", lambda: registry.active.cache.stats()
     )
+    return registry
 
-    translation_model = train_translation_model(
-        src_sentences, tgt_sentences
-    )
 
-    language_model = train_bigram_language_model(tgt_sentences)
+registry = load_registry()
+
+# Read once per run: a reload during this run does not affect it
+model = registry.active
+translation_cache = model.cache
+
+model_status = registry.status()
+st.sidebar.caption(
+    f"Model: {model_status['version']} "
+    f"(reloads: {model_status['reloads']}, "
+    f"last reload: {model_status['reload_seconds']} s)"
+)
+if model_status["last_error"]:
+    st.sidebar.warning(f"Rejected model: {model_status['last_error']}")
 
-    return translation_model, language_model
 
+def translate_tokens(src_tokens):
+    return decode_sentence(
+        src_tokens, model.translation_model, model.language_model,
+        index=model.index
+    )
 
-translation_model, language_model = load_models()
 
 # --------------------------------------------------
 # Input Section
@@ -184,27 +213,42 @@ if translate_btn:
     else:
         with st.spinner("Translating and evaluating..."):
             # Preprocess
-            clean_src = clean_text(source_text)
-            src_tokens = tokenize(clean_src)
+            with stage("clean_text"):
+                clean_src = clean_text(source_text)
+            with stage("tokenize"):
+                src_tokens = tokenize(clean_src)
 
             # Decode
-            translated_tokens = decode_sentence(
-                src_tokens, translation_model, language_model
-            )
+            with stage("decode_sentence", items=len(src_tokens)):
+                if use_cache:
+                    translated_tokens = translation_cache.translate(
+                        src_tokens, translate_tokens
+                    )
+                else:
+                    translated_tokens = translate_tokens(src_tokens)
             translated_text = " ".join(translated_tokens)
 
         # Output
         st.markdown("## 📝 SMT Output")
         st.success(translated_text)
 
+        if use_cache:
+            cache_stats = translation_cache.stats()
+            st.caption(
+                f"Cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses, "
+                f"{cache_stats['evictions']} evictions"
+            )
+
         # BLEU Evaluation
         if reference_text.strip():
             clean_ref = clean_text(reference_text)
             ref_tokens = tokenize(clean_ref)
 
-            bleu_results = compute_bleu_score(
-                translated_tokens, ref_tokens
-            )
+            with stage("compute_bleu_score"):
+                bleu_results = compute_bleu_score(
+                    translated_tokens, ref_tokens
+                )
 
             st.markdown("## 📊 BLEU Evaluation")
 
@@ -231,6 +275,34 @@ if translate_btn:
         else:
             st.info("ℹ️ Reference translation not provided. BLEU score not computed.")
 
+# --------------------------------------------------
+# Stage Metrics
+# --------------------------------------------------
+if show_metrics:
+    st.markdown("## ⏱️ Stage Timings")
+
+    snapshot = METRICS.to_dict()
+    st.dataframe(
+        {
+            "Stage": list(snapshot["stages"]),
+            "Calls": [s["calls"] for s in snapshot["stages"].values()],
+            "Mean (ms)": [s["mean_ms"] for s in snapshot["stages"].values()],
+            "Max (ms)": [s["max_ms"] for s in snapshot["stages"].values()],
+        },
+        use_container_width=True
+    )
+    if "decoder.oov_rate" in snapshot["derived"]:
+        st.caption(f"OOV rate: {snapshot['derived']['decoder.oov_rate']:.2%}")
+
+    d1, d2 = st.columns(2)
+    d1.download_button(
+        "Download JSON", METRICS.to_json(), file_name="metrics.json"
+    )
+    d2.download_button(
+        "Download Prometheus", METRICS.to_prometheus(),
+        file_name="metrics.prom"
+    )
+
 # --------------------------------------------------
 # Footer
 # --------------------------------------------------
@@ -0,0 +1,499 @@
+"""
+service.py
+-----------
+Standalone asyncio HTTP/JSON translation service.
+
+Endpoints:
+    POST /translate  {"text": "..."} or {"texts": ["...", ...]}
+    POST /bleu       {"candidate" or "source": "...",
+                      "reference": "..." or ["...", ...]}
+    GET  /metrics    request counts, p50/p99 latency, queue depth,
+                     batch statistics, active model version and
+                     reload latency per decoding process (and
+                     pipeline stage metrics with --stage-metrics)
+    GET  /metrics/prometheus
+                     the same in the Prometheus text format
+    GET  /health     {"status": "ok"}
+
+The model is loaded once. Concurrent /translate requests are queued
+and collected into micro-batches (up to --max-batch-size sentences,
+waiting at most --max-wait-ms for the batch to fill), which run through
+the batch translation code in a worker pool while the event loop keeps
+accepting requests.
+
+With --watch-dir, every decoding process hot-reloads the newest
+`smt_model*.bin` in that directory (see model_registry.py); batches
+already running finish on the version they started with.
+
+Usage:
+    python app/service.py [--port 8000] [--workers 0] \
+        [--max-batch-size 32] [--max-wait-ms 5] [--stage-metrics] \
+        [--watch-dir models]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.bleu_score import compute_bleu_multi
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.tokenizer import tokenize
+from src.translation.batch_translate import (
+    init_worker,
+    translate_chunk_with_status,
+)
+from src.translation.model_io import DEFAULT_MODEL_FILE
+from src.utils.metrics import METRICS
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class LatencyTracker:
+    """
+    Request count and a sliding window of latencies.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Latency percentiles over the window.
+
+        Returns:
+            Dict[str, float]: count, p50_ms, p99_ms
+        """
+        if not self.samples:
+            return {"count": self.count, "p50_ms": 0.0, "p99_ms": 0.0}
+
+        p50, p99 = np.percentile(np.fromiter(self.samples, float), [50, 99])
+        return {
+            "count": self.count,
+            "p50_ms": round(p50 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+        }
+
+
+class MicroBatcher:
+    """
+    Collects queued sentences into batches for an executor.
+
+    A batch is closed when it holds `max_batch_size` sentences or
+    `max_wait` seconds after its first sentence arrived. At most
+    `max_inflight` batches run at once; later ones wait in the queue.
+    """
+
+    def __init__(
+        self,
+        executor,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        max_inflight: int = 1
+    ):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_inflight = max_inflight
+        self.queue = asyncio.Queue()
+        self.inflight = 0
+        self.batches = 0
+        self.batched = 0
+        # Latest model status reported by each decoding process
+        self.models: Dict[int, Dict] = {}
+
+    async def submit(self, text: str) -> str:
+        """
+        Queue one sentence and wait for its translation.
+
+        Args:
+            text (str): Raw source sentence
+
+        Returns:
+            str: Translation
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for a first item, then fill the batch until full or due."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self.queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def run(self) -> None:
+        """Batching loop (runs for the lifetime of the service)."""
+        slots = asyncio.Semaphore(self.max_inflight)
+        tasks = set()
+
+        while True:
+            batch = await self._collect()
+            await slots.acquire()
+
+            task = asyncio.create_task(self._translate(batch, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def _translate(
+        self,
+        batch: List[Tuple[str, asyncio.Future]],
+        slots: asyncio.Semaphore
+    ) -> None:
+        """Translate one batch in the executor and resolve its futures."""
+        loop = asyncio.get_running_loop()
+        self.inflight += 1
+        self.batches += 1
+        self.batched += len(batch)
+
+        try:
+            unique = list(dict.fromkeys(text for text, _ in batch))
+            translations, model = await loop.run_in_executor(
+                self.executor, translate_chunk_with_status, unique
+            )
+            self.models[model["pid"]] = model
+            lookup = dict(zip(unique, translations))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(lookup[text])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self.inflight -= 1
+            slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Queue and batch counters.
+
+        Returns:
+            Dict[str, float]: queue_depth, inflight_batches, batches,
+            mean_batch_size
+        """
+        return {
+            "queue_depth": self.queue.qsize(),
+            "inflight_batches": self.inflight,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched / max(self.batches, 1), 2),
+        }
+
+
+class TranslationService:
+    """
+    HTTP front end: request parsing, routing and metrics.
+    """
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+        self.latency = {
+            "/translate": LatencyTracker(),
+            "/bleu": LatencyTracker(),
+        }
+        self.errors = 0
+        self.started = time.time()
+
+    async def translate(self, payload: Dict) -> Dict:
+        if "texts" in payload:
+            texts = payload["texts"]
+            if not isinstance(texts, list) or \
+                    not all(isinstance(t, str) for t in texts):
+                raise ValueError("'texts' must be a list of strings")
+            translations = await asyncio.gather(
+                *(self.batcher.submit(text) for text in texts)
+            )
+            return {"translations": list(translations)}
+
+        text = payload.get("text")
+        if not isinstance(text, str):
+            raise ValueError("'text' must be a string")
+        return {"translation": await self.batcher.submit(text)}
+
+    async def bleu(self, payload: Dict) -> Dict:
+        candidate = payload.get("candidate")
+        if candidate is None and isinstance(payload.get("source"), str):
+            candidate = await self.batcher.submit(payload["source"])
+        if not isinstance(candidate, str):
+            raise ValueError("'candidate' or 'source' must be a string")
+
+        references = payload.get("reference")
+        if isinstance(references, str):
+            references = [references]
+        if not references or \
+                not all(isinstance(r, str) for r in references):
+            raise ValueError("'reference' must be a string or list of strings")
+
+        with METRICS.stage("compute_bleu_score"):
+            results = compute_bleu_multi(
+                tokenize(clean_text(candidate)),
+                [tokenize(clean_text(ref)) for ref in references]
+            )
+        results["candidate"] = candidate
+        return results
+
+    def metrics(self) -> Dict:
+        metrics = {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "errors": self.errors,
+            "endpoints": {
+                path: tracker.summary()
+                for path, tracker in self.latency.items()
+            },
+            **self.batcher.stats(),
+            "models": sorted(
+                self.batcher.models.values(), key=lambda m: m["pid"]
+            ),
+        }
+        if METRICS.enabled:
+            # Stages run in this process only when decoding in-process
+            metrics["pipeline"] = METRICS.to_dict()
+        return metrics
+
+    def prometheus(self) -> str:
+        """Service and pipeline metrics in the Prometheus text format."""
+        lines = [
+            "# TYPE smt_service_errors_total counter",
+            f"smt_service_errors_total {self.errors}",
+        ]
+        for field, kind in (
+            ("count", "counter"), ("p50_ms", "gauge"), ("p99_ms", "gauge")
+        ):
+            lines.append(f"# TYPE smt_service_request_{field} {kind}")
+            for path, tracker in self.latency.items():
+                lines.append(
+                    f'smt_service_request_{field}{{path="{path}"}} '
+                    f"{tracker.summary()[field]}"
+                )
+        for key, value in self.batcher.stats().items():
+            lines.append(f"# TYPE smt_service_{key} gauge")
+            lines.append(f"smt_service_{key} {value}")
+
+        models = sorted(self.batcher.models.values(), key=lambda m: m["pid"])
+        for name, field in (
+            ("model_info", None),
+            ("model_reload_seconds", "reload_seconds"),
+            ("model_reloads_total", "reloads"),
+            ("model_reload_failures_total", "failures"),
+        ):
+            samples = [
+                (m, 1 if field is None else m.get(field)) for m in models
+            ]
+            samples = [(m, v) for m, v in samples if v is not None]
+            if not samples:
+                continue
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE smt_{name} {kind}")
+            for m, value in samples:
+                lines.append(
+                    f'smt_{name}{{pid="{m["pid"]}",'
+                    f'version="{m["version"]}"}} {value}'
+                )
+
+        text = "\n".join(lines) + "\n"
+        if METRICS.enabled:
+            text += METRICS.to_prometheus()
+        return text
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        """
+        Route one request; returns (status, payload), where a str
+        payload is sent as plain text and anything else as JSON.
+        """
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path == "/metrics/prometheus":
+            return 200, self.prometheus()
+
+        handlers = {"/translate": self.translate, "/bleu": self.bleu}
+        if path not in handlers:
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        start = time.perf_counter()
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be a JSON object")
+            result = await handlers[path](payload)
+        except ValueError as exc:
+            self.errors += 1
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            self.errors += 1
+            return 500, {"error": repr(exc)}
+
+        self.latency[path].add(time.perf_counter() - start)
+        return 200, result
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve HTTP/1.1 requests on one (keep-alive) connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(
+                    method, path.split("?", 1)[0], body
+                )
+                if isinstance(payload, str):
+                    data = payload.encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    data = json.dumps(payload, ensure_ascii=False) \
+                        .encode("utf-8")
+                    content_type = "application/json"
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: {content_type}; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                    "\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """Load the model, start the batcher and serve until cancelled."""
+    initargs = (
+        args.model, args.decoder, args.beam_width, args.k, args.cache_size,
+        args.watch_dir, args.poll_interval
+    )
+
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=init_worker,
+            initargs=initargs,
+        )
+        max_inflight = args.workers
+    else:
+        # Decode in-process; the thread only keeps the event loop free
+        init_worker(*initargs)
+        executor = ThreadPoolExecutor(max_workers=1)
+        max_inflight = 1
+
+    batcher = MicroBatcher(
+        executor,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        max_inflight=max_inflight,
+    )
+    service = TranslationService(batcher)
+
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle, args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+        executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTTP/JSON translation service with micro-batching"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Decoding processes (0 decodes in-process)")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--model", default=str(ROOT_DIR / DEFAULT_MODEL_FILE))
+    parser.add_argument("--decoder", choices=["greedy", "beam"],
+                        default="greedy")
+    parser.add_argument("--beam-width", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--cache-size", type=int, default=10000,
+                        help="Per-process translation cache (0 disables)")
+    parser.add_argument("--stage-metrics", action="store_true",
+                        help="Record pipeline stage timings, OOV rate "
+                             "and cache counters (in-process decoding)")
+    parser.add_argument("--watch-dir", default=None,
+                        help="Hot-reload the newest smt_model*.bin in this "
+                             "directory (--model is the fallback)")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between model directory checks")
+    args = parser.parse_args()
+
+    if args.stage_metrics:
+        METRICS.enable()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
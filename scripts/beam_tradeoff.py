@@ -0,0 +1,91 @@
+"""
+beam_tradeoff.py
+-----------------
+Latency / quality trade-off of the beam-search decoder on data/test.
+
+Decodes the test set with greedy decoding and a grid of beam widths
+and candidate counts, and prints BLEU against time per sentence.
+
+Usage:
+    python scripts/beam_tradeoff.py [--beams 1 2 5 10] [--ks 1 3 5 10]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.corpus_bleu import BleuAccumulator
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.tokenizer import tokenize
+from src.translation.decode_index import DecodeIndex
+from src.translation.decoder import decode_beam, decode_sentence
+from src.translation.ibm_model1 import train_ibm_model1
+from src.translation.language_model import train_bigram_language_model
+from src.translation.translation_model import load_compact_corpus
+
+
+def read_tokenized(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [tokenize(clean_text(line.strip())) for line in f]
+
+
+def evaluate(decode, sources, references, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        outputs = [decode(tokens) for tokens in sources]
+    per_sentence = (time.perf_counter() - start) / (repeats * len(sources))
+
+    accumulator = BleuAccumulator()
+    for out, ref in zip(outputs, references):
+        accumulator.add(out, ref)
+
+    return accumulator.score()["bleu"], per_sentence
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Beam-search BLEU / latency trade-off report"
+    )
+    parser.add_argument("--source", default="data/test/source_test.txt")
+    parser.add_argument("--reference", default="data/test/reference.txt")
+    parser.add_argument("--beams", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    src_corpus, tgt_corpus = load_compact_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    tm, _ = train_ibm_model1(src_corpus, tgt_corpus)
+    lm = train_bigram_language_model(tgt_corpus)
+    index = DecodeIndex.build(tm, k=max(args.ks))
+
+    sources = read_tokenized(args.source)
+    references = read_tokenized(args.reference)
+
+    print(f"{'Decoder':<18}{'BLEU':>8}{'us/sentence':>14}")
+
+    bleu, seconds = evaluate(
+        lambda s: decode_sentence(s, tm, lm, index=index),
+        sources, references, args.repeats
+    )
+    print(f"{'greedy':<18}{bleu:>8.4f}{seconds * 1e6:>14.1f}")
+
+    for beam_width in args.beams:
+        for k in args.ks:
+            bleu, seconds = evaluate(
+                lambda s: decode_beam(
+                    s, tm, lm, index=index, beam_width=beam_width, k=k
+                ),
+                sources, references, args.repeats
+            )
+            label = f"beam={beam_width} k={k}"
+            print(f"{label:<18}{bleu:>8.4f}{seconds * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+benchmark.py
+-------------
+End-to-end pipeline benchmark on a synthetic parallel corpus.
+
+Generates a deterministic corpus (see src/utils/synthetic.py), then
+times each pipeline stage and measures its peak traced memory:
+
+    clean_text, load_parallel_corpus, train_translation_model,
+    train_bigram_language_model, decode_sentence, compute_bleu_score
+
+Each stage runs at least --repeats times and for at least --min-time
+seconds, and the best run is reported. Results are written as JSON.
+With --baseline, stage times and peak memory are compared against an
+earlier results file and the script exits with status 1 if any stage
+is slower than --tolerance or uses more memory than
+--memory-tolerance allows. A baseline from a different corpus or
+settings (generator version, lines, vocabulary, Zipf exponent, seed,
+workers, ...) is refused with status 2 unless --force is given.
+
+Usage:
+    python scripts/benchmark.py [--lines 100000] [--vocab-size 10000] \
+        [--zipf 1.1] [--output results/benchmark.json]
+    python scripts/benchmark.py --baseline results/benchmark.json \
+        --output results/benchmark_new.json [--repeats 3] [--min-time 1] \
+        [--tolerance 0.2] [--memory-tolerance 0.1] [--force]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.bleu_score import compute_bleu_score
+from src.preprocessing.clean_text import clean_text
+from src.translation.decoder import decode_sentence
+from src.translation.language_model import train_bigram_language_model
+from src.translation.translation_model import (
+    load_parallel_corpus,
+    train_translation_model,
+)
+from src.utils.synthetic import GENERATOR_VERSION, generate_parallel_corpus
+
+# Peak-memory changes smaller than this are noise, whatever the ratio
+MEMORY_FLOOR_MB = 1.0
+
+
+def measure(fn, repeats, min_time, memory):
+    """
+    Run `fn` and return (result, best seconds, runs, peak MB or None).
+
+    `fn` runs at least `repeats` times and until `min_time` seconds
+    have been spent, so short stages are not judged by one noisy run.
+    Timing runs are untraced; peak memory is taken from one extra
+    run under tracemalloc, since tracing slows allocation down.
+    """
+    best = float("inf")
+    spent = 0.0
+    runs = 0
+    while runs < repeats or spent < min_time:
+        # Garbage left by earlier runs should not be collected in this one
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = round(peak / 1e6, 3)
+
+    return result, best, runs, peak
+
+
+def clean_file(path):
+    lines = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            clean_text(line.strip())
+            lines += 1
+    return lines
+
+
+def run_stages(source_file, target_file, args):
+    """Benchmark every stage; returns one record per stage."""
+    records = []
+
+    def stage(name, fn, items):
+        result, seconds, runs, peak = measure(
+            fn, args.repeats, args.min_time, not args.no_memory
+        )
+        count = items(result)
+        records.append({
+            "name": name,
+            "items": count,
+            "runs": runs,
+            "seconds": round(seconds, 6),
+            "items_per_second": round(count / seconds, 1) if seconds else None,
+            "peak_memory_mb": peak,
+        })
+        print(f"{name:<30}{count:>12}{seconds:>12.3f}s"
+              f"{'' if peak is None else f'{peak:>12.1f} MB'}", flush=True)
+        return result
+
+    header = f"{'Stage':<30}{'Items':>12}{'Time':>13}"
+    print(header if args.no_memory else f"{header}{'Peak memory':>15}")
+
+    stage(
+        "clean_text",
+        lambda: clean_file(source_file) + clean_file(target_file),
+        lambda lines: lines,
+    )
+    src_sents, tgt_sents = stage(
+        "load_parallel_corpus",
+        lambda: load_parallel_corpus(source_file, target_file),
+        lambda corpus: len(corpus[0]),
+    )
+    translation_model = stage(
+        "train_translation_model",
+        lambda: train_translation_model(
+            src_sents, tgt_sents, workers=args.workers
+        ),
+        lambda _: len(src_sents),
+    )
+    language_model = stage(
+        "train_bigram_language_model",
+        lambda: train_bigram_language_model(tgt_sents, workers=args.workers),
+        lambda _: len(tgt_sents),
+    )
+
+    sources = src_sents[:args.decode_lines]
+    references = tgt_sents[:args.decode_lines]
+    candidates = stage(
+        "decode_sentence",
+        lambda: [
+            decode_sentence(tokens, translation_model, language_model)
+            for tokens in sources
+        ],
+        len,
+    )
+    stage(
+        "compute_bleu_score",
+        lambda: [
+            compute_bleu_score(candidate, reference)
+            for candidate, reference in zip(candidates, references)
+        ],
+        len,
+    )
+
+    return records
+
+
+def config_differences(results, baseline, sections):
+    """
+    List settings that differ between two results files.
+
+    Args:
+        results (dict): Current results
+        baseline (dict): Baseline results
+        sections (Tuple[str]): Top-level sections to compare
+
+    Returns:
+        List[str]: "section.key: baseline -> current" per difference
+    """
+    differences = []
+    for section in sections:
+        old = baseline.get(section, {})
+        new = results.get(section, {})
+        for key in sorted(set(old) | set(new)):
+            if old.get(key) != new.get(key):
+                differences.append(
+                    f"{section}.{key}: {old.get(key)!r} -> {new.get(key)!r}"
+                )
+    return differences
+
+
+def compare(records, baseline, tolerance, memory_tolerance):
+    """
+    Print per-stage time and peak-memory ratios against a baseline.
+
+    Returns:
+        List[str]: Stages slower than 1 + tolerance, or using more
+        peak memory than 1 + memory_tolerance (and MEMORY_FLOOR_MB)
+    """
+    baseline = {r["name"]: r for r in baseline["stages"]}
+
+    regressions = []
+    print(f"\n{'Stage':<30}{'Baseline':>12}{'Current':>12}{'Ratio':>9}"
+          f"{'Memory':>9}")
+    for record in records:
+        old = baseline.get(record["name"])
+        if old is None or not old["seconds"]:
+            continue
+
+        flags = []
+        ratio = record["seconds"] / old["seconds"]
+        if ratio > 1 + tolerance:
+            flags.append("time")
+
+        memory = ""
+        old_peak = old.get("peak_memory_mb")
+        new_peak = record["peak_memory_mb"]
+        if old_peak and new_peak is not None:
+            memory_ratio = new_peak / old_peak
+            memory = f"{memory_ratio:>9.2f}"
+            if memory_ratio > 1 + memory_tolerance and \
+                    new_peak - old_peak > MEMORY_FLOOR_MB:
+                flags.append("memory")
+
+        if flags:
+            regressions.append(f"{record['name']} ({', '.join(flags)})")
+        flag = f"  REGRESSION ({', '.join(flags)})" if flags else ""
+        print(f"{record['name']:<30}{old['seconds']:>11.3f}s"
+              f"{record['seconds']:>11.3f}s{ratio:>9.2f}{memory:>9}{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the SMT pipeline on a synthetic corpus"
+    )
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--vocab-size", type=int, default=10000)
+    parser.add_argument("--zipf", type=float, default=1.1,
+                        help="Zipf exponent of the word distribution")
+    parser.add_argument("--min-length", type=int, default=3)
+    parser.add_argument("--max-length", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None,
+                        help="Keep the generated corpus here "
+                             "(default: a temporary directory)")
+    parser.add_argument("--decode-lines", type=int, default=10000,
+                        help="Sentences decoded and scored with BLEU")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Minimum timing runs per stage (best is "
+                             "reported)")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="Keep repeating a stage until this many "
+                             "seconds were spent on it")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the traced peak-memory runs")
+    parser.add_argument("--output", default="results/benchmark.json")
+    parser.add_argument("--baseline", default=None,
+                        help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1,
+                        help="Allowed peak-memory growth vs. baseline")
+    parser.add_argument("--force", action="store_true",
+                        help="Compare even if the baseline corpus or "
+                             "settings differ")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="smt_bench_")
+    os.makedirs(data_dir, exist_ok=True)
+    source_file = os.path.join(data_dir, "source.txt")
+    target_file = os.path.join(data_dir, "target.txt")
+
+    corpus_config = {
+        "num_lines": args.lines,
+        "vocab_size": args.vocab_size,
+        "zipf_exponent": args.zipf,
+        "min_length": args.min_length,
+        "max_length": args.max_length,
+        "noise": args.noise,
+        "seed": args.seed,
+    }
+
+    start = time.perf_counter()
+    corpus_stats = generate_parallel_corpus(
+        source_file, target_file, **corpus_config
+    )
+    print(f"Generated {corpus_stats['lines']} lines "
+          f"({corpus_stats['tokens']} source tokens) in "
+          f"{time.perf_counter() - start:.2f} s\n")
+
+    try:
+        records = run_stages(source_file, target_file, args)
+    finally:
+        if args.data_dir is None:
+            os.remove(source_file)
+            os.remove(target_file)
+            os.rmdir(data_dir)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": {
+            "generator_version": GENERATOR_VERSION,
+            **corpus_config,
+            "tokens": corpus_stats["tokens"],
+        },
+        "settings": {
+            "decode_lines": args.decode_lines,
+            "workers": args.workers,
+            "repeats": args.repeats,
+            "min_time": args.min_time,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": records,
+        # ru_maxrss is KB on Linux, bytes on macOS
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1e6 if sys.platform == "darwin" else 1e3), 1
+        ),
+    }
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to: {args.output}")
+
+    if baseline is not None:
+        # Different machines are worth knowing about, different
+        # workloads make the comparison meaningless
+        for difference in config_differences(
+            results, baseline, ("environment",)
+        ):
+            print(f"Warning: environment differs: {difference}")
+
+        differences = [
+            d for d in config_differences(
+                results, baseline, ("corpus", "settings")
+            )
+            if not d.startswith(("settings.repeats", "settings.min_time"))
+        ]
+        if differences:
+            print("\nBaseline used a different corpus or settings:")
+            for difference in differences:
+                print(f"  {difference}")
+            if not args.force:
+                print("Not comparing (use --force to compare anyway)")
+                sys.exit(2)
+
+        regressions = compare(
+            records, baseline, args.tolerance, args.memory_tolerance
+        )
+        if regressions:
+            print(f"\nRegressed stages: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+build_model.py
+---------------
+Train the translation model and bigram LM once and save them as a
+memory-mappable model file that app/app.py loads at startup.
+
+--min-prob, --top-k and --cumulative-mass prune the translation
+table before saving; its size before and after pruning is printed.
+--quantize-bits 8 (or 16) stores both models' values as codes into a
+binned or k-means codebook (--quantize-method).
+
+With --metrics, per-stage timings and training throughput are
+printed and written to a JSON (or Prometheus `.prom`) file; --profile
+also writes a cProfile dump per stage next to it.
+
+Usage:
+    python scripts/build_model.py [--output models/smt_model.bin] \
+        [--metrics results/build_metrics.json] [--profile]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.translation.ibm_model1 import train_ibm_model1
+from src.translation.language_model import train_bigram_language_model
+from src.translation.model_io import DEFAULT_MODEL_FILE, save_model_file
+from src.translation.quantization import METHODS
+from src.translation.tables import BigramTable, TranslationTable
+from src.translation.translation_model import load_compact_corpus
+from src.utils.metrics import METRICS, stage
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the SMT models and save a model file"
+    )
+    parser.add_argument("--source", default="data/train/source.txt")
+    parser.add_argument("--target", default="data/train/target.txt")
+    parser.add_argument("--output", default=DEFAULT_MODEL_FILE)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--min-prob", type=float, default=0.0,
+                        help="Drop translations below this probability")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="Keep at most k translations per word")
+    parser.add_argument("--cumulative-mass", type=float, default=None,
+                        help="Keep each word's best translations up to "
+                             "this share of its probability mass")
+    parser.add_argument("--quantize-bits", type=int, choices=[8, 16],
+                        default=None,
+                        help="Quantize TM probabilities and LM log-probs")
+    parser.add_argument("--quantize-method", choices=METHODS,
+                        default="binned")
+    parser.add_argument("--metrics", default=None,
+                        help="Write stage metrics to this file")
+    parser.add_argument("--profile", action="store_true",
+                        help="Also capture a cProfile per stage")
+    args = parser.parse_args()
+
+    if args.metrics:
+        METRICS.enable(profile=args.profile)
+
+    start = time.perf_counter()
+    with stage("load_corpus") as timer:
+        src_corpus, tgt_corpus = load_compact_corpus(args.source, args.target)
+        timer.add(len(src_corpus))
+    with stage("train.ibm_model1", items=len(src_corpus)):
+        translation_model, _ = train_ibm_model1(
+            src_corpus, tgt_corpus, iterations=args.iterations,
+            verbose=bool(args.metrics)
+        )
+    language_model = train_bigram_language_model(tgt_corpus)
+
+    translation_model = TranslationTable.from_dict(translation_model)
+    before = translation_model.stats()
+    translation_model = translation_model.prune(
+        args.min_prob, args.top_k, args.cumulative_mass
+    )
+
+    if args.quantize_bits:
+        translation_model = translation_model.quantize(
+            args.quantize_bits, args.quantize_method
+        )
+        language_model = BigramTable.from_dict(language_model).quantize(
+            args.quantize_bits, args.quantize_method
+        )
+    after = translation_model.stats()
+
+    with stage("save_model"):
+        save_model_file(args.output, translation_model, language_model)
+
+    print(f"Sentence pairs: {len(src_corpus)}")
+    print(f"TM entries    : {before['entries']} -> {after['entries']} "
+          f"({before['nbytes'] / 1e6:.2f} MB -> "
+          f"{after['nbytes'] / 1e6:.2f} MB)")
+    print(f"Saved model to: {args.output}")
+    print(f"Total time    : {time.perf_counter() - start:.2f} s")
+
+    if args.metrics:
+        print(f"\n{'Stage':<30}{'Calls':>7}{'Seconds':>10}{'Sent/s':>12}")
+        for name, stats in METRICS.to_dict()["stages"].items():
+            print(f"{name:<30}{stats['calls']:>7}{stats['seconds']:>10.3f}"
+                  f"{stats['items_per_second']:>12,.0f}")
+
+        METRICS.dump(args.metrics)
+        print(f"\nMetrics written to: {args.metrics}")
+        if args.profile:
+            prefix = args.metrics.rsplit(".", 1)[0] + "."
+            for path in METRICS.dump_profiles(prefix).values():
+                print(f"Profile written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
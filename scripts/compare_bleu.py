@@ -0,0 +1,76 @@
+"""
+compare_bleu.py
+----------------
+Is system B's BLEU really different from system A's?
+
+Runs a paired bootstrap and an approximate randomization test on
+two translation files of the same test set.
+
+Usage:
+    python scripts/compare_bleu.py \
+        --system-a results/greedy.txt \
+        --system-b results/beam.txt \
+        [--reference data/test/reference.txt] \
+        [--samples 1000] [--seed 0]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.significance import (
+    approximate_randomization,
+    file_statistics,
+    paired_bootstrap,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="BLEU significance test between two systems"
+    )
+    parser.add_argument("--system-a", required=True)
+    parser.add_argument("--system-b", required=True)
+    parser.add_argument(
+        "--reference", nargs="+", default=["data/test/reference.txt"],
+        help="One or more reference files (multi-reference BLEU)"
+    )
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="Bootstrap samples / randomization trials")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--max-n", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats_a, stats_b = file_statistics(
+        [args.system_a, args.system_b], args.reference, args.max_n
+    )
+    scored = time.perf_counter()
+
+    boot = paired_bootstrap(
+        stats_a, stats_b, args.samples, args.seed, args.confidence
+    )
+    ar = approximate_randomization(stats_a, stats_b, args.samples, args.seed)
+    tested = time.perf_counter()
+
+    level = f"{args.confidence:.0%}"
+    print(f"Sentences: {len(stats_a)}")
+    print(f"BLEU A: {boot['bleu_a']:.4f} "
+          f"({level} CI {boot['ci_a_low']:.4f} - {boot['ci_a_high']:.4f})")
+    print(f"BLEU B: {boot['bleu_b']:.4f} "
+          f"({level} CI {boot['ci_b_low']:.4f} - {boot['ci_b_high']:.4f})")
+    print(f"Delta (B - A): {ar['delta']:+.4f} "
+          f"({level} CI {boot['ci_low']:+.4f} - {boot['ci_high']:+.4f})")
+    print(f"Paired bootstrap p-value (B not better): {boot['p_value']:.4f}")
+    print(f"Approximate randomization p-value: {ar['p_value']:.4f}")
+    print(f"Scoring {scored - start:.2f} s, "
+          f"tests {tested - scored:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+evaluate_bleu.py
+-----------------
+Corpus BLEU of a translation file against a reference file.
+
+Writes one CSV row per sentence plus a final "corpus" row.
+Several --reference files give multi-reference BLEU.
+
+Usage:
+    python scripts/evaluate_bleu.py \
+        [--candidate results/translations.txt] \
+        [--reference data/test/reference.txt] \
+        [--csv results/bleu_scores.csv]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.corpus_bleu import evaluate_files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Corpus BLEU of a translation file"
+    )
+    parser.add_argument("--candidate", default="results/translations.txt")
+    parser.add_argument(
+        "--reference", nargs="+", default=["data/test/reference.txt"],
+        help="One or more reference files (multi-reference BLEU)"
+    )
+    parser.add_argument("--csv", default="results/bleu_scores.csv")
+    parser.add_argument("--max-n", type=int, default=4)
+    args = parser.parse_args()
+
+    results = evaluate_files(
+        args.candidate, args.reference, args.csv, args.max_n
+    )
+
+    print(f"Sentences: {results.pop('sentences')}")
+    for key, value in results.items():
+        print(f"{key}: {value:.4f}")
+    print(f"Per-sentence scores written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+load_test.py
+-------------
+Local load generator for app/service.py.
+
+Opens --concurrency keep-alive connections that send /translate
+requests with sentences from --input until --requests have been
+made, then prints throughput, client-side latency percentiles and
+the service's own /metrics.
+
+With --start-server the service is started on a free local port
+first (and stopped afterwards), so no other setup is needed.
+
+Usage:
+    python scripts/load_test.py --start-server [--requests 2000] \
+        [--concurrency 32] [--max-batch-size 32] [--max-wait-ms 5]
+    python scripts/load_test.py --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one HTTP/1.1 request and return the decoded JSON body."""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\n"
+        "Host: localhost\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    status = int(status_line.split()[1])
+
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+
+    data = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}: {data}")
+    return data
+
+
+async def run_load(host, port, sentences, total, concurrency):
+    """Drive the service; returns per-request latencies in seconds."""
+    latencies = []
+    counter = iter(range(total))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                text = sentences[i % len(sentences)]
+                start = time.perf_counter()
+                await request(reader, writer, "POST", "/translate",
+                              {"text": text})
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+async def fetch_metrics(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await request(reader, writer, "GET", "/metrics")
+    finally:
+        writer.close()
+
+
+def wait_until_up(host, port, process, timeout=120.0):
+    """Poll the port until the service accepts connections."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("service exited during startup")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("service did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the translation service"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--input", default="data/train/source.txt")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--start-server", action="store_true",
+                        help="Start app/service.py on a free port")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+
+    process = None
+    port = args.port
+    if args.start_server:
+        with socket.socket() as sock:
+            sock.bind((args.host, 0))
+            port = sock.getsockname()[1]
+
+        process = subprocess.Popen([
+            sys.executable, str(ROOT_DIR / "app" / "service.py"),
+            "--host", args.host, "--port", str(port),
+            "--workers", str(args.workers),
+            "--max-batch-size", str(args.max_batch_size),
+            "--max-wait-ms", str(args.max_wait_ms),
+            "--cache-size", str(args.cache_size),
+        ], cwd=str(ROOT_DIR))
+
+    try:
+        if process is not None:
+            wait_until_up(args.host, port, process)
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run_load(
+            args.host, port, sentences, args.requests, args.concurrency
+        ))
+        seconds = time.perf_counter() - start
+        metrics = asyncio.run(fetch_metrics(args.host, port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"Requests    : {len(latencies)} "
+          f"(concurrency {args.concurrency})")
+    print(f"Throughput  : {len(latencies) / seconds:,.0f} requests/s")
+    print(f"Latency     : p50 {p50:.2f} ms, p99 {p99:.2f} ms (client)")
+    print("Service metrics:")
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+quantization_report.py
+-----------------------
+Memory savings and quality impact of quantized model storage.
+
+Trains the translation model and bigram LM once, then for float64
+storage and each 8/16-bit binned/k-means codebook reports the bytes
+used by both tables, corpus BLEU (greedy and beam decoding) and the LM
+perplexity of the references.
+
+Quality is reported on data/test and on a held-out set: the dev split
+written by scripts/split_kaggle_dataset.py if it exists, otherwise the
+last --holdout training pairs, which are then left out of training.
+The sentence count of each set is printed; a BLEU delta on a handful
+of sentences says nothing about the quantization.
+
+Usage:
+    python scripts/quantization_report.py [--bits 8 16] \
+        [--methods binned kmeans] [--holdout 300]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.evaluation.corpus_bleu import BleuAccumulator
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.corpus import Corpus
+from src.preprocessing.tokenizer import tokenize
+from src.translation.decode_index import DecodeIndex
+from src.translation.decoder import decode_beam, decode_sentence
+from src.translation.ibm_model1 import train_ibm_model1
+from src.translation.language_model import (
+    score_sentences,
+    train_bigram_language_model,
+)
+from src.translation.quantization import METHODS
+from src.translation.tables import BigramTable, TranslationTable
+from src.translation.translation_model import iter_parallel_corpus
+
+# Fewer evaluation sentences than this make BLEU deltas noise
+MIN_SENTENCES = 100
+
+
+def read_tokenized(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [tokenize(clean_text(line.strip())) for line in f]
+
+
+def corpus_bleu(outputs, references):
+    accumulator = BleuAccumulator()
+    for out_tokens, ref_tokens in zip(outputs, references):
+        accumulator.add(out_tokens, ref_tokens)
+    return accumulator.score()["bleu"]
+
+
+def evaluate(tm, lm, sources, references):
+    """
+    BLEU (greedy, beam), beam outputs and reference perplexity of one
+    model pair.
+    """
+    index = DecodeIndex.build(tm, k=5)
+    greedy = [decode_sentence(s, tm, lm, index=index) for s in sources]
+    beam = [decode_beam(s, tm, lm, index=index) for s in sources]
+    _, perplexity = score_sentences(references, lm)
+    return (
+        corpus_bleu(greedy, references), corpus_bleu(beam, references),
+        perplexity, beam
+    )
+
+
+def load_training_pairs(source, target, dev_source, dev_reference, holdout):
+    """
+    Training corpora and the held-out evaluation set.
+
+    Returns:
+        Tuple: source Corpus, target Corpus, held-out name, held-out
+        sources and references (token lists)
+    """
+    pairs = list(iter_parallel_corpus(source, target))
+
+    if os.path.exists(dev_source) and os.path.exists(dev_reference):
+        name = dev_source
+        held_out = list(zip(
+            read_tokenized(dev_source), read_tokenized(dev_reference)
+        ))
+    else:
+        holdout = min(holdout, len(pairs) // 2)
+        name = f"last {holdout} training pairs (not trained on)"
+        held_out = pairs[len(pairs) - holdout:]
+        pairs = pairs[:len(pairs) - holdout]
+
+    src_corpus, tgt_corpus = Corpus(), Corpus()
+    for src_tokens, tgt_tokens in pairs:
+        src_corpus.append(src_tokens)
+        tgt_corpus.append(tgt_tokens)
+
+    return (
+        src_corpus, tgt_corpus, name,
+        [src for src, _ in held_out], [tgt for _, tgt in held_out]
+    )
+
+
+def report(name, configs, sources, references):
+    """Print one table of size, BLEU and perplexity per storage."""
+    print(f"\n{name}: {len(sources)} sentences")
+    print(f"{'Storage':<12}{'Value bytes':>13}{'Saved':>8}"
+          f"{'BLEU greedy':>13}{'BLEU beam':>11}{'dBLEU':>9}"
+          f"{'Perplexity':>12}{'dPPL':>9}{'Same output':>13}")
+
+    base = None
+    for storage, q_tm, q_lm in configs:
+        values = q_tm.probs.nbytes + q_lm.log_probs.nbytes
+        greedy, beam, perplexity, outputs = evaluate(
+            q_tm, q_lm, sources, references
+        )
+        if base is None:
+            base = (values, beam, perplexity, outputs)
+        same = sum(a == b for a, b in zip(outputs, base[3])) / len(outputs)
+
+        print(f"{storage:<12}{values:>13,}{1 - values / base[0]:>8.0%}"
+              f"{greedy:>13.4f}{beam:>11.4f}{beam - base[1]:>+9.4f}"
+              f"{perplexity:>12.3f}{perplexity - base[2]:>+9.3f}"
+              f"{same:>13.0%}")
+
+    if len(sources) < MIN_SENTENCES:
+        print(f"Only {len(sources)} sentences: BLEU and its deltas on this "
+              "set are not meaningful.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report quantized model size, BLEU and perplexity"
+    )
+    parser.add_argument("--source", default="data/train/source.txt")
+    parser.add_argument("--target", default="data/train/target.txt")
+    parser.add_argument("--test-source", default="data/test/source_test.txt")
+    parser.add_argument("--reference", default="data/test/reference.txt")
+    parser.add_argument("--dev-source", default="data/dev/source_dev.txt")
+    parser.add_argument("--dev-reference",
+                        default="data/dev/reference_dev.txt")
+    parser.add_argument("--holdout", type=int, default=300,
+                        help="Training pairs held out when there is no "
+                             "dev split")
+    parser.add_argument("--bits", type=int, nargs="+", default=[8, 16])
+    parser.add_argument("--methods", nargs="+", choices=METHODS,
+                        default=list(METHODS))
+    args = parser.parse_args()
+
+    src_corpus, tgt_corpus, held_out_name, held_sources, held_references = \
+        load_training_pairs(
+            args.source, args.target, args.dev_source, args.dev_reference,
+            args.holdout
+        )
+    translation_probs, _ = train_ibm_model1(src_corpus, tgt_corpus)
+    tm = TranslationTable.from_dict(translation_probs)
+    lm = BigramTable.from_dict(train_bigram_language_model(tgt_corpus))
+
+    configs = [("float64", tm, lm)] + [
+        (f"{method}-{bits}", tm.quantize(bits, method),
+         lm.quantize(bits, method))
+        for bits in args.bits for method in args.methods
+    ]
+
+    print(f"Training pairs: {len(src_corpus)}, TM entries: "
+          f"{len(tm.probs)}, LM bigrams: {len(lm.log_probs)}")
+    report(args.test_source, configs,
+           read_tokenized(args.test_source), read_tokenized(args.reference))
+    report(held_out_name, configs, held_sources, held_references)
+
+    print("\nValue bytes: TM probabilities plus LM log-probs (ids, keys "
+          "and vocabularies are not quantized). dBLEU (beam) and dPPL "
+          "are vs. float64; Same output is the share of beam "
+          "translations identical to float64.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,96 @@
-import os
+"""
+split_kaggle_dataset.py
+------------------------
+Split a raw Kaggle/Tatoeba dump (`english \t hindi \t attribution`
+per line) into train/dev/test files in one streaming pass.
 
-# Input file (raw Kaggle/Tatoeba format)
-INPUT_FILE = "data/raw/hindi.txt"
+Pairs are assigned to splits by hashing, exact duplicates are dropped
+with a Bloom filter and length/ratio filters are applied; memory does
+not grow with the size of the dump (see src/preprocessing/splitter.py).
 
-# Output files
-SOURCE_OUT = "data/train/source.txt"
-TARGET_OUT = "data/train/target.txt"
+data/test is maintained by hand, so no test split is written unless
+--test-ratio is given; the existing test files are left untouched.
 
-# Ensure output directory exists
-os.makedirs("data/train", exist_ok=True)
+Usage:
+    python scripts/split_kaggle_dataset.py [--input data/raw/hindi.txt] \
+        [--output-dir data] [--dev-ratio 0.05] [--test-ratio 0] \
+        [--shards 1]
+"""
 
-source_sentences = []
-target_sentences = []
+import argparse
+import sys
+import time
+from pathlib import Path
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    for line in f:
-        line = line.strip()
-        if not line:
-            continue
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
 
-        # Split by tab
-        parts = line.split("\t")
+from src.preprocessing.splitter import SPLIT_FILES, split_parallel_dump
 
-        # We expect at least: English \t Hindi \t metadata
-        if len(parts) < 2:
-            continue
 
-        english = parts[0].strip()
-        hindi = parts[1].strip()
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a raw parallel dump into train/dev/test splits"
+    )
+    parser.add_argument("--input", default="data/raw/hindi.txt")
+    parser.add_argument("--output-dir", default="data")
+    parser.add_argument("--dev-ratio", type=float, default=0.05)
+    parser.add_argument("--test-ratio", type=float, default=0.0,
+                        help="Share of pairs written to data/test "
+                             "(default 0 keeps the hand-maintained "
+                             "test files)")
+    parser.add_argument("--min-length", type=int, default=1,
+                        help="Fewest tokens per side")
+    parser.add_argument("--max-length", type=int, default=80,
+                        help="Most tokens per side")
+    parser.add_argument("--max-ratio", type=float, default=9.0,
+                        help="Most tokens on the longer side per token "
+                             "on the shorter side")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Write the train split as N shards")
+    parser.add_argument("--dedup-capacity", type=int, default=10_000_000,
+                        help="Bloom filter capacity (0 keeps duplicates)")
+    parser.add_argument("--dedup-error-rate", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
 
-        # Skip empty entries
-        if english and hindi:
-            source_sentences.append(english)
-            target_sentences.append(hindi)
+    start = time.perf_counter()
+    stats = split_parallel_dump(
+        args.input,
+        args.output_dir,
+        dev_ratio=args.dev_ratio,
+        test_ratio=args.test_ratio,
+        min_length=args.min_length,
+        max_length=args.max_length,
+        max_ratio=args.max_ratio,
+        num_shards=args.shards,
+        dedup_capacity=args.dedup_capacity or None,
+        dedup_error_rate=args.dedup_error_rate,
+        seed=args.seed,
+    )
+    seconds = time.perf_counter() - start
 
-# Write to training files
-with open(SOURCE_OUT, "w", encoding="utf-8") as sf, \
-     open(TARGET_OUT, "w", encoding="utf-8") as tf:
+    print("Dataset split complete!")
+    print(f"Lines read: {stats['lines']} "
+          f"({stats['lines'] / max(seconds, 1e-9):.0f} lines/s)")
+    print(f"Dropped: {stats['malformed']} malformed, {stats['empty']} empty, "
+          f"{stats['too_short']} too short, {stats['too_long']} too long, "
+          f"{stats['bad_ratio']} bad length ratio, "
+          f"{stats['duplicates']} duplicates")
+    for split, (source, target) in SPLIT_FILES.items():
+        if stats[split] or split == "train":
+            where = (
+                f"{args.shards} shards in {Path(args.output_dir, 'train')}"
+                if split == "train" and args.shards > 1
+                else f"{Path(args.output_dir, source)}, "
+                     f"{Path(args.output_dir, target)}"
+            )
+            print(f"{split}: {stats[split]} pairs -> {where}")
+    if "dedup_bytes" in stats:
+        print(f"Dedup filter: {stats['dedup_bytes'] / 1e6:.1f} MB, "
+              f"estimated false-positive rate "
+              f"{stats['dedup_false_positive_rate']:.1e}")
 
-    for src, tgt in zip(source_sentences, target_sentences):
-        sf.write(src + "\n")
-        tf.write(tgt + "\n")
 
-print("Dataset split complete!")
-print(f"Total sentence pairs: {len(source_sentences)}")
-print(f"Saved to: {SOURCE_OUT}, {TARGET_OUT}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
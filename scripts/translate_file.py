@@ -0,0 +1,66 @@
+"""
+translate_file.py
+------------------
+Batch-translate a file of source sentences.
+
+Usage:
+    python scripts/translate_file.py \
+        [--input data/test/source_test.txt] \
+        [--output results/translations.txt] [--workers 4]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.translation.batch_translate import translate_file
+from src.translation.model_io import DEFAULT_MODEL_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Translate a file of source sentences"
+    )
+    parser.add_argument("--input", default="data/test/source_test.txt")
+    parser.add_argument("--output", default="results/translations.txt")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--model", default=DEFAULT_MODEL_FILE)
+    parser.add_argument(
+        "--decoder", choices=["greedy", "beam"], default="greedy"
+    )
+    parser.add_argument("--beam-width", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument(
+        "--cache-size", type=int, default=0,
+        help="LRU translation cache entries per worker (0 = off)"
+    )
+    args = parser.parse_args()
+
+    stats = translate_file(
+        args.input,
+        args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        model_file=args.model,
+        decoder=args.decoder,
+        beam_width=args.beam_width,
+        k=args.k,
+        cache_size=args.cache_size,
+    )
+
+    print(f"Translated {stats['sentences']} sentences "
+          f"({stats['unique_sentences']} unique) to {args.output}",
+          file=sys.stderr)
+    print(f"Time: {stats['seconds']:.2f} s "
+          f"({stats['sentences_per_second']:.0f} sentences/s)",
+          file=sys.stderr)
+    if "cache" in stats:
+        print(f"Cache: {stats['cache']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+update_model.py
+----------------
+Fold new sentence pairs into the persisted count tables and publish
+an updated model file without retraining on the whole corpus.
+
+The first run (no state file yet) counts the base training data.
+The published model is the relative-frequency translation model of
+`train_translation_model` plus the bigram LM; IBM Model-1 needs EM
+over all data and is rebuilt with scripts/build_model.py instead.
+It is therefore written to models/smt_incremental.bin by default, so
+it never replaces an IBM-1 serving file; publish it to a watched name
+(e.g. --output models/smt_model-v3.bin) to serve it. Overwriting
+models/smt_model.bin requires --force.
+
+Usage:
+    python scripts/update_model.py --new-source new/source.txt \
+        --new-target new/target.txt \
+        [--state models/smt_state.bin] \
+        [--output models/smt_incremental.bin] [--force]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.translation.model_io import DEFAULT_MODEL_FILE
+from src.translation.model_state import (
+    DEFAULT_INCREMENTAL_FILE,
+    DEFAULT_STATE_FILE,
+    ModelState,
+)
+from src.translation.translation_model import iter_parallel_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incrementally update the SMT models with new pairs"
+    )
+    parser.add_argument("--new-source", required=True)
+    parser.add_argument("--new-target", required=True)
+    parser.add_argument("--source", default="data/train/source.txt",
+                        help="Base training data (first run only)")
+    parser.add_argument("--target", default="data/train/target.txt",
+                        help="Base training data (first run only)")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--output", default=DEFAULT_INCREMENTAL_FILE)
+    parser.add_argument("--force", action="store_true",
+                        help=f"Allow replacing {DEFAULT_MODEL_FILE}")
+    args = parser.parse_args()
+
+    if not args.force and os.path.exists(args.output) and \
+            os.path.exists(DEFAULT_MODEL_FILE) and \
+            os.path.samefile(args.output, DEFAULT_MODEL_FILE):
+        parser.error(
+            f"{args.output} is the main serving model (usually IBM "
+            "Model-1); refusing to replace it without --force"
+        )
+
+    start = time.perf_counter()
+    if os.path.exists(args.state):
+        state = ModelState.load(args.state)
+    else:
+        state = ModelState.from_pairs(
+            iter_parallel_corpus(args.source, args.target)
+        )
+    loaded = time.perf_counter()
+
+    stats = state.update(iter_parallel_corpus(args.new_source, args.new_target))
+    updated = time.perf_counter()
+
+    state.save(args.state)
+    state.publish(args.output)
+
+    print(f"New pairs     : {stats['pairs']}")
+    print(f"Rows updated  : {stats['translation_rows']} TM, "
+          f"{stats['bigram_rows']} LM")
+    print(f"Load state    : {loaded - start:.2f} s")
+    print(f"Update        : {updated - loaded:.2f} s")
+    print(f"Saved state to: {args.state}")
+    print(f"Published     : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,17 @@
 bleu_score.py
 --------------
 This module computes the BLEU score for a single candidate
-sentence against a single reference sentence.
+sentence against one or more reference sentences.
 """
 
 import math
-from typing import List, Dict
+from typing import List, Dict, Union
 
-from src.evaluation.ngram_precision import modified_ngram_precision
+from src.evaluation.ngram_precision import (
+    ReferenceIndex,
+    extract_ngrams,
+    ngram_totals,
+)
 
 
 def brevity_penalty(candidate_len: int, reference_len: int) -> float:
@@ -47,29 +51,61 @@ def compute_bleu_score(
     Returns:
         Dict[str, float]: BLEU score details
     """
-    precisions = []
-    for n in range(1, max_n + 1):
-        p_n = modified_ngram_precision(candidate_tokens, reference_tokens, n)
-        precisions.append(p_n)
+    return compute_bleu_multi(
+        candidate_tokens, ReferenceIndex([reference_tokens], max_n), max_n
+    )
+
+
+def compute_bleu_multi(
+    candidate_tokens: List[str],
+    references: Union[ReferenceIndex, List[List[str]]],
+    max_n: int = 4
+) -> Dict[str, float]:
+    """
+    Compute BLEU against several references.
+
+    Candidate n-grams of all orders are extracted once and clipped by
+    their maximum count in any reference; the brevity penalty uses the
+    closest reference length. Pass a prebuilt ReferenceIndex to reuse
+    the reference n-grams across many candidates.
+
+    Args:
+        candidate_tokens (List[str]): SMT output tokens
+        references (ReferenceIndex or List[List[str]]): Reference
+            translations
+        max_n (int): Maximum n-gram order (default=4)
+
+    Returns:
+        Dict[str, float]: BLEU score details
+    """
+    if not isinstance(references, ReferenceIndex):
+        references = ReferenceIndex(references, max_n)
+
+    matches = references.clip(extract_ngrams(candidate_tokens, max_n))
+    totals = ngram_totals(len(candidate_tokens), max_n)
+
+    precisions = [
+        match / total if total else 0.0
+        for match, total in zip(matches, totals)
+    ]
+
+    bp = brevity_penalty(
+        len(candidate_tokens),
+        references.closest_length(len(candidate_tokens))
+    )
 
     # If any precision is zero, BLEU becomes zero
     if min(precisions) == 0:
         bleu = 0.0
     else:
         log_precision_sum = sum(math.log(p) for p in precisions) / max_n
-        bp = brevity_penalty(len(candidate_tokens), len(reference_tokens))
         bleu = bp * math.exp(log_precision_sum)
 
-    return {
-        "bleu": bleu,
-        "brevity_penalty": brevity_penalty(
-            len(candidate_tokens), len(reference_tokens)
-        ),
-        "1-gram": precisions[0],
-        "2-gram": precisions[1],
-        "3-gram": precisions[2],
-        "4-gram": precisions[3],
-    }
+    results = {"bleu": bleu, "brevity_penalty": bp}
+    for n, p_n in enumerate(precisions, start=1):
+        results[f"{n}-gram"] = p_n
+
+    return results
 
 
 # Simple test (run this file directly)
@@ -82,3 +118,7 @@ if __name__ == "__main__":
     print("BLEU Evaluation Results\n")
     for key, value in results.items():
         print(f"{key}: {value:.4f}")
+
+    references = [reference, ["the", "cat", "is", "on", "a", "mat"]]
+    multi = compute_bleu_multi(candidate, references)
+    print(f"\nBLEU with two references: {multi['bleu']:.4f}")
@@ -0,0 +1,278 @@
+"""
+corpus_bleu.py
+---------------
+This module computes corpus-level BLEU from sufficient statistics.
+
+For every sentence only the clipped and total n-gram counts per order
+and the candidate/reference lengths are kept. Summing them over a test
+set gives corpus BLEU (averaging sentence BLEU does not), partial sums
+from parallel workers can simply be merged, and memory stays constant
+however many sentences are scored.
+"""
+
+import csv
+import math
+from contextlib import ExitStack
+from itertools import zip_longest
+from typing import Dict, List, Optional, Union
+
+from src.evaluation.bleu_score import brevity_penalty
+from src.evaluation.ngram_precision import (
+    ReferenceIndex,
+    extract_ngrams,
+    ngram_totals,
+)
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.tokenizer import tokenize
+
+
+def sentence_statistics(
+    candidate_tokens: List[str],
+    reference: Union[List[str], ReferenceIndex],
+    max_n: int = 4
+) -> List[int]:
+    """
+    BLEU sufficient statistics of one sentence.
+
+    Args:
+        candidate_tokens (List[str]): SMT output tokens
+        reference (List[str] or ReferenceIndex): Reference tokens, or a
+            prebuilt index over one or more references
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        List[int]: clipped counts for orders 1..max_n, total counts for
+        orders 1..max_n, candidate length, (closest) reference length
+    """
+    if not isinstance(reference, ReferenceIndex):
+        reference = ReferenceIndex([reference], max_n)
+
+    candidate_len = len(candidate_tokens)
+    matches = reference.clip(extract_ngrams(candidate_tokens, max_n))
+    totals = ngram_totals(candidate_len, max_n)
+
+    return (
+        matches + totals
+        + [candidate_len, reference.closest_length(candidate_len)]
+    )
+
+
+def bleu_from_statistics(
+    statistics: List[int],
+    max_n: int = 4
+) -> Dict[str, float]:
+    """
+    BLEU score details from (summed) sufficient statistics.
+
+    Args:
+        statistics (List[int]): Layout of `sentence_statistics`
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        Dict[str, float]: bleu, brevity_penalty and n-gram precisions
+    """
+    matches = statistics[:max_n]
+    totals = statistics[max_n:2 * max_n]
+    candidate_len, reference_len = statistics[2 * max_n:2 * max_n + 2]
+
+    precisions = [
+        match / total if total else 0.0
+        for match, total in zip(matches, totals)
+    ]
+    bp = brevity_penalty(candidate_len, reference_len)
+
+    # If any precision is zero, BLEU becomes zero
+    if min(precisions) == 0:
+        bleu = 0.0
+    else:
+        log_precision_sum = sum(math.log(p) for p in precisions) / max_n
+        bleu = bp * math.exp(log_precision_sum)
+
+    results = {"bleu": bleu, "brevity_penalty": bp}
+    for n, p_n in enumerate(precisions, start=1):
+        results[f"{n}-gram"] = p_n
+
+    return results
+
+
+class BleuAccumulator:
+    """
+    Running sum of BLEU sufficient statistics.
+    """
+
+    def __init__(self, max_n: int = 4):
+        self.max_n = max_n
+        self.statistics = [0] * (2 * max_n + 2)
+        self.sentences = 0
+
+    def add(
+        self,
+        candidate_tokens: List[str],
+        reference_tokens: Union[List[str], ReferenceIndex]
+    ) -> List[int]:
+        """
+        Score one sentence pair and add it to the totals.
+
+        Args:
+            candidate_tokens (List[str]): SMT output tokens
+            reference_tokens (List[str] or ReferenceIndex): Reference
+                tokens, or an index over several references
+
+        Returns:
+            List[int]: The sentence's own statistics
+        """
+        stats = sentence_statistics(
+            candidate_tokens, reference_tokens, self.max_n
+        )
+        self.add_statistics(stats)
+        return stats
+
+    def add_statistics(self, statistics: List[int]) -> None:
+        """
+        Add precomputed sentence statistics.
+
+        Args:
+            statistics (List[int]): Layout of `sentence_statistics`
+        """
+        self.statistics = [a + b for a, b in zip(self.statistics, statistics)]
+        self.sentences += 1
+
+    def merge(self, other: "BleuAccumulator") -> "BleuAccumulator":
+        """
+        Fold another accumulator (e.g. from a worker) into this one.
+
+        Args:
+            other (BleuAccumulator): Partial accumulator
+
+        Returns:
+            BleuAccumulator: self
+        """
+        if other.max_n != self.max_n:
+            raise ValueError("Cannot merge accumulators with different max_n")
+
+        self.statistics = [
+            a + b for a, b in zip(self.statistics, other.statistics)
+        ]
+        self.sentences += other.sentences
+        return self
+
+    def score(self) -> Dict[str, float]:
+        """
+        Corpus BLEU of everything added so far.
+
+        Returns:
+            Dict[str, float]: bleu, brevity_penalty, n-gram precisions
+        """
+        return bleu_from_statistics(self.statistics, self.max_n)
+
+
+def evaluate_files(
+    candidate_file: str,
+    reference_file: Union[str, List[str]],
+    csv_file: Optional[str] = None,
+    max_n: int = 4
+) -> Dict[str, float]:
+    """
+    Stream candidate and reference files and compute corpus BLEU.
+
+    Both files are cleaned and tokenized like the training data. If
+    `csv_file` is given, one row per sentence is written as it is
+    scored, followed by a final "corpus" row.
+
+    Args:
+        candidate_file (str): SMT output, one sentence per line
+        reference_file (str or List[str]): Reference file(s), one
+            sentence per line; several files give multi-reference BLEU
+        csv_file (str): Optional CSV output path
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        Dict[str, float]: Corpus BLEU details plus sentence count
+    """
+    accumulator = BleuAccumulator(max_n)
+    columns = (
+        ["sentence", "bleu", "brevity_penalty"]
+        + [f"{n}-gram" for n in range(1, max_n + 1)]
+        + ["candidate_length", "reference_length"]
+    )
+
+    def row(label, stats):
+        scores = bleu_from_statistics(stats, max_n)
+        return (
+            [label, scores["bleu"], scores["brevity_penalty"]]
+            + [scores[f"{n}-gram"] for n in range(1, max_n + 1)]
+            + stats[2 * max_n:2 * max_n + 2]
+        )
+
+    csv_out = open(csv_file, "w", encoding="utf-8", newline="") \
+        if csv_file else None
+
+    try:
+        writer = csv.writer(csv_out) if csv_out else None
+        if writer:
+            writer.writerow(columns)
+
+        reference_files = (
+            [reference_file] if isinstance(reference_file, str)
+            else list(reference_file)
+        )
+
+        with ExitStack() as stack:
+            files = [
+                stack.enter_context(open(path, "r", encoding="utf-8"))
+                for path in [candidate_file] + reference_files
+            ]
+
+            for line_no, lines in enumerate(zip_longest(*files), start=1):
+                if None in lines:
+                    raise ValueError(
+                        "Candidate and reference files must have same "
+                        f"number of lines (mismatch at line {line_no})"
+                    )
+
+                cand, refs = lines[0], lines[1:]
+                references = ReferenceIndex(
+                    [tokenize(clean_text(ref.strip())) for ref in refs],
+                    max_n
+                )
+                stats = accumulator.add(
+                    tokenize(clean_text(cand.strip())), references
+                )
+                if writer:
+                    writer.writerow(row(line_no, stats))
+
+        if writer:
+            writer.writerow(row("corpus", accumulator.statistics))
+    finally:
+        if csv_out:
+            csv_out.close()
+
+    results = accumulator.score()
+    results["sentences"] = accumulator.sentences
+    return results
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    from src.evaluation.bleu_score import compute_bleu_score
+
+    pairs = [
+        (["the", "cat", "is", "on", "the", "mat"],
+         ["the", "cat", "sat", "on", "the", "mat"]),
+        (["there", "is", "a", "cat", "on", "the", "mat"],
+         ["a", "cat", "is", "on", "the", "mat"]),
+    ]
+
+    # Two workers each score one sentence, then merge
+    left, right = BleuAccumulator(), BleuAccumulator()
+    left.add(*pairs[0])
+    right.add(*pairs[1])
+    merged = left.merge(right)
+
+    sentence_level = bleu_from_statistics(sentence_statistics(*pairs[0]))
+    print("Sentence BLEU matches compute_bleu_score:",
+          sentence_level == compute_bleu_score(*pairs[0]))
+
+    print("\nCorpus BLEU Results\n")
+    for key, value in merged.score().items():
+        print(f"{key}: {value:.4f}")
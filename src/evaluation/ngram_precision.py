@@ -6,7 +6,7 @@ used in BLEU score calculation.
 """
 
 from collections import Counter
-from typing import List, Tuple
+from typing import Iterable, List, Tuple, Union
 
 
 def get_ngrams(tokens: List[str], n: int) -> Counter:
@@ -66,6 +66,123 @@ def modified_ngram_precision(
     return clipped_count / total_count
 
 
+def extract_ngrams(tokens: List[str], max_n: int) -> Counter:
+    """
+    Extract the n-grams of all orders 1..max_n in one go.
+
+    Every order is built with `zip` over shifted views of the
+    sentence, so tuples are created in C instead of by slicing.
+    The order of an n-gram is its tuple length.
+
+    Args:
+        tokens (List[str]): Tokenized sentence
+        max_n (int): Maximum n-gram size
+
+    Returns:
+        Counter: n-gram counts for all orders
+    """
+    ngrams = Counter()
+    for n in range(1, min(max_n, len(tokens)) + 1):
+        ngrams.update(zip(*[tokens[i:] for i in range(n)]))
+    return ngrams
+
+
+def clipped_counts(
+    candidate_ngrams: Counter,
+    reference_ngrams: Counter,
+    max_n: int
+) -> List[int]:
+    """
+    Clipped n-gram matches per order.
+
+    Args:
+        candidate_ngrams (Counter): All-order candidate n-grams
+        reference_ngrams (Counter): All-order (max) reference counts
+        max_n (int): Maximum n-gram size
+
+    Returns:
+        List[int]: Clipped counts for orders 1..max_n
+    """
+    matches = [0] * max_n
+    for ngram, count in candidate_ngrams.items():
+        ref_count = reference_ngrams.get(ngram)
+        if ref_count:
+            matches[len(ngram) - 1] += min(count, ref_count)
+    return matches
+
+
+def ngram_totals(length: int, max_n: int) -> List[int]:
+    """
+    Number of n-grams per order in a sentence of a given length.
+
+    Args:
+        length (int): Sentence length
+        max_n (int): Maximum n-gram size
+
+    Returns:
+        List[int]: Totals for orders 1..max_n
+    """
+    return [max(length - n + 1, 0) for n in range(1, max_n + 1)]
+
+
+class ReferenceIndex:
+    """
+    Precomputed n-gram counts of one or more references.
+
+    Counts are the per n-gram maximum over all references (used for
+    clipping), so the index is built once and reused for any number
+    of candidates.
+    """
+
+    def __init__(
+        self,
+        references: Union[List[str], Iterable[List[str]]],
+        max_n: int = 4
+    ):
+        references = list(references)
+        # A single reference may be passed as a plain token list
+        if references and isinstance(references[0], str):
+            references = [references]
+
+        self.max_n = max_n
+        self.lengths = [len(reference) for reference in references]
+        self.counts = Counter()
+
+        for reference in references:
+            for ngram, count in extract_ngrams(reference, max_n).items():
+                if count > self.counts[ngram]:
+                    self.counts[ngram] = count
+
+    def closest_length(self, candidate_len: int) -> int:
+        """
+        Reference length closest to the candidate (shorter on ties).
+
+        Args:
+            candidate_len (int): Candidate length
+
+        Returns:
+            int: Effective reference length for the brevity penalty
+        """
+        if not self.lengths:
+            return 0
+        return min(
+            self.lengths,
+            key=lambda length: (abs(length - candidate_len), length)
+        )
+
+    def clip(self, candidate_ngrams: Counter) -> List[int]:
+        """
+        Clipped matches per order against the references.
+
+        Args:
+            candidate_ngrams (Counter): Output of `extract_ngrams`
+
+        Returns:
+            List[int]: Clipped counts for orders 1..max_n
+        """
+        return clipped_counts(candidate_ngrams, self.counts, self.max_n)
+
+
 # Simple test (run this file directly)
 if __name__ == "__main__":
     candidate = ["the", "cat", "is", "on", "the", "mat"]
@@ -74,3 +191,9 @@ if __name__ == "__main__":
     for n in range(1, 5):
         precision = modified_ngram_precision(candidate, reference, n)
         print(f"{n}-gram precision: {precision:.4f}")
+
+    index = ReferenceIndex(reference)
+    matches = index.clip(extract_ngrams(candidate, 4))
+    totals = ngram_totals(len(candidate), 4)
+    print("Single-pass precisions:",
+          [f"{m / t:.4f}" for m, t in zip(matches, totals)])
@@ -0,0 +1,285 @@
+"""
+significance.py
+----------------
+Statistical significance tests for BLEU differences between two
+systems on the same test set.
+
+Both tests work on NumPy matrices of per-sentence BLEU sufficient
+statistics (one row per sentence, columns as in
+`sentence_statistics`). A resample is then a weighted column sum,
+so corpus BLEU for hundreds of resamples is computed with array
+operations instead of re-running the BLEU code per sample.
+"""
+
+from contextlib import ExitStack
+from itertools import zip_longest
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+from src.evaluation.corpus_bleu import sentence_statistics
+from src.evaluation.ngram_precision import ReferenceIndex
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.tokenizer import tokenize
+
+
+def statistics_matrix(
+    candidates: Iterable[List[str]],
+    references: Iterable[List[str]],
+    max_n: int = 4
+) -> np.ndarray:
+    """
+    Stack per-sentence BLEU statistics into a matrix.
+
+    Args:
+        candidates (Iterable[List[str]]): Candidate token lists
+        references (Iterable[List[str]]): Reference token lists (or
+            ReferenceIndex objects)
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        np.ndarray: int64 matrix of shape (sentences, 2 * max_n + 2)
+    """
+    rows = [
+        sentence_statistics(cand, ref, max_n)
+        for cand, ref in zip(candidates, references)
+    ]
+    return np.asarray(rows, dtype=np.int64).reshape(-1, 2 * max_n + 2)
+
+
+def file_statistics(
+    candidate_files: List[str],
+    reference_file: Union[str, List[str]],
+    max_n: int = 4
+) -> List[np.ndarray]:
+    """
+    Statistics matrices of several systems against the same references.
+
+    All files are streamed together and every reference line is indexed
+    once for all systems. Lines are cleaned and tokenized like
+    `evaluate_files`.
+
+    Args:
+        candidate_files (List[str]): One translation file per system
+        reference_file (str or List[str]): Reference file(s)
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        List[np.ndarray]: One statistics matrix per candidate file
+    """
+    reference_files = (
+        [reference_file] if isinstance(reference_file, str)
+        else list(reference_file)
+    )
+    rows = [[] for _ in candidate_files]
+
+    with ExitStack() as stack:
+        files = [
+            stack.enter_context(open(path, "r", encoding="utf-8"))
+            for path in list(candidate_files) + reference_files
+        ]
+
+        for line_no, lines in enumerate(zip_longest(*files), start=1):
+            if None in lines:
+                raise ValueError(
+                    "Candidate and reference files must have same "
+                    f"number of lines (mismatch at line {line_no})"
+                )
+
+            refs = lines[len(candidate_files):]
+            references = ReferenceIndex(
+                [tokenize(clean_text(ref.strip())) for ref in refs], max_n
+            )
+            for system, cand in enumerate(lines[:len(candidate_files)]):
+                rows[system].append(sentence_statistics(
+                    tokenize(clean_text(cand.strip())), references, max_n
+                ))
+
+    return [
+        np.asarray(r, dtype=np.int64).reshape(-1, 2 * max_n + 2)
+        for r in rows
+    ]
+
+
+def corpus_bleu(totals: np.ndarray, max_n: int = 4) -> np.ndarray:
+    """
+    Corpus BLEU for one or many rows of summed statistics.
+
+    Matches `bleu_from_statistics` (zero if any precision is zero).
+
+    Args:
+        totals (np.ndarray): Summed statistics, shape (..., 2 * max_n + 2)
+        max_n (int): Maximum n-gram order
+
+    Returns:
+        np.ndarray: BLEU per row
+    """
+    totals = np.asarray(totals, dtype=np.float64)
+    matches = totals[..., :max_n]
+    counts = totals[..., max_n:2 * max_n]
+    cand_len = totals[..., 2 * max_n]
+    ref_len = totals[..., 2 * max_n + 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precisions = np.where(counts > 0, matches / counts, 0.0)
+        log_mean = np.log(precisions).mean(axis=-1)
+        bp = np.where(
+            cand_len > ref_len, 1.0, np.exp(1.0 - ref_len / cand_len)
+        )
+
+    bp = np.where(cand_len == 0, 0.0, bp)
+    return np.where(
+        precisions.min(axis=-1) > 0, bp * np.exp(log_mean), 0.0
+    )
+
+
+def paired_bootstrap(
+    stats_a: np.ndarray,
+    stats_b: np.ndarray,
+    samples: int = 1000,
+    seed: int = 0,
+    confidence: float = 0.95
+) -> Dict[str, float]:
+    """
+    Paired bootstrap resampling (Koehn, 2004).
+
+    Each sample draws the test set with replacement, identically for
+    both systems, and recomputes corpus BLEU of each from the summed
+    statistics of the drawn sentences.
+
+    Args:
+        stats_a (np.ndarray): Statistics matrix of system A
+        stats_b (np.ndarray): Statistics matrix of system B
+        samples (int): Number of bootstrap samples
+        seed (int): Random seed
+        confidence (float): Confidence interval mass
+
+    Returns:
+        Dict[str, float]: BLEU of both systems, the delta (B - A), its
+        confidence interval, and the p-value that B is not better
+    """
+    max_n = (stats_a.shape[1] - 2) // 2
+    n = len(stats_a)
+    rng = np.random.default_rng(seed)
+
+    # Both systems side by side: one matrix product per sample
+    both = np.hstack([stats_a, stats_b]).astype(np.float64)
+    width = stats_a.shape[1]
+
+    totals = np.empty((samples, 2 * width))
+    for s in range(samples):
+        weights = np.bincount(rng.integers(0, n, n), minlength=n)
+        totals[s] = weights @ both
+
+    bleu_a = corpus_bleu(totals[:, :width], max_n)
+    bleu_b = corpus_bleu(totals[:, width:], max_n)
+    delta = bleu_b - bleu_a
+
+    tail = (1.0 - confidence) / 2.0
+    return {
+        "bleu_a": float(corpus_bleu(stats_a.sum(axis=0), max_n)),
+        "bleu_b": float(corpus_bleu(stats_b.sum(axis=0), max_n)),
+        "delta": float(np.mean(delta)),
+        "ci_low": float(np.quantile(delta, tail)),
+        "ci_high": float(np.quantile(delta, 1.0 - tail)),
+        "ci_a_low": float(np.quantile(bleu_a, tail)),
+        "ci_a_high": float(np.quantile(bleu_a, 1.0 - tail)),
+        "ci_b_low": float(np.quantile(bleu_b, tail)),
+        "ci_b_high": float(np.quantile(bleu_b, 1.0 - tail)),
+        "p_value": float(np.mean(delta <= 0)),
+    }
+
+
+def approximate_randomization(
+    stats_a: np.ndarray,
+    stats_b: np.ndarray,
+    trials: int = 1000,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    Approximate randomization test on the absolute BLEU difference.
+
+    Each trial swaps the outputs of the two systems on a random half
+    of the sentences; only the swapped rows' differences change the
+    sums, so a trial is a single matrix-vector product.
+
+    Args:
+        stats_a (np.ndarray): Statistics matrix of system A
+        stats_b (np.ndarray): Statistics matrix of system B
+        trials (int): Number of random shuffles
+        seed (int): Random seed
+
+    Returns:
+        Dict[str, float]: Observed BLEU delta (B - A) and p-value
+    """
+    max_n = (stats_a.shape[1] - 2) // 2
+    rng = np.random.default_rng(seed)
+
+    stats_a = stats_a.astype(np.float64)
+    stats_b = stats_b.astype(np.float64)
+    total_a = stats_a.sum(axis=0)
+    total_b = stats_b.sum(axis=0)
+    diff = stats_b - stats_a
+
+    observed = abs(corpus_bleu(total_b, max_n) - corpus_bleu(total_a, max_n))
+
+    shuffled_a = np.empty((trials, stats_a.shape[1]))
+    for t in range(trials):
+        swap = rng.random(len(stats_a)) < 0.5
+        shuffled_a[t] = total_a + swap @ diff
+    shuffled_b = total_a + total_b - shuffled_a
+
+    deltas = np.abs(corpus_bleu(shuffled_b, max_n)
+                    - corpus_bleu(shuffled_a, max_n))
+
+    return {
+        "delta": float(corpus_bleu(total_b, max_n)
+                       - corpus_bleu(total_a, max_n)),
+        "p_value": float((np.sum(deltas >= observed) + 1) / (trials + 1)),
+    }
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import time
+
+    from src.evaluation.corpus_bleu import BleuAccumulator
+
+    # Synthetic per-sentence statistics for a 100k-sentence test set
+    rng = np.random.default_rng(1)
+    n = 100000
+    lengths = rng.integers(5, 30, n)
+
+    def fake_system(quality):
+        totals = np.stack(
+            [np.maximum(lengths - k, 0) for k in range(4)], axis=1
+        )
+        matches = rng.binomial(totals, [quality, quality ** 2,
+                                        quality ** 3, quality ** 4])
+        return np.hstack([
+            matches, totals, lengths[:, None], lengths[:, None] + 1
+        ]).astype(np.int64)
+
+    stats_a = fake_system(0.60)
+    stats_b = fake_system(0.61)
+
+    # Vectorized corpus BLEU agrees with the accumulator
+    acc = BleuAccumulator()
+    acc.statistics = stats_a.sum(axis=0).tolist()
+    print("Matches BleuAccumulator:",
+          np.isclose(corpus_bleu(stats_a.sum(axis=0)), acc.score()["bleu"]))
+
+    start = time.perf_counter()
+    boot = paired_bootstrap(stats_a, stats_b, samples=1000)
+    boot_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ar = approximate_randomization(stats_a, stats_b, trials=1000)
+    ar_time = time.perf_counter() - start
+
+    print(f"\nBootstrap ({boot_time:.2f} s): "
+          f"delta={boot['delta']:.4f} "
+          f"95% CI=[{boot['ci_low']:.4f}, {boot['ci_high']:.4f}] "
+          f"p={boot['p_value']:.4f}")
+    print(f"Approximate randomization ({ar_time:.2f} s): "
+          f"p={ar['p_value']:.4f}")
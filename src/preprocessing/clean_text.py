@@ -6,6 +6,18 @@ Unicode-safe text normalization for SMT.
 
 import re
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+# Precompiled patterns used by clean_text
+PUNCTUATION_PATTERN = re.compile(r"[.,!?;:\"()]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Byte-level tables for the ASCII fast path: delete the punctuation and
+# map the separators str.split treats as whitespace (\x1c-\x1f) but
+# bytes.split does not to a plain space
+ASCII_SPACE_TABLE = bytes.maketrans(b"\x1c\x1d\x1e\x1f", b"    ")
+ASCII_PUNCTUATION = b".,!?;:\"()"
 
 
 def clean_text(sentence: str) -> str:
@@ -19,9 +31,103 @@ def clean_text(sentence: str) -> str:
     sentence = sentence.lower()
 
     # Remove punctuation ONLY
-    sentence = re.sub(r"[.,!?;:\"()]", "", sentence)
+    sentence = PUNCTUATION_PATTERN.sub("", sentence)
 
     # Normalize whitespace
-    sentence = re.sub(r"\s+", " ", sentence).strip()
+    sentence = WHITESPACE_PATTERN.sub(" ", sentence).strip()
 
     return sentence
+
+
+def _clean_line(sentence: str) -> str:
+    """
+    Fast equivalent of clean_text for a single line.
+
+    ASCII lines are already NFC and are cleaned as bytes; other lines
+    are NFC-normalized only if they are not already, then go through
+    the precompiled punctuation pattern and a split/join whitespace
+    collapse (str.split and regex \\s agree on what whitespace is).
+    """
+    if not sentence:
+        return ""
+
+    if sentence.isascii():
+        data = sentence.encode("ascii").lower().translate(
+            ASCII_SPACE_TABLE, ASCII_PUNCTUATION
+        )
+        return b" ".join(data.split()).decode("ascii")
+
+    if not unicodedata.is_normalized("NFC", sentence):
+        sentence = unicodedata.normalize("NFC", sentence)
+    sentence = sentence.lower()
+    return " ".join(PUNCTUATION_PATTERN.sub("", sentence).split())
+
+
+def _clean_chunk(sentences: List[str]) -> List[str]:
+    return [_clean_line(sentence) for sentence in sentences]
+
+
+def clean_texts(
+    sentences: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 10000
+) -> List[str]:
+    """
+    Clean many sentences at once.
+
+    Output is identical to calling clean_text on each sentence.
+
+    Args:
+        sentences (Iterable[str]): Raw sentences
+        workers (int): Process pool size (None or 1 cleans in-process)
+        chunk_size (int): Sentences sent to a worker per task
+
+    Returns:
+        List[str]: Cleaned sentences, in input order
+    """
+    if not workers or workers <= 1:
+        return [_clean_line(sentence) for sentence in sentences]
+
+    sentences = list(sentences)
+    chunks = [
+        sentences[i:i + chunk_size]
+        for i in range(0, len(sentences), chunk_size)
+    ]
+
+    cleaned = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in executor.map(_clean_chunk, chunks):
+            cleaned.extend(chunk)
+
+    return cleaned
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import time
+
+    with open("data/train/source.txt", encoding="utf-8") as f:
+        source_lines = f.read().splitlines()
+    with open("data/train/target.txt", encoding="utf-8") as f:
+        target_lines = f.read().splitlines()
+
+    lines = (source_lines + target_lines) * 20
+
+    start = time.perf_counter()
+    expected = [clean_text(line) for line in lines]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = clean_texts(lines)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = clean_texts(lines, workers=2)
+    pool_time = time.perf_counter() - start
+
+    print(f"Lines              : {len(lines)}")
+    print(f"clean_text loop    : {loop_time * 1000:.1f} ms")
+    print(f"clean_texts        : {batch_time * 1000:.1f} ms "
+          f"({loop_time / batch_time:.1f}x)")
+    print(f"clean_texts (pool) : {pool_time * 1000:.1f} ms")
+    print("Identical output   :", expected == batched == pooled)
@@ -0,0 +1,396 @@
+"""
+splitter.py
+------------
+Streaming train/dev/test splitting of raw parallel dumps.
+
+Tatoeba/Kaggle dumps (`english \t hindi \t attribution` per line) are
+read one line at a time and every kept pair is written straight to its
+split, so memory stays constant however large the dump is:
+
+- Split assignment hashes the pair (BLAKE2b, keyed by a seed): the same
+  pair always lands in the same split, on any machine and in any run,
+  and adding lines to a dump never moves existing pairs
+- Exact duplicate pairs are dropped with a fixed-size Bloom filter.
+  A duplicate hashes like the original, so it could only ever fall in
+  the same split; dedup never causes train/test leakage. False
+  positives drop a small, deterministic share of unique pairs
+- Length and length-ratio filters (in whitespace tokens) drop
+  fragments, run-ons and misaligned pairs
+- The train split can be written as N hash-assigned shards for
+  parallel training
+
+Pairs are processed in chunks: parsing and filtering are per line, and
+hashing results feed vectorized Bloom lookups, split and shard
+assignment.
+"""
+
+import hashlib
+import math
+import os
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.helpers import chunked
+
+SPLITS = ("train", "dev", "test")
+
+# Output files per split, relative to the output directory
+SPLIT_FILES = {
+    "train": ("train/source.txt", "train/target.txt"),
+    "dev": ("dev/source_dev.txt", "dev/reference_dev.txt"),
+    "test": ("test/source_test.txt", "test/reference.txt"),
+}
+
+_BUFFER = 1 << 20
+
+# Pairs hashed and deduplicated together. Fixed, because a pair only
+# "sees" the Bloom bits of earlier chunks (plus exact repeats in its
+# own), so results must not depend on a tunable
+_CHUNK_PAIRS = 10000
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership with a bounded false-positive rate.
+
+    Items are added in batches of 128-bit digests; bit positions,
+    lookups and updates are vectorized over the batch.
+    """
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity (int): Items expected; past it the false-positive
+                rate rises above `error_rate`
+            error_rate (float): Target false-positive rate
+        """
+        self.capacity = capacity
+        self.num_bits = max(
+            8, int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(
+            1, round(self.num_bits / capacity * math.log(2))
+        )
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def add(self, digests: np.ndarray) -> np.ndarray:
+        """
+        Add a batch of items.
+
+        Args:
+            digests (np.ndarray): (n, 2) uint64 item hashes
+
+        Returns:
+            np.ndarray: True where the item was (probably) already
+            present, including repeats earlier in the same batch
+        """
+        # Double hashing: k positions from the two 64-bit halves
+        # (uint64 arithmetic wraps, which is fine for hashing)
+        h1 = digests[:, 0:1]
+        h2 = digests[:, 1:2] | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        positions = (h1 + steps * h2) % np.uint64(self.num_bits)
+
+        byte = (positions >> np.uint64(3)).astype(np.intp)
+        mask = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        present = np.all(self.bits[byte] & mask, axis=1)
+
+        # Only the first copy of a repeated item in the batch is new
+        _, first = np.unique(digests, axis=0, return_index=True)
+        repeated = np.ones(len(digests), dtype=bool)
+        repeated[first] = False
+        present |= repeated
+
+        new = ~present
+        np.bitwise_or.at(self.bits, byte[new].ravel(), mask[new].ravel())
+        self.count += int(new.sum())
+        return present
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate at the current fill."""
+        return (
+            1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        ) ** self.num_hashes
+
+
+def pair_digests(
+    pairs: List[Tuple[str, str]],
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Seeded 128-bit hashes of sentence pairs.
+
+    Args:
+        pairs (List[Tuple[str, str]]): (source, target) pairs
+        seed (int): Hash key
+
+    Returns:
+        np.ndarray: (n, 2) uint64 digests
+    """
+    key = str(seed).encode("ascii")
+    blob = b"".join(
+        hashlib.blake2b(
+            f"{source}\t{target}".encode("utf-8"), digest_size=16, key=key
+        ).digest()
+        for source, target in pairs
+    )
+    return np.frombuffer(blob, dtype="<u8").reshape(-1, 2)
+
+
+def assign_splits(
+    digests: np.ndarray,
+    dev_ratio: float = 0.05,
+    test_ratio: float = 0.05
+) -> np.ndarray:
+    """
+    Deterministic split of every pair.
+
+    Args:
+        digests (np.ndarray): pair_digests() of the pairs
+        dev_ratio (float): Share of pairs in dev
+        test_ratio (float): Share of pairs in test
+
+    Returns:
+        np.ndarray: Index into SPLITS (0 train, 1 dev, 2 test)
+    """
+    # Uniform in [0, 1) from the top 53 bits of the second half
+    u = (digests[:, 1] >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+    return np.where(
+        u < test_ratio, 2, np.where(u < test_ratio + dev_ratio, 1, 0)
+    )
+
+
+def iter_raw_pairs(
+    lines: Iterable[str],
+    stats: Dict[str, int]
+) -> Iterator[Tuple[str, str]]:
+    """
+    Parse `source \t target [\t metadata]` lines, counting bad ones.
+
+    Yields:
+        Tuple[str, str]: Stripped (source, target)
+    """
+    for line in lines:
+        stats["lines"] += 1
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) < 2:
+            stats["malformed"] += 1
+            continue
+
+        source, target = parts[0].strip(), parts[1].strip()
+        if not source or not target:
+            stats["empty"] += 1
+            continue
+        yield source, target
+
+
+def filter_pairs(
+    pairs: Iterable[Tuple[str, str]],
+    stats: Dict[str, int],
+    min_length: int = 1,
+    max_length: int = 80,
+    max_ratio: float = 9.0
+) -> Iterator[Tuple[str, str]]:
+    """
+    Drop pairs outside the length limits (in whitespace tokens) or
+    whose longer side has more than `max_ratio` tokens per token of
+    the shorter side.
+    """
+    for source, target in pairs:
+        lengths = len(source.split()), len(target.split())
+        shorter, longer = min(lengths), max(lengths)
+        if shorter < min_length:
+            stats["too_short"] += 1
+        elif longer > max_length:
+            stats["too_long"] += 1
+        elif longer > max_ratio * max(shorter, 1):
+            stats["bad_ratio"] += 1
+        else:
+            yield source, target
+
+
+def shard_paths(path: Path, num_shards: int) -> List[Path]:
+    """
+    `source.txt` -> `source.000.txt`, `source.001.txt`, ...
+    """
+    width = max(3, len(str(num_shards - 1)))
+    return [
+        path.with_name(f"{path.stem}.{i:0{width}d}{path.suffix}")
+        for i in range(num_shards)
+    ]
+
+
+def split_parallel_dump(
+    input_file: str,
+    output_dir: str = "data",
+    dev_ratio: float = 0.05,
+    test_ratio: float = 0.05,
+    min_length: int = 1,
+    max_length: int = 80,
+    max_ratio: float = 9.0,
+    num_shards: int = 1,
+    dedup_capacity: Optional[int] = 10_000_000,
+    dedup_error_rate: float = 0.001,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    Stream a raw dump into train/dev/test files.
+
+    Args:
+        input_file (str): Tab-separated dump
+        output_dir (str): Root of the train/, dev/ and test/ folders
+        dev_ratio (float): Share of pairs in dev (0 writes no dev files)
+        test_ratio (float): Share of pairs in test (0 leaves existing
+            test files untouched)
+        min_length (int): Fewest tokens per side
+        max_length (int): Most tokens per side
+        max_ratio (float): Most tokens on the longer side per token on
+            the shorter side
+        num_shards (int): Train shards (1 writes a single train file)
+        dedup_capacity (int): Bloom filter capacity (None keeps
+            duplicates)
+        dedup_error_rate (float): Bloom filter false-positive rate
+        seed (int): Hash key; changes which pairs go to which split
+
+    Returns:
+        Dict[str, float]: Line, filter and per-split counts, plus the
+        Bloom filter size and estimated false-positive rate
+    """
+    if not 0 <= dev_ratio + test_ratio <= 1:
+        raise ValueError("dev_ratio + test_ratio must be within [0, 1]")
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1")
+
+    stats = dict.fromkeys(
+        ("lines", "malformed", "empty", "too_short", "too_long",
+         "bad_ratio", "duplicates"), 0
+    )
+    for split in SPLITS:
+        stats[split] = 0
+
+    seen = (
+        BloomFilter(dedup_capacity, dedup_error_rate)
+        if dedup_capacity else None
+    )
+    root = Path(output_dir)
+    # (temporary, final) paths: outputs are replaced only once the whole
+    # dump has been split, so a failed run leaves the old files intact
+    written = []
+
+    try:
+        with ExitStack() as stack:
+            # Opened first: a missing input must not touch any output
+            fin = stack.enter_context(open(input_file, "r", encoding="utf-8"))
+
+            def open_pair(source_path: Path, target_path: Path):
+                source_path.parent.mkdir(parents=True, exist_ok=True)
+                files = []
+                for path in (source_path, target_path):
+                    tmp_path = f"{path}.tmp{os.getpid()}"
+                    written.append((tmp_path, path))
+                    files.append(stack.enter_context(open(
+                        tmp_path, "w", encoding="utf-8", buffering=_BUFFER
+                    )))
+                return tuple(files)
+
+            ratios = {"train": 1.0, "dev": dev_ratio, "test": test_ratio}
+            outputs = {}
+            for split in SPLITS:
+                if not ratios[split]:
+                    # Leaves e.g. a hand-maintained test set untouched
+                    continue
+                source_path, target_path = (
+                    root / p for p in SPLIT_FILES[split]
+                )
+                if split == "train" and num_shards > 1:
+                    outputs[split] = [
+                        open_pair(s, t) for s, t in zip(
+                            shard_paths(source_path, num_shards),
+                            shard_paths(target_path, num_shards),
+                        )
+                    ]
+                else:
+                    outputs[split] = [open_pair(source_path, target_path)]
+
+            pairs = filter_pairs(
+                iter_raw_pairs(fin, stats), stats,
+                min_length, max_length, max_ratio
+            )
+
+            for chunk in chunked(pairs, _CHUNK_PAIRS):
+                digests = pair_digests(chunk, seed)
+                if seen is not None:
+                    duplicate = seen.add(digests)
+                    stats["duplicates"] += int(duplicate.sum())
+                else:
+                    duplicate = np.zeros(len(chunk), dtype=bool)
+
+                splits = assign_splits(digests, dev_ratio, test_ratio).tolist()
+                # Shards from bits the split does not depend on
+                shards = (
+                    (digests[:, 0] >> np.uint64(32)) % np.uint64(num_shards)
+                ).tolist()
+
+                for i in np.flatnonzero(~duplicate).tolist():
+                    split = SPLITS[splits[i]]
+                    files = outputs[split]
+                    sf, tf = files[shards[i] if len(files) > 1 else 0]
+                    source, target = chunk[i]
+                    sf.write(source + "\n")
+                    tf.write(target + "\n")
+                    stats[split] += 1
+    except BaseException:
+        for tmp_path, _ in written:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+
+    for tmp_path, path in written:
+        os.replace(tmp_path, path)
+
+    if seen is not None:
+        stats["dedup_bytes"] = seen.nbytes
+        stats["dedup_false_positive_rate"] = seen.false_positive_rate()
+    return stats
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    out_dir = tempfile.mkdtemp()
+    dump = Path(out_dir) / "dump.txt"
+    dump.write_text(
+        "Wow!\tवाह!\tCC-BY\n"
+        "Wow!\tवाह!\tCC-BY (duplicate)\n"
+        "broken line\n"
+        "a b c d e f g h i j\tएक\n"
+        "\tखाली\n"
+        + "".join(f"sentence {i}\tवाक्य {i}\n" for i in range(1000)),
+        encoding="utf-8",
+    )
+
+    first = split_parallel_dump(str(dump), out_dir, num_shards=4)
+    print(first)
+
+    train = sorted(Path(out_dir, "train").glob("source.*.txt"))
+    print("Train shards:", [p.name for p in train])
+    print("Test head:", Path(out_dir, "test/source_test.txt")
+          .read_text(encoding="utf-8").splitlines()[:3])
+
+    # Same input and seed -> identical splits
+    before = Path(out_dir, "test/source_test.txt").read_bytes()
+    split_parallel_dump(str(dump), out_dir, num_shards=4)
+    print("Deterministic:",
+          Path(out_dir, "test/source_test.txt").read_bytes() == before)
+
+    shutil.rmtree(out_dir)
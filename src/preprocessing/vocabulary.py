@@ -0,0 +1,111 @@
+"""
+vocabulary.py
+--------------
+This module interns word tokens to dense integer ids so that
+corpora and models can be stored in flat arrays instead of
+lists of Python strings.
+"""
+
+from array import array
+from typing import Dict, Iterable, List
+
+
+class Vocabulary:
+    """
+    Bidirectional mapping between word tokens and integer ids.
+
+    Ids are assigned in order of first appearance, starting at 0.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()):
+        self._index: Dict[str, int] = {}
+        self._words: List[str] = []
+
+        for token in tokens:
+            self.add(token)
+
+    def add(self, token: str) -> int:
+        """
+        Return the id of a token, assigning a new one if needed.
+
+        Args:
+            token (str): Word token
+
+        Returns:
+            int: Token id
+        """
+        token_id = self._index.get(token)
+        if token_id is None:
+            token_id = len(self._words)
+            self._index[token] = token_id
+            self._words.append(token)
+        return token_id
+
+    def lookup(self, token: str, default: int = -1) -> int:
+        """
+        Return the id of a token without growing the vocabulary.
+
+        Args:
+            token (str): Word token
+            default (int): Value returned for unknown tokens
+
+        Returns:
+            int: Token id or default
+        """
+        return self._index.get(token, default)
+
+    def encode(self, tokens: Iterable[str], add: bool = True) -> array:
+        """
+        Encode a token sequence into an id array.
+
+        Args:
+            tokens (Iterable[str]): Word tokens
+            add (bool): Assign ids to unseen tokens (otherwise they map to -1)
+
+        Returns:
+            array: Token ids as array('i')
+        """
+        if add:
+            return array("i", [self.add(token) for token in tokens])
+        return array("i", [self._index.get(token, -1) for token in tokens])
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """
+        Decode token ids back to words.
+
+        Args:
+            ids (Iterable[int]): Token ids
+
+        Returns:
+            List[str]: Word tokens
+        """
+        words = self._words
+        return [words[i] for i in ids]
+
+    @property
+    def words(self) -> List[str]:
+        """List of tokens indexed by id."""
+        return self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._index
+
+    def __getitem__(self, token: str) -> int:
+        return self._index[token]
+
+    def __iter__(self):
+        return iter(self._words)
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    vocab = Vocabulary()
+    ids = vocab.encode(["the", "cat", "sat", "on", "the", "mat"])
+
+    print("Ids     :", list(ids))
+    print("Decoded :", vocab.decode(ids))
+    print("Size    :", len(vocab))
+    print("Unknown :", vocab.lookup("dog"))
@@ -0,0 +1,255 @@
+"""
+batch_translate.py
+-------------------
+Translate a whole file of source sentences.
+
+Input is streamed in chunks, repeated sentences inside a chunk are
+decoded once, and chunks are spread over a process pool whose workers
+each load the model a single time. Output lines are written in input
+order, and at most a few chunks are in memory at once.
+
+With `watch_dir`, each process serves the newest model in that
+directory through a ModelRegistry instead, and every chunk is decoded
+by the version that was active when it started.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.preprocessing.clean_text import clean_texts
+from src.preprocessing.tokenizer import tokenize
+from src.translation.decoder import decode_beam, decode_sentence
+from src.translation.model_io import DEFAULT_MODEL_FILE
+from src.translation.model_registry import (
+    ModelRegistry,
+    ModelVersion,
+    version_name,
+)
+from src.translation.training import load_or_train_models
+from src.utils.helpers import chunked, parallel_map
+from src.utils.metrics import register, stage
+
+# Per-process decoding state, set up once by init_worker
+_STATE = {}
+
+
+def init_worker(
+    model_file: str,
+    decoder: str,
+    beam_width: int,
+    k: int,
+    cache_size: int = 0,
+    watch_dir: Optional[str] = None,
+    poll_interval: float = 2.0
+) -> None:
+    """
+    Load the models, decode index and LM scorer once per (worker)
+    process, or start a registry that hot-reloads them from
+    `watch_dir`. Used as the process-pool initializer.
+
+    Args:
+        model_file (str): Prebuilt model file (trains if missing)
+        decoder (str): "greedy" or "beam"
+        beam_width (int): Beam width for the beam decoder
+        k (int): Candidates per source word
+        cache_size (int): LRU translation cache size (0 disables it)
+        watch_dir (str): Directory to hot-reload models from
+        poll_interval (float): Seconds between directory checks
+    """
+    _STATE.update(decoder=decoder, beam_width=beam_width, k=k)
+
+    if watch_dir:
+        _STATE["registry"] = ModelRegistry(
+            watch_dir, poll_interval=poll_interval, k=k,
+            cache_size=cache_size,
+            fallback=lambda: load_or_train_models(model_file)
+        ).start()
+        _STATE["model"] = None
+    else:
+        # Report what was actually served: the file, or the fallback
+        # models trained because it does not exist
+        path = model_file if model_file and os.path.exists(model_file) \
+            else None
+        version = version_name(path)
+        translation_model, language_model = load_or_train_models(path or "")
+        _STATE["registry"] = None
+        _STATE["model"] = ModelVersion(
+            version, path, translation_model, language_model,
+            k=k, cache_size=cache_size
+        )
+
+    if cache_size > 0:
+        register("translation_cache", lambda: _active_model().cache.stats())
+
+
+def _active_model() -> ModelVersion:
+    """The model version new work in this process should use."""
+    registry = _STATE["registry"]
+    return registry.active if registry is not None else _STATE["model"]
+
+
+def _decode(src_tokens: List[str], model: ModelVersion) -> List[str]:
+    """
+    Decode one sentence with one model version.
+    """
+    if _STATE["decoder"] == "beam":
+        # Reusing the scorer keeps its LM cache warm across sentences
+        return decode_beam(
+            src_tokens, model.translation_model, model.scorer,
+            index=model.index, beam_width=_STATE["beam_width"],
+            k=_STATE["k"]
+        )
+    return decode_sentence(
+        src_tokens, model.translation_model, model.language_model,
+        index=model.index
+    )
+
+
+def _translate_chunk(
+    sentences: List[str],
+    model: Optional[ModelVersion] = None
+) -> List[str]:
+    """
+    Translate a list of raw sentences with the per-process models.
+    """
+    # Read once: a reload mid-chunk does not mix versions
+    model = model or _active_model()
+    cache = model.cache
+
+    def decode(src_tokens):
+        return _decode(src_tokens, model)
+
+    with stage("clean_text") as timer:
+        cleaned = clean_texts(sentences)
+        timer.add(len(cleaned))
+
+    translations = []
+    with stage("translate") as timer:
+        for line in cleaned:
+            src_tokens = tokenize(line)
+
+            if cache is not None:
+                tokens = cache.translate(src_tokens, decode)
+            else:
+                tokens = decode(src_tokens)
+
+            translations.append(" ".join(tokens))
+        timer.add(len(translations))
+
+    return translations
+
+
+def model_status(model: Optional[ModelVersion] = None) -> Dict:
+    """
+    Model version and reload counters of this process.
+
+    Args:
+        model (ModelVersion): Version to describe (default: active)
+
+    Returns:
+        Dict: pid, version, path, loaded_at, plus reload_seconds,
+        reloads, failures and last_error when watching a directory
+    """
+    model = model or _active_model()
+    registry = _STATE["registry"]
+    status = registry.status() if registry is not None else {}
+    status.update(
+        pid=os.getpid(),
+        version=model.version,
+        path=model.path,
+        loaded_at=model.loaded_at,
+    )
+    return status
+
+
+def translate_chunk_with_status(
+    sentences: List[str]
+) -> Tuple[List[str], Dict]:
+    """
+    Translate raw sentences in a process set up by `init_worker`.
+
+    Args:
+        sentences (List[str]): Raw source sentences
+
+    Returns:
+        Tuple[List[str], Dict]: Translations, and the `model_status`
+        of the version that translated them (for services reporting
+        per-worker versions)
+    """
+    model = _active_model()
+    return _translate_chunk(sentences, model), model_status(model)
+
+
+def translate_file(
+    input_file: str,
+    output_file: str,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    model_file: Optional[str] = DEFAULT_MODEL_FILE,
+    decoder: str = "greedy",
+    beam_width: int = 5,
+    k: int = 5,
+    cache_size: int = 0
+) -> Dict[str, float]:
+    """
+    Translate every line of `input_file` into `output_file`.
+
+    Args:
+        input_file (str): Source sentences, one per line
+        output_file (str): Where translations are written (same order)
+        workers (int): Decoding processes (1 decodes in-process)
+        chunk_size (int): Lines read and deduplicated together
+        model_file (str): Prebuilt model file (trains if missing)
+        decoder (str): "greedy" or "beam"
+        beam_width (int): Beam width for the beam decoder
+        k (int): Candidates per source word for the beam decoder
+        cache_size (int): Per-process LRU translation cache size, which
+            catches repeats across chunks (0 disables it)
+
+    Returns:
+        Dict[str, float]: sentences, unique_sentences, seconds,
+        sentences_per_second (and cache counters when in-process)
+    """
+    start = time.perf_counter()
+    stats = {"sentences": 0, "unique_sentences": 0}
+    initargs = (model_file, decoder, beam_width, k, cache_size)
+
+    # Chunks handed out but not yet written, in input order
+    pending = deque()
+
+    def unique_chunks(f) -> Iterator[List[str]]:
+        for chunk in chunked((line.rstrip("\n") for line in f), chunk_size):
+            unique = list(dict.fromkeys(chunk))
+            pending.append((chunk, unique))
+            stats["sentences"] += len(chunk)
+            stats["unique_sentences"] += len(unique)
+            yield unique
+
+    with open(input_file, "r", encoding="utf-8") as fin, \
+         open(output_file, "w", encoding="utf-8") as fout:
+
+        if workers > 1:
+            results = parallel_map(
+                _translate_chunk, unique_chunks(fin), workers,
+                initializer=init_worker, initargs=initargs
+            )
+        else:
+            init_worker(*initargs)
+            results = map(_translate_chunk, unique_chunks(fin))
+
+        for translations in results:
+            chunk, unique = pending.popleft()
+            lookup = dict(zip(unique, translations))
+            fout.writelines(lookup[line] + "\n" for line in chunk)
+
+    seconds = time.perf_counter() - start
+    stats["seconds"] = seconds
+    stats["sentences_per_second"] = stats["sentences"] / max(seconds, 1e-9)
+
+    # Worker caches live in other processes; report the in-process one
+    if workers <= 1 and _active_model().cache is not None:
+        stats["cache"] = _active_model().cache.stats()
+
+    return stats
@@ -0,0 +1,229 @@
+"""
+cache.py
+---------
+Bounded LRU caches for the decoding path.
+
+- TranslationCache: whole-sentence translations keyed on the
+  normalized token sequence
+- CachedCandidates: per source word top-k candidates, computed on
+  first use; it has the same `best` / `candidates` interface as
+  DecodeIndex, so the greedy and beam decoders accept either
+
+All caches count hits, misses and evictions. An LRUCache may be shared
+by threads (Streamlit sessions, a registry's model version): every
+operation holds the cache's lock, since reordering and eviction are
+several dictionary steps.
+"""
+
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Dictionary with a size limit and least-recently-used eviction.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None):
+        """
+        Look up a key, marking it as most recently used.
+
+        Args:
+            key (Hashable): Cache key
+            default: Returned on a miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): Cache key
+            value: Value to store
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache counters.
+
+        Returns:
+            Dict[str, int]: hits, misses, evictions, size, max_size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "max_size": self.max_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+class TranslationCache(LRUCache):
+    """
+    LRU cache of sentence translations keyed on source tokens.
+    """
+
+    def translate(
+        self,
+        src_tokens: List[str],
+        decode: Callable[[List[str]], List[str]]
+    ) -> List[str]:
+        """
+        Return a cached translation or decode and cache it.
+
+        Args:
+            src_tokens (List[str]): Normalized source tokens
+            decode (Callable): Decoder applied on a miss
+
+        Returns:
+            List[str]: Target tokens (a fresh list on every call)
+        """
+        key = tuple(src_tokens)
+        cached = self.get(key)
+        if cached is None:
+            cached = tuple(decode(src_tokens))
+            self.put(key, cached)
+        return list(cached)
+
+
+class CachedCandidates:
+    """
+    Lazily computed, LRU-bounded top-k candidates per source word.
+    """
+
+    def __init__(
+        self,
+        translation_probs: Dict[str, Dict[str, float]],
+        k: int = 10,
+        max_size: int = 100000
+    ):
+        self.translation_probs = translation_probs
+        self.k = k
+        self.cache = LRUCache(max_size)
+
+    def candidates(self, src_word: str) -> List[Tuple[str, float]]:
+        """
+        Top-k translations of a source word, most probable first.
+
+        Args:
+            src_word (str): Source word
+
+        Returns:
+            List[Tuple[str, float]]: (target word, probability) pairs
+        """
+        ranked = self.cache.get(src_word)
+        if ranked is None:
+            row = self.translation_probs.get(src_word) or {}
+            # nlargest is stable, so the first entry matches max()
+            ranked = heapq.nlargest(
+                self.k, row.items(), key=lambda item: item[1]
+            )
+            self.cache.put(src_word, ranked)
+        return ranked
+
+    def best(self, src_word: str) -> Optional[str]:
+        """
+        Most probable translation of a source word.
+
+        Args:
+            src_word (str): Source word
+
+        Returns:
+            str: Best target word, or None for unknown words
+        """
+        ranked = self.candidates(src_word)
+        return ranked[0][0] if ranked else None
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of the underlying LRU cache."""
+        return self.cache.stats()
+
+    def __contains__(self, src_word: str) -> bool:
+        return src_word in self.translation_probs
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import time
+
+    from src.translation.decoder import decode_sentence
+    from src.translation.language_model import train_bigram_language_model
+    from src.translation.translation_model import (
+        load_parallel_corpus,
+        train_translation_model,
+    )
+
+    src_sents, tgt_sents = load_parallel_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    tm = train_translation_model(src_sents, tgt_sents)
+    lm = train_bigram_language_model(tgt_sents)
+
+    # Repetitive traffic: a small set of sentences seen many times
+    traffic = src_sents[:200] * 25
+
+    start = time.perf_counter()
+    plain = [decode_sentence(s, tm, lm) for s in traffic]
+    plain_time = time.perf_counter() - start
+
+    sentence_cache = TranslationCache(max_size=150)
+    word_cache = CachedCandidates(tm, k=5, max_size=1000)
+
+    start = time.perf_counter()
+    cached = [
+        sentence_cache.translate(
+            s, lambda tokens: decode_sentence(tokens, tm, lm, index=word_cache)
+        )
+        for s in traffic
+    ]
+    cached_time = time.perf_counter() - start
+
+    print(f"Uncached : {plain_time * 1000:.1f} ms")
+    print(f"Cached   : {cached_time * 1000:.1f} ms")
+    print("Identical:", plain == cached)
+    print("Sentence cache:", sentence_cache.stats())
+    print("Word cache    :", word_cache.stats())
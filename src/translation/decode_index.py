@@ -0,0 +1,165 @@
+"""
+decode_index.py
+----------------
+Decode-time index over translation probabilities.
+
+Built once after training, it stores each source word's best
+translation and a sorted top-k candidate list, so decoders no longer
+rescan a word's full candidate distribution on every request.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.translation.tables import TranslationTable
+
+
+class DecodeIndex:
+    """
+    Per source word argmax and top-k candidates, sorted by probability.
+
+    Ties keep the order of the underlying distribution, so `best`
+    agrees with `max(row, key=row.get)`.
+    """
+
+    def __init__(self, candidates: Dict[str, List[Tuple[str, float]]], k: int):
+        self.k = k
+        self._candidates = candidates
+        self._best = {
+            word: ranked[0][0] for word, ranked in candidates.items() if ranked
+        }
+
+    @classmethod
+    def build(cls, translation_probs, k: int = 10) -> "DecodeIndex":
+        """
+        Build the index from a trained translation model.
+
+        Args:
+            translation_probs (Dict or TranslationTable): P(target | source)
+            k (int): Candidates kept per source word
+
+        Returns:
+            DecodeIndex: Index over all source words
+        """
+        if isinstance(translation_probs, TranslationTable):
+            return cls(_table_candidates(translation_probs, k), k)
+
+        candidates = {}
+        for src_word, row in translation_probs.items():
+            # nlargest is stable, so equal probabilities keep row order
+            candidates[src_word] = heapq.nlargest(
+                k, row.items(), key=lambda item: item[1]
+            )
+        return cls(candidates, k)
+
+    def best(self, src_word: str) -> Optional[str]:
+        """
+        Most probable translation of a source word.
+
+        Args:
+            src_word (str): Source word
+
+        Returns:
+            str: Best target word, or None for unknown words
+        """
+        return self._best.get(src_word)
+
+    def candidates(self, src_word: str) -> List[Tuple[str, float]]:
+        """
+        Top-k translations of a source word, most probable first.
+
+        Args:
+            src_word (str): Source word
+
+        Returns:
+            List[Tuple[str, float]]: (target word, probability) pairs
+        """
+        return self._candidates.get(src_word, [])
+
+    def __contains__(self, src_word: str) -> bool:
+        return src_word in self._best
+
+    def __len__(self) -> int:
+        return len(self._best)
+
+
+def _table_candidates(
+    table: TranslationTable,
+    k: int
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Vectorized top-k selection over the rows of a CSR table.
+    """
+    row_lens = np.diff(table.indptr)
+    rows = np.repeat(np.arange(len(row_lens)), row_lens)
+
+    # Stable sort by (row, -prob): ties keep their position in the row
+    probs = np.asarray(table.probs, dtype=np.float64)
+    order = np.lexsort((-probs, rows))
+    rank = np.arange(len(order)) - np.repeat(table.indptr[:-1], row_lens)
+    keep = order[rank < k]
+
+    tgt_words = table.tgt_words
+    candidates = {word: [] for word in table.src_words}
+    src_words = table.src_words
+
+    for row, tgt, prob in zip(
+        rows[keep].tolist(),
+        table.tgt_ids[keep].tolist(),
+        probs[keep].tolist()
+    ):
+        candidates[src_words[row]].append((tgt_words[tgt], prob))
+
+    return candidates
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import time
+
+    from src.preprocessing.clean_text import clean_text
+    from src.preprocessing.tokenizer import tokenize
+    from src.translation.decoder import decode_sentence
+    from src.translation.language_model import train_bigram_language_model
+    from src.translation.translation_model import (
+        load_parallel_corpus,
+        train_translation_model,
+    )
+
+    src_sents, tgt_sents = load_parallel_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    tm = train_translation_model(src_sents, tgt_sents)
+    lm = train_bigram_language_model(tgt_sents)
+
+    start = time.perf_counter()
+    index = DecodeIndex.build(tm, k=10)
+    build_time = time.perf_counter() - start
+
+    with open("data/test/source_test.txt", encoding="utf-8") as f:
+        test_sents = [tokenize(clean_text(line)) for line in f]
+
+    # Test set plus training sources for a stable per-sentence figure
+    workload = test_sents + src_sents
+
+    start = time.perf_counter()
+    baseline = [decode_sentence(s, tm, lm) for s in workload]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [decode_sentence(s, tm, lm, index=index) for s in workload]
+    index_time = time.perf_counter() - start
+
+    n = len(workload)
+    print(f"Index build         : {build_time * 1000:.1f} ms")
+    print(f"Per sentence (scan) : {scan_time / n * 1e6:.1f} us")
+    print(f"Per sentence (index): {index_time / n * 1e6:.1f} us")
+    print(f"Speedup             : {scan_time / index_time:.1f}x")
+    print("Identical output    :", baseline == indexed)
+
+    table_index = DecodeIndex.build(TranslationTable.from_dict(tm), k=10)
+    print("Table index matches :", all(
+        table_index.candidates(w) == index.candidates(w) for w in tm
+    ))
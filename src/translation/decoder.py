@@ -5,15 +5,21 @@ This module decodes a source sentence into a target sentence
 using translation probabilities and a language model.
 """
 
-from typing import List, Dict, Tuple
+import heapq
+import math
+from typing import Iterator, List, Dict, Optional, Tuple
 
-from src.translation.language_model import score_sentence
+from src.preprocessing.corpus import Corpus
+from src.translation.decode_index import DecodeIndex
+from src.translation.language_model import lm_scorer
+from src.utils.metrics import METRICS
 
 
 def decode_sentence(
     src_tokens: List[str],
     translation_probs: Dict[str, Dict[str, float]],
-    language_model: Dict[Tuple[str, str], float]
+    language_model: Dict[Tuple[str, str], float],
+    index: Optional[DecodeIndex] = None
 ) -> List[str]:
     """
     Decode a source sentence using greedy decoding.
@@ -22,10 +28,24 @@ def decode_sentence(
         src_tokens (List[str]): Tokenized source sentence
         translation_probs (Dict): P(target | source)
         language_model (Dict): Bigram language model
+        index (DecodeIndex): Precomputed best translations (optional;
+            a CachedCandidates works too)
 
     Returns:
         List[str]: Decoded target sentence tokens
     """
+    if METRICS.enabled:
+        METRICS.count("decoder.tokens", len(src_tokens))
+
+    if index is not None:
+        # O(1) lookup per word; OOV words fall back to themselves
+        if not METRICS.enabled:
+            return [index.best(word) or word for word in src_tokens]
+
+        best = [index.best(word) for word in src_tokens]
+        METRICS.count("decoder.oov", best.count(None))
+        return [target or word for target, word in zip(best, src_tokens)]
+
     target_tokens = []
 
     for src_word in src_tokens:
@@ -39,35 +59,262 @@ def decode_sentence(
         else:
             # OOV word fallback
             target_tokens.append(src_word)
+            if METRICS.enabled:
+                METRICS.count("decoder.oov")
+
+    return target_tokens
+
+
+def _candidates(
+    src_word: str,
+    translation_probs: Dict[str, Dict[str, float]],
+    index: Optional[DecodeIndex],
+    k: int
+) -> List[Tuple[str, float]]:
+    """
+    Top-k (target word, probability) options for one source word.
+    """
+    if index is not None:
+        options = index.candidates(src_word)[:k]
+    elif src_word in translation_probs:
+        row = translation_probs[src_word]
+        options = heapq.nlargest(k, row.items(), key=lambda item: item[1])
+    else:
+        options = []
+
+    if options:
+        return options
+
+    # OOV word fallback: copy the source word through
+    if METRICS.enabled:
+        METRICS.count("decoder.oov")
+    return [(src_word, 1.0)]
+
+
+def decode_beam(
+    src_tokens: List[str],
+    translation_probs: Dict[str, Dict[str, float]],
+    language_model: Dict[Tuple[str, str], float],
+    index: Optional[DecodeIndex] = None,
+    beam_width: int = 5,
+    k: int = 5,
+    lm_weight: float = 1.0,
+    default_log_prob: float = -10.0
+) -> List[str]:
+    """
+    Decode with a beam search over translation and LM scores.
+
+    Each source word is translated by one of its top-k candidates. A
+    hypothesis is extended by adding log P(t | s) and the weighted LM
+    log probability of the new word, queried incrementally through an
+    LMScorer. Hypotheses with the same LM state are recombined (the LM
+    cannot tell them apart); for a bigram LM that is the last word.
+
+    Args:
+        src_tokens (List[str]): Source tokens
+        translation_probs (Dict): Translation probabilities
+        language_model (Dict): Bigram LM, KneserNeyLM or LMScorer
+        index (DecodeIndex): Precomputed candidates (optional;
+            a CachedCandidates works too)
+        beam_width (int): Hypotheses kept after each source word
+        k (int): Translation candidates tried per source word
+        lm_weight (float): Weight of the LM score
+        default_log_prob (float): LM penalty for unseen bigrams
+
+    Returns:
+        List[str]: Decoded target sentence
+    """
+    scorer = lm_scorer(language_model, default_log_prob)
+    if METRICS.enabled:
+        METRICS.count("decoder.tokens", len(src_tokens))
+
+    # Hypothesis: LM state -> (score, backpointer chain)
+    beam = {scorer.begin_state(): (0.0, None)}
+
+    for src_word in src_tokens:
+        options = [
+            (word, math.log(prob) if prob > 0 else default_log_prob)
+            for word, prob in _candidates(src_word, translation_probs, index, k)
+        ]
+
+        extended = {}
+        for state, (score, chain) in beam.items():
+            for word, tm_score in options:
+                lm_score, new_state = scorer.score(state, word)
+                new_score = score + tm_score + lm_weight * lm_score
+
+                # Recombination: keep the best hypothesis per LM state
+                best = extended.get(new_state)
+                if best is None or new_score > best[0]:
+                    extended[new_state] = (new_score, (word, chain))
+
+        if len(extended) > beam_width:
+            kept = heapq.nlargest(
+                beam_width, extended.items(), key=lambda item: item[1][0]
+            )
+            extended = dict(kept)
+        beam = extended
+
+    _, (_, chain) = max(
+        beam.items(),
+        key=lambda item: item[1][0] + lm_weight * scorer.end_score(item[0])
+    )
+
+    target_tokens = []
+    while chain is not None:
+        word, chain = chain
+        target_tokens.append(word)
+    target_tokens.reverse()
 
     return target_tokens
 
 
+def decode_phrases(
+    src_tokens: List[str],
+    phrase_table,
+    language_model: Dict[Tuple[str, str], float],
+    index: Optional[DecodeIndex] = None,
+    beam_width: int = 5,
+    k: int = 5,
+    lm_weight: float = 1.0,
+    default_log_prob: float = -10.0
+) -> List[str]:
+    """
+    Monotone phrase-based beam search.
+
+    Hypotheses are grouped into stacks by the number of source words
+    covered. Each source span of up to `phrase_table.max_phrase_length`
+    words is translated by one of its top-k target phrases; the phrase
+    log-probability and the LM scores of its words are added, and
+    hypotheses with the same coverage and LM state are recombined.
+    Single words without phrase candidates fall back to the word
+    candidates of `index`, or are copied through.
+
+    Args:
+        src_tokens (List[str]): Source tokens
+        phrase_table (PhraseIndex): Phrase-candidate provider with
+            `candidates(src_phrase, k)` and `max_phrase_length`
+        language_model (Dict): Bigram LM, KneserNeyLM or LMScorer
+        index (DecodeIndex): Word candidates for the fallback (optional)
+        beam_width (int): Hypotheses kept per stack
+        k (int): Target phrases tried per source span
+        lm_weight (float): Weight of the LM score
+        default_log_prob (float): LM penalty for unseen bigrams
+
+    Returns:
+        List[str]: Decoded target sentence
+    """
+    scorer = lm_scorer(language_model, default_log_prob)
+    n = len(src_tokens)
+    if METRICS.enabled:
+        METRICS.count("decoder.tokens", n)
+
+    # stacks[i]: LM state -> (score, backpointer chain of phrases)
+    stacks = [{} for _ in range(n + 1)]
+    stacks[0][scorer.begin_state()] = (0.0, None)
+
+    for start in range(n):
+        stack = stacks[start]
+        if len(stack) > beam_width:
+            stack = dict(heapq.nlargest(
+                beam_width, stack.items(), key=lambda item: item[1][0]
+            ))
+
+        longest = min(phrase_table.max_phrase_length, n - start)
+        for length in range(1, longest + 1):
+            options = phrase_table.candidates(
+                src_tokens[start:start + length], k
+            )
+            if not options and length == 1:
+                options = [
+                    ((word,), prob) for word, prob in _candidates(
+                        src_tokens[start], {}, index, k
+                    )
+                ]
+
+            target = stacks[start + length]
+            for phrase, prob in options:
+                tm_score = math.log(prob) if prob > 0 else default_log_prob
+
+                for state, (score, chain) in stack.items():
+                    new_score = score + tm_score
+                    for word in phrase:
+                        lm_score, state = scorer.score(state, word)
+                        new_score += lm_weight * lm_score
+
+                    best = target.get(state)
+                    if best is None or new_score > best[0]:
+                        target[state] = (new_score, (phrase, chain))
+
+    _, (_, chain) = max(
+        stacks[n].items(),
+        key=lambda item: item[1][0] + lm_weight * scorer.end_score(item[0])
+    )
+
+    phrases = []
+    while chain is not None:
+        phrase, chain = chain
+        phrases.append(phrase)
+
+    return [word for phrase in reversed(phrases) for word in phrase]
+
+
 def decode_with_lm(
     src_tokens: List[str],
     translation_probs: Dict[str, Dict[str, float]],
-    language_model: Dict[Tuple[str, str], float]
+    language_model: Dict[Tuple[str, str], float],
+    index: Optional[DecodeIndex] = None,
+    beam_width: int = 5,
+    k: int = 5
 ) -> List[str]:
     """
     Decode using translation model + language model scoring.
 
-    (Simple extension for fluency)
-
     Args:
         src_tokens (List[str]): Source tokens
         translation_probs (Dict): Translation probabilities
-        language_model (Dict): Bigram LM
+        language_model (Dict): Bigram LM, KneserNeyLM or LMScorer
+        index (DecodeIndex): Precomputed candidates (optional;
+            a CachedCandidates works too)
+        beam_width (int): Hypotheses kept after each source word
+        k (int): Translation candidates tried per source word
 
     Returns:
         List[str]: Decoded target sentence
     """
-    # Initial greedy decoding
-    candidate = decode_sentence(src_tokens, translation_probs, language_model)
+    return decode_beam(
+        src_tokens, translation_probs, language_model,
+        index=index, beam_width=beam_width, k=k
+    )
+
+
+def decode_corpus(
+    corpus: Corpus,
+    translation_probs: Dict[str, Dict[str, float]],
+    language_model: Dict[Tuple[str, str], float]
+) -> Iterator[List[str]]:
+    """
+    Greedily decode every sentence of a compact corpus.
+
+    Translations are resolved once per distinct source id, so each
+    vocabulary entry is looked up a single time for the whole corpus.
 
-    # Score with language model (can be extended)
-    _ = score_sentence(candidate, language_model)
+    Args:
+        corpus (Corpus): Source sentences
+        translation_probs (Dict): P(target | source)
+        language_model (Dict): Bigram language model
+
+    Yields:
+        List[str]: Decoded target sentence tokens
+    """
+    words = corpus.vocab.words
+    resolved = [
+        decode_sentence([word], translation_probs, language_model)[0]
+        for word in words
+    ]
 
-    return candidate
+    for i in range(len(corpus)):
+        yield [resolved[t] for t in corpus.sentence_ids(i)]
 
 
 # Simple test (run this file directly)
@@ -0,0 +1,460 @@
+"""
+kneser_ney.py
+--------------
+Higher-order n-gram language model with interpolated modified
+Kneser-Ney smoothing (Chen & Goodman, 1998).
+
+The model is stored as a sorted-array trie over vocabulary ids. An
+n-gram is identified by its (n-1)-gram prefix node and its last word;
+level n keeps the sorted int64 keys prefix * V + word, so a child is
+found by binary search and the node index is its position in the
+level. Log-probabilities and backoff weights are float32 arrays
+aligned with the keys, as in an ARPA file:
+
+    log P(w | h) = log p(h w)                     if h w is stored
+                 = backoff(h) + log P(w | h[1:])  otherwise
+"""
+
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.preprocessing.corpus import Corpus
+from src.preprocessing.vocabulary import Vocabulary
+from src.translation.language_model import LMScorer
+
+BOS_TOKEN = "<s>"
+EOS_TOKEN = "</s>"
+UNK_TOKEN = "<unk>"
+
+# Fallback discounts D1, D2, D3+ when count-of-counts are too sparse
+_DEFAULT_DISCOUNTS = (0.5, 1.0, 1.5)
+
+
+class KneserNeyLM:
+    """
+    Backoff n-gram LM stored as a sorted-array trie.
+
+    Level n (1-based order) is described by `keys[n - 1]`,
+    `log_probs[n - 1]` and `backoffs[n - 1]`. Unigrams are indexed
+    directly by word id, so `keys[0]` is None; the highest order has
+    no backoff weights.
+    """
+
+    def __init__(
+        self,
+        vocab: Vocabulary,
+        keys: List[np.ndarray],
+        log_probs: List[np.ndarray],
+        backoffs: List[np.ndarray]
+    ):
+        self.vocab = vocab
+        self.order = len(log_probs)
+        self.keys = keys
+        self.log_probs = log_probs
+        self.backoffs = backoffs
+        self._size = len(vocab)
+        self._unk = vocab.lookup(UNK_TOKEN)
+        self._bos = vocab.lookup(BOS_TOKEN)
+        self._eos = vocab.lookup(EOS_TOKEN)
+        self._scorer = None
+
+    def word_id(self, word: str) -> int:
+        """
+        Vocabulary id of a word (unknown words map to <unk>).
+
+        Args:
+            word (str): Word token
+
+        Returns:
+            int: Word id
+        """
+        return self.vocab.lookup(word, self._unk)
+
+    def _child(self, level: int, node: int, word_id: int) -> int:
+        """Node of (n-gram `node` at `level`) + word, or -1."""
+        keys = self.keys[level]
+        key = node * self._size + word_id
+        pos = int(keys.searchsorted(key))
+        if pos < len(keys) and keys[pos] == key:
+            return pos
+        return -1
+
+    def _find(self, ids: Sequence[int]) -> int:
+        """Node index of an n-gram at level len(ids), or -1."""
+        node = ids[0]
+        for level in range(1, len(ids)):
+            node = self._child(level, node, ids[level])
+            if node < 0:
+                return -1
+        return node
+
+    def log_prob_ids(self, context: Sequence[int], word_id: int) -> float:
+        """
+        log P(word | context) for vocabulary ids.
+
+        Args:
+            context (Sequence[int]): Preceding word ids (only the last
+                order - 1 are used)
+            word_id (int): Predicted word id
+
+        Returns:
+            float: Natural-log probability
+        """
+        context = list(context)[-(self.order - 1):]
+
+        backoff = 0.0
+        for start in range(len(context)):
+            history = context[start:]
+            node = self._find(history)
+            if node < 0:
+                continue
+
+            level = len(history)
+            child = self._child(level, node, word_id)
+            if child >= 0:
+                return backoff + float(self.log_probs[level][child])
+            backoff += float(self.backoffs[level - 1][node])
+
+        return backoff + float(self.log_probs[0][word_id])
+
+    def log_prob(self, context: Sequence[str], word: str) -> float:
+        """
+        log P(word | context) for word tokens.
+
+        Args:
+            context (Sequence[str]): Preceding words
+            word (str): Predicted word
+
+        Returns:
+            float: Natural-log probability
+        """
+        return self.log_prob_ids(
+            [self.word_id(w) for w in context], self.word_id(word)
+        )
+
+    def score_sentence(
+        self,
+        tokens: List[str],
+        bos: bool = True,
+        eos: bool = True
+    ) -> float:
+        """
+        Log-probability of a whole sentence.
+
+        Args:
+            tokens (List[str]): Tokenized sentence
+            bos (bool): Condition the first word on <s>
+            eos (bool): Include the probability of </s>
+
+        Returns:
+            float: Log-probability score
+        """
+        ids = [self.word_id(w) for w in tokens]
+        if eos:
+            ids.append(self._eos)
+
+        history = [self._bos] if bos else []
+        score = 0.0
+        for word_id in ids:
+            score += self.log_prob_ids(history, word_id)
+            history.append(word_id)
+            if len(history) >= self.order:
+                del history[0]
+
+        return score
+
+    def minimal_state(self, ids: Sequence[int]) -> Tuple[int, ...]:
+        """
+        Shortest suffix of a history that scores like the full history.
+
+        A history that is not stored as an n-gram has no backoff weight
+        and no continuations, so its first word can be dropped.
+
+        Args:
+            ids (Sequence[int]): Word ids of the history
+
+        Returns:
+            Tuple[int, ...]: At most order - 1 ids
+        """
+        ids = tuple(ids[-(self.order - 1):])
+        while ids and self._find(ids) < 0:
+            ids = ids[1:]
+        return ids
+
+    def scorer(self) -> "KneserNeyScorer":
+        """
+        Shared stateful scorer for decoders (see `lm_scorer`).
+
+        Returns:
+            KneserNeyScorer: Scorer of this model
+        """
+        if self._scorer is None:
+            self._scorer = KneserNeyScorer(self)
+        return self._scorer
+
+    def num_ngrams(self) -> List[int]:
+        """
+        Number of stored n-grams per order.
+
+        Returns:
+            List[int]: Counts for orders 1..order
+        """
+        return [len(log_probs) for log_probs in self.log_probs]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the trie arrays (vocabulary excluded)."""
+        return sum(
+            array.nbytes
+            for arrays in (self.keys, self.log_probs, self.backoffs)
+            for array in arrays
+            if array is not None
+        )
+
+    def __len__(self) -> int:
+        return sum(self.num_ngrams())
+
+
+class KneserNeyScorer(LMScorer):
+    """
+    Stateful view of a KneserNeyLM.
+
+    States are minimal tuples of word ids, starting from (<s>,);
+    `end_score` adds the probability of </s>.
+    """
+
+    def __init__(self, model: KneserNeyLM, cache_size: int = 10000):
+        super().__init__(cache_size)
+        self.model = model
+
+    def begin_state(self) -> Tuple:
+        return (self.model._bos,)
+
+    def _score(self, state: Tuple, word: str) -> Tuple[float, Tuple]:
+        word_id = self.model.word_id(word)
+        return (
+            self.model.log_prob_ids(state, word_id),
+            self.model.minimal_state(state + (word_id,)),
+        )
+
+    def end_score(self, state: Tuple) -> float:
+        return self.model.log_prob_ids(state, self.model._eos)
+
+
+def _padded_ids(corpus: Corpus, vocab: Vocabulary):
+    """
+    Flat ids with <s> / </s> around every sentence, plus the end
+    (exclusive) of the sentence each position belongs to.
+    """
+    ids = corpus.token_ids().astype(np.int64)
+    lengths = np.diff(corpus.offsets()) + 2
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    padded = np.empty(int(offsets[-1]), dtype=np.int64)
+    padded[offsets[:-1]] = vocab[BOS_TOKEN]
+    padded[offsets[1:] - 1] = vocab[EOS_TOKEN]
+
+    # Token j of sentence s moves right by 1 + 2 * s
+    sentence = np.repeat(np.arange(len(lengths)), lengths - 2)
+    padded[np.arange(len(ids)) + 1 + 2 * sentence] = ids
+
+    return padded, np.repeat(offsets[1:], lengths)
+
+
+def _discounts(adjusted: np.ndarray) -> np.ndarray:
+    """
+    Modified Kneser-Ney discounts indexed by min(count, 3).
+    """
+    n1, n2, n3, n4 = (np.count_nonzero(adjusted == k) for k in range(1, 5))
+
+    discounts = np.array((0.0,) + _DEFAULT_DISCOUNTS)
+    if min(n1, n2, n3, n4) == 0:
+        return discounts
+
+    y = n1 / (n1 + 2 * n2)
+    estimates = (1 - 2 * y * n2 / n1, 2 - 3 * y * n3 / n2, 3 - 4 * y * n4 / n3)
+    for k, estimate in enumerate(estimates, start=1):
+        if 0 < estimate < k:
+            discounts[k] = estimate
+    return discounts
+
+
+def train_kneser_ney_lm(
+    sentences: Union[Corpus, List[List[str]]],
+    order: int = 3
+) -> KneserNeyLM:
+    """
+    Train an interpolated modified Kneser-Ney n-gram LM.
+
+    Highest-order n-grams and n-grams starting with <s> use raw
+    counts; all others use continuation counts (number of distinct
+    left extensions). Unigrams are interpolated with a uniform
+    distribution, which also gives <unk> (and <s>, never predicted)
+    its probability.
+
+    Args:
+        sentences (Corpus or List[List[str]]): Tokenized sentences
+            (target language)
+        order (int): N-gram order (2 or more; 3 to 5 is typical)
+
+    Returns:
+        KneserNeyLM: Trained model
+    """
+    if order < 2:
+        raise ValueError("order must be at least 2")
+
+    if not isinstance(sentences, Corpus):
+        sentences = Corpus.from_sentences(sentences)
+
+    vocab = Vocabulary(sentences.vocab.words)
+    bos = vocab.add(BOS_TOKEN)
+    vocab.add(EOS_TOKEN)
+    vocab.add(UNK_TOKEN)
+    size = len(vocab)
+
+    padded, sentence_end = _padded_ids(sentences, vocab)
+    room = sentence_end - np.arange(len(padded))
+
+    # Level n: sorted keys, raw counts, prefix and suffix node of every
+    # n-gram, and its first word (to spot n-grams starting with <s>)
+    raw = [np.bincount(padded, minlength=size)]
+    keys, prefixes, suffixes = [None], [None], [None]
+    first_words = [np.arange(size)]
+    node_at = padded  # level-(n-1) node starting at each position
+
+    for n in range(2, order + 1):
+        positions = np.flatnonzero(room >= n)
+        level_keys, inverse, counts = np.unique(
+            node_at[positions] * size + padded[positions + n - 1],
+            return_inverse=True,
+            return_counts=True,
+        )
+
+        suffix = np.empty(len(level_keys), dtype=np.int64)
+        suffix[inverse] = node_at[positions + 1]
+        prefix = level_keys // size
+
+        keys.append(level_keys)
+        raw.append(counts)
+        prefixes.append(prefix)
+        suffixes.append(suffix)
+        first_words.append(first_words[-1][prefix])
+
+        next_node = np.full(len(padded), -1, dtype=np.int64)
+        next_node[positions] = inverse
+        node_at = next_node
+
+    # Adjusted counts
+    adjusted = []
+    for n in range(1, order + 1):
+        if n == order:
+            counts = raw[n - 1]
+        else:
+            counts = np.bincount(suffixes[n], minlength=len(raw[n - 1]))
+            starts = first_words[n - 1] == bos
+            counts = np.where(starts, raw[n - 1], counts)
+        adjusted.append(counts)
+    adjusted[0][bos] = 0
+
+    # Unigrams: discounted mass interpolated with a uniform distribution
+    counts = adjusted[0]
+    discount = _discounts(counts)[np.minimum(counts, 3)]
+    total = max(counts.sum(), 1)
+    gamma = discount.sum() / total
+    probs = [(counts - discount) / total + gamma / (size - 1)]
+    backoffs = []
+
+    # Higher orders: interpolate with the next lower order
+    for n in range(2, order + 1):
+        counts = adjusted[n - 1]
+        prefix = prefixes[n - 1]
+        discount = _discounts(counts)[np.minimum(counts, 3)]
+
+        parents = len(probs[-1])
+        total = np.bincount(prefix, weights=counts, minlength=parents)
+        mass = np.bincount(prefix, weights=discount, minlength=parents)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gamma = np.where(total > 0, mass / total, 1.0)
+
+        probs.append(
+            (counts - discount) / total[prefix]
+            + gamma[prefix] * probs[-1][suffixes[n - 1]]
+        )
+        backoffs.append(np.log(gamma).astype(np.float32))
+
+    return KneserNeyLM(
+        vocab,
+        keys,
+        [np.log(p).astype(np.float32) for p in probs],
+        backoffs,
+    )
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import math
+    import sys
+    import time
+
+    from src.translation.language_model import (
+        score_sentence,
+        train_bigram_language_model,
+    )
+    from src.translation.translation_model import load_parallel_corpus
+
+    _, sentences = load_parallel_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    train, held_out = sentences[:-200], sentences[-200:]
+
+    # Probabilities after a seen context sum to one
+    lm = train_kneser_ney_lm(train, order=3)
+    predicted = [w for w in lm.vocab.words if w != BOS_TOKEN]
+    context = [BOS_TOKEN] + train[0][:1]
+    mass = sum(math.exp(lm.log_prob(context, w)) for w in predicted)
+    print(f"Sum of P(w | {context}): {mass:.6f}")
+
+    bigram = train_bigram_language_model(train)
+    dict_bytes = sys.getsizeof(bigram) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value)
+        for key, value in bigram.items()
+    )
+    print(f"\n{'model':<12}{'n-grams':>10}{'bytes/n-gram':>14}"
+          f"{'queries/s':>12}{'ppl':>10}")
+
+    queries = [
+        (tokens[:i], tokens[i])
+        for tokens in held_out for i in range(1, len(tokens))
+    ]
+    tokens_scored = sum(len(tokens) + 1 for tokens in held_out)
+
+    start = time.perf_counter()
+    for history, word in queries:
+        bigram.get((history[-1], word), -10.0)
+    seconds = time.perf_counter() - start
+    ppl = math.exp(-sum(score_sentence(t, bigram) for t in held_out)
+                   / sum(max(len(t) - 1, 1) for t in held_out))
+    print(f"{'bigram dict':<12}{len(bigram):>10}"
+          f"{dict_bytes / len(bigram):>14.1f}"
+          f"{len(queries) / seconds:>12.0f}{ppl:>10.1f}")
+
+    for order in (3, 4, 5):
+        lm = train_kneser_ney_lm(train, order=order)
+        ids = [
+            ([lm.word_id(w) for w in history[-(order - 1):]], lm.word_id(w))
+            for history, w in queries
+        ]
+
+        start = time.perf_counter()
+        for history, word_id in ids:
+            lm.log_prob_ids(history, word_id)
+        seconds = time.perf_counter() - start
+
+        ppl = math.exp(-sum(score_sentence(t, lm) for t in held_out)
+                       / tokens_scored)
+        print(f"{'KN order ' + str(order):<12}{len(lm):>10}"
+              f"{lm.nbytes / len(lm):>14.1f}"
+              f"{len(queries) / seconds:>12.0f}{ppl:>10.1f}")
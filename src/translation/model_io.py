@@ -0,0 +1,260 @@
+"""
+model_io.py
+------------
+Compact binary model file for the translation table and the
+bigram language model.
+
+File layout (little-endian):
+
+    magic    8 bytes   b"SMTMODEL"
+    version  uint32
+    length   uint32    size of the JSON header that follows
+    header   JSON      {section name: {"offset", "dtype", "count"}}
+    sections raw array data, each aligned to 8 bytes
+
+Quantized value arrays are stored as a codes section plus a codebook
+section (e.g. "tm_probs.codes" and "tm_probs.codebook") in place of
+the float64 section.
+
+Vocabularies are stored as newline-joined UTF-8 text. Loading maps the
+file with `mmap`, so the arrays are never copied: startup only decodes
+the vocabularies, and processes loading the same file share its pages.
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.translation.quantization import QuantizedArray
+from src.translation.tables import BigramTable, TranslationTable
+
+MAGIC = b"SMTMODEL"
+VERSION = 1
+ALIGNMENT = 8
+
+# Default location of a prebuilt model
+DEFAULT_MODEL_FILE = "models/smt_model.bin"
+
+
+def encode_words(words) -> np.ndarray:
+    """Store a word list as newline-joined UTF-8 bytes."""
+    return np.frombuffer("\n".join(words).encode("utf-8"), dtype=np.uint8)
+
+
+def decode_words(data: np.ndarray):
+    """Inverse of `encode_words`."""
+    if len(data) == 0:
+        return []
+    return data.tobytes().decode("utf-8").split("\n")
+
+
+def write_sections(path: str, sections: Dict[str, np.ndarray]) -> None:
+    """
+    Write named arrays to a model file.
+
+    The file is written next to its destination and renamed into
+    place, so readers never observe a partially written model.
+
+    Args:
+        path (str): Output file path
+        sections (Dict[str, np.ndarray]): Arrays to store
+    """
+    header = {}
+    offset = 0
+    for name, array in sections.items():
+        header[name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "count": int(array.size),
+        }
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix_len = len(MAGIC) + 8 + len(header_bytes)
+    data_start = -(-prefix_len // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<II", VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - prefix_len))
+
+        for array in sections.values():
+            data = np.ascontiguousarray(array).tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % ALIGNMENT))
+
+    os.replace(tmp_path, path)
+
+
+def read_sections(path: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-map a model file and return its arrays.
+
+    The returned arrays are read-only views into the mapping.
+
+    Args:
+        path (str): Model file path
+
+    Returns:
+        Dict[str, np.ndarray]: Arrays by section name
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an SMT model file")
+
+    version, header_len = struct.unpack_from("<II", buffer, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"Unsupported model file version {version}")
+
+    header_start = len(MAGIC) + 8
+    header = json.loads(buffer[header_start:header_start + header_len])
+    data_start = -(-(header_start + header_len) // ALIGNMENT) * ALIGNMENT
+
+    sections = {}
+    for name, info in header.items():
+        sections[name] = np.frombuffer(
+            buffer,
+            dtype=np.dtype(info["dtype"]),
+            count=info["count"],
+            offset=data_start + info["offset"],
+        )
+
+    return sections
+
+
+def _value_sections(name: str, values) -> Dict[str, np.ndarray]:
+    """Sections for a float64 or quantized value array."""
+    if isinstance(values, QuantizedArray):
+        return {
+            f"{name}.codes": values.codes,
+            f"{name}.codebook": values.codebook.astype(np.float64),
+        }
+    return {name: np.asarray(values, dtype=np.float64)}
+
+
+def _load_values(sections: Dict[str, np.ndarray], name: str):
+    """Inverse of `_value_sections`."""
+    if f"{name}.codes" in sections:
+        return QuantizedArray(
+            sections[f"{name}.codes"], sections[f"{name}.codebook"]
+        )
+    return sections[name]
+
+
+def save_model_file(
+    path: str,
+    translation_probs,
+    language_model
+) -> None:
+    """
+    Save a translation model and a bigram LM to one binary file.
+
+    Args:
+        path (str): Output file path
+        translation_probs (Dict or TranslationTable): P(target | source)
+        language_model (Dict or BigramTable): Bigram log-probabilities
+    """
+    if not isinstance(translation_probs, TranslationTable):
+        translation_probs = TranslationTable.from_dict(translation_probs)
+    if not isinstance(language_model, BigramTable):
+        language_model = BigramTable.from_dict(language_model)
+
+    write_sections(path, {
+        "tm_src_words": encode_words(translation_probs.src_words),
+        "tm_tgt_words": encode_words(translation_probs.tgt_words),
+        "tm_indptr": translation_probs.indptr.astype(np.int64),
+        "tm_tgt_ids": translation_probs.tgt_ids.astype(np.int32),
+        **_value_sections("tm_probs", translation_probs.probs),
+        "lm_words": encode_words(language_model.words),
+        "lm_keys": language_model.keys.astype(np.int64),
+        **_value_sections("lm_log_probs", language_model.log_probs),
+    })
+
+
+def load_model_file(path: str) -> Tuple[TranslationTable, BigramTable]:
+    """
+    Load a model file written by `save_model_file` via mmap.
+
+    Args:
+        path (str): Model file path
+
+    Returns:
+        TranslationTable, BigramTable: Memory-mapped models
+    """
+    sections = read_sections(path)
+
+    translation_model = TranslationTable(
+        decode_words(sections["tm_src_words"]),
+        decode_words(sections["tm_tgt_words"]),
+        sections["tm_indptr"],
+        sections["tm_tgt_ids"],
+        _load_values(sections, "tm_probs"),
+    )
+    language_model = BigramTable(
+        decode_words(sections["lm_words"]),
+        sections["lm_keys"],
+        _load_values(sections, "lm_log_probs"),
+    )
+
+    return translation_model, language_model
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from src.translation.language_model import (
+        score_sentence,
+        train_bigram_language_model,
+    )
+    from src.translation.translation_model import (
+        load_parallel_corpus,
+        train_translation_model,
+    )
+    from src.translation.decoder import decode_sentence
+
+    src_sents, tgt_sents = load_parallel_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+
+    start = time.perf_counter()
+    tm = train_translation_model(src_sents, tgt_sents)
+    lm = train_bigram_language_model(tgt_sents)
+    train_time = time.perf_counter() - start
+
+    path = os.path.join(tempfile.mkdtemp(), "smt_model.bin")
+    save_model_file(path, tm, lm)
+
+    start = time.perf_counter()
+    mapped_tm, mapped_lm = load_model_file(path)
+    load_time = time.perf_counter() - start
+
+    print(f"Training   : {train_time * 1000:.1f} ms")
+    print(f"mmap load  : {load_time * 1000:.1f} ms")
+    print(f"File size  : {os.path.getsize(path) / 1e6:.2f} MB")
+
+    same_decode = all(
+        decode_sentence(s, tm, lm) == decode_sentence(s, mapped_tm, mapped_lm)
+        for s in src_sents[:500]
+    )
+    same_score = all(
+        score_sentence(t, lm) == score_sentence(t, mapped_lm)
+        for t in tgt_sents[:500]
+    )
+    print("Same decoding:", same_decode)
+    print("Same LM score:", same_score)
+
+    os.remove(path)
@@ -0,0 +1,387 @@
+"""
+model_registry.py
+------------------
+Hot reloading of model files in serving processes.
+
+A ModelRegistry watches a directory for model artifacts (by default
+`smt_model*.bin`, e.g. `smt_model-v2.bin` from scripts/build_model.py
+or scripts/update_model.py, or a file replaced in place). When the newest
+artifact changes, a background thread loads it, builds its decode
+index and LM scorer, validates it with a smoke translation and then
+swaps it in with a single reference assignment.
+
+Requests read `registry.active` once and use that ModelVersion until
+they finish, so in-flight work completes on the old version while new
+requests see the new one; nothing waits for a reload. Each version
+has its own translation cache, so cached output never mixes versions.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.preprocessing.clean_text import clean_text
+from src.preprocessing.tokenizer import tokenize
+from src.translation.cache import TranslationCache
+from src.translation.decode_index import DecodeIndex
+from src.translation.decoder import decode_sentence
+from src.translation.language_model import lm_scorer
+from src.translation.model_io import load_model_file
+
+DEFAULT_PATTERN = "smt_model*.bin"
+
+
+def version_name(
+    path: Optional[str] = None,
+    mtime: Optional[float] = None
+) -> str:
+    """
+    Version label of a model: `<file stem>@<mtime>` for a model file,
+    `fallback@<now>` for models trained because no file existed.
+
+    Args:
+        path (str): Model file that was loaded (None if trained)
+        mtime (float): Modification time of `path` in seconds
+            (default: read from the file)
+
+    Returns:
+        str: Version label
+    """
+    if path is None:
+        return f"fallback@{time.strftime('%Y%m%dT%H%M%S')}"
+    if mtime is None:
+        mtime = os.path.getmtime(path)
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(mtime))
+    return f"{Path(path).stem}@{stamp}"
+
+
+class ModelVersion:
+    """
+    One loaded model: translation model, LM and derived structures.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        path: Optional[str],
+        translation_model,
+        language_model,
+        k: int = 10,
+        cache_size: int = 0
+    ):
+        self.version = version
+        self.path = path
+        self.translation_model = translation_model
+        self.language_model = language_model
+        self.index = DecodeIndex.build(translation_model, k=k)
+        self.scorer = lm_scorer(language_model)
+        self.cache = TranslationCache(cache_size) if cache_size > 0 else None
+        self.loaded_at = time.time()
+
+    def translate(self, src_tokens: List[str]) -> List[str]:
+        """Greedy translation with this version (cached if enabled)."""
+        def decode(tokens):
+            return decode_sentence(
+                tokens, self.translation_model, self.language_model,
+                index=self.index
+            )
+
+        if self.cache is not None:
+            return self.cache.translate(src_tokens, decode)
+        return decode(src_tokens)
+
+
+class ModelRegistry:
+    """
+    Watches a model directory and swaps in new versions atomically.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = "models",
+        pattern: str = DEFAULT_PATTERN,
+        poll_interval: float = 2.0,
+        k: int = 10,
+        cache_size: int = 0,
+        smoke_text: str = "hello",
+        fallback: Optional[Callable[[], Tuple]] = None
+    ):
+        """
+        Args:
+            model_dir (str): Directory holding model artifacts
+            pattern (str): Glob for artifacts; the newest (by
+                modification time, then name) is served
+            poll_interval (float): Seconds between directory checks
+            k (int): Candidates per word in each decode index
+            cache_size (int): Translation cache per version (0 = none)
+            smoke_text (str): Sentence every new version must translate
+            fallback (Callable): Returns (translation model, LM) when
+                no artifact exists yet, e.g. by training
+        """
+        self.model_dir = Path(model_dir)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.k = k
+        self.cache_size = cache_size
+        self.smoke_tokens = tokenize(clean_text(smoke_text))
+        self.fallback = fallback
+
+        self._active: Optional[ModelVersion] = None
+        self._signature = None
+        self._failed_signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.reload_seconds: Optional[float] = None
+
+    @property
+    def active(self) -> Optional[ModelVersion]:
+        """The model version new requests should use."""
+        return self._active
+
+    def _artifacts(self) -> List[Tuple[Path, Tuple]]:
+        """Artifacts and their signatures, newest first."""
+        artifacts = []
+        for path in self.model_dir.glob(self.pattern):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            signature = (path.name, st.st_mtime_ns, st.st_size, st.st_ino)
+            artifacts.append((path, signature))
+        artifacts.sort(key=lambda a: (a[1][1], a[1][0]), reverse=True)
+        return artifacts
+
+    def validate(self, model: ModelVersion) -> None:
+        """
+        Smoke-test a loaded version before it is served.
+
+        Raises:
+            ValueError: If the model is empty or the smoke translation
+            fails or looks wrong
+        """
+        if len(model.translation_model) == 0:
+            raise ValueError("translation model is empty")
+
+        output = decode_sentence(
+            self.smoke_tokens, model.translation_model,
+            model.language_model, index=model.index
+        )
+        if len(output) != len(self.smoke_tokens) or \
+                not all(isinstance(word, str) and word for word in output):
+            raise ValueError(f"bad smoke translation: {output!r}")
+
+    def _swap_in(self, model: ModelVersion, signature, start: float) -> None:
+        self.validate(model)
+        # One reference assignment: readers see the old or new version
+        self._active = model
+        self._signature = signature
+        self._failed_signature = None
+        self.reloads += 1
+        self.reload_seconds = time.perf_counter() - start
+
+    def check(self) -> bool:
+        """
+        Load and swap in the newest artifact if it changed.
+
+        A failed artifact is not retried until it changes again; the
+        current version keeps serving. While nothing is serving yet,
+        older artifacts are tried in turn, then the fallback.
+
+        Returns:
+            bool: True if a new version became active
+
+        Raises:
+            Exception: The newest artifact's load error, when nothing
+            is serving, no artifact loads and there is no fallback
+        """
+        with self._lock:
+            artifacts = self._artifacts()
+            start = time.perf_counter()
+
+            if self._active is not None:
+                if not artifacts:
+                    return False
+                path, signature = artifacts[0]
+                if signature in (self._signature, self._failed_signature):
+                    return False
+                return self._try_load(path, signature, start) is None
+
+            error = None
+            for path, signature in artifacts:
+                exc = self._try_load(path, signature, start)
+                if exc is None:
+                    if error is not None:
+                        # Do not retry the broken newer file until it
+                        # changes
+                        self._failed_signature = artifacts[0][1]
+                    return True
+                error = error or exc
+
+            if self.fallback is None:
+                if error is not None:
+                    raise error
+                return False
+
+            translation_model, language_model = self.fallback()
+            model = ModelVersion(
+                version_name(), None,
+                translation_model, language_model,
+                self.k, self.cache_size
+            )
+            self._swap_in(model, None, start)
+            return True
+
+    def _try_load(
+        self,
+        path: Path,
+        signature: Tuple,
+        start: float
+    ) -> Optional[Exception]:
+        """
+        Load, validate and swap in one artifact.
+
+        Returns:
+            Exception: Why the artifact was rejected, or None if it is
+            now active
+        """
+        try:
+            translation_model, language_model = load_model_file(str(path))
+            model = ModelVersion(
+                version_name(str(path), signature[1] / 1e9), str(path),
+                translation_model, language_model,
+                self.k, self.cache_size
+            )
+            self._swap_in(model, signature, start)
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = f"{path.name}: {exc!r}"
+            self._failed_signature = signature
+            return exc
+        return None
+
+    def start(self) -> "ModelRegistry":
+        """
+        Load the first version (blocking), then watch in a daemon thread.
+
+        Returns:
+            ModelRegistry: self
+
+        Raises:
+            FileNotFoundError: If there is no artifact and no fallback
+        """
+        self.check()
+        if self._active is None:
+            raise FileNotFoundError(
+                f"no model matching {self.pattern} in {self.model_dir}"
+            )
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._watch, name="model-registry", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as exc:
+                self.last_error = repr(exc)
+
+    def stop(self) -> None:
+        """Stop watching (the active version stays loaded)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> Dict:
+        """
+        Active version and reload counters.
+
+        Returns:
+            Dict: version, path, loaded_at, reload_seconds, reloads,
+            failures, last_error
+        """
+        model = self._active
+        return {
+            "version": model.version if model else None,
+            "path": model.path if model else None,
+            "loaded_at": model.loaded_at if model else None,
+            "reload_seconds": (
+                round(self.reload_seconds, 4)
+                if self.reload_seconds is not None else None
+            ),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    from src.translation.model_io import save_model_file
+    from src.translation.training import load_or_train_models
+
+    tm, lm = load_or_train_models("")
+    model_dir = tempfile.mkdtemp()
+    save_model_file(os.path.join(model_dir, "smt_model-v1.bin"), tm, lm)
+
+    registry = ModelRegistry(model_dir, poll_interval=0.05).start()
+    print("Active:", registry.active.version)
+
+    # Translate continuously while a new version is published
+    in_flight = registry.active
+    stop = threading.Event()
+    served = []
+
+    def traffic():
+        while not stop.is_set():
+            served.append(registry.active.translate(["hello", "world"]))
+
+    worker = threading.Thread(target=traffic)
+    worker.start()
+
+    time.sleep(0.05)
+    os.utime(os.path.join(model_dir, "smt_model-v1.bin"), (1, 1))
+    save_model_file(
+        os.path.join(model_dir, "smt_model-v2.bin"),
+        {"hello": {"HELLO": 1.0}, "world": {"WORLD": 1.0}}, lm
+    )
+    deadline = time.time() + 5
+    while registry.active is in_flight and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    stop.set()
+    worker.join()
+
+    print("Active:", registry.active.version)
+    print("Old version still usable:", in_flight.translate(["hello"]))
+    print("Requests served during swap:", len(served))
+    print("Outputs seen:", sorted({" ".join(s) for s in served}))
+
+    # A broken artifact is rejected; the current version keeps serving
+    with open(os.path.join(model_dir, "smt_model-v3.bin"), "wb") as f:
+        f.write(b"not a model")
+    registry.check()
+    print("After bad artifact:", registry.status())
+
+    registry.stop()
+
+    # Starting with a broken newest artifact serves the next-newest one
+    restarted = ModelRegistry(model_dir).start()
+    print("Started on:", restarted.active.version,
+          f"(failures: {restarted.failures})")
+    restarted.stop()
+    shutil.rmtree(model_dir)
@@ -0,0 +1,327 @@
+"""
+model_state.py
+---------------
+Persisted count tables for incremental (online) model updates.
+
+The relative-frequency translation model and the bigram LM are fully
+determined by four count tables: co-occurrences, source counts,
+unigram counts and bigram counts. `ModelState` keeps those tables
+together with the normalized models. `update(new_pairs)` counts only
+the new pairs, merges them in and recomputes only the probability
+rows whose denominators changed, so an update costs time in the size
+of the delta (and the rows it touches), not of the corpus. The result
+is identical, key order included, to retraining on all the data.
+
+The state is saved with the same atomic section writer as model files;
+`publish` writes a serving model file that loaders pick up by path.
+"""
+
+import math
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from src.translation.language_model import (
+    merge_ngram_counts,
+    normalize_bigram_counts,
+)
+from src.translation.model_io import (
+    decode_words,
+    encode_words,
+    read_sections,
+    save_model_file,
+    write_sections,
+)
+from src.translation.training import count_tables
+from src.translation.translation_model import (
+    merge_cooccurrences,
+    normalize_cooccurrences,
+)
+
+# Default location of the persisted count tables
+DEFAULT_STATE_FILE = "models/smt_state.bin"
+
+# Default published model; kept apart from the IBM-1 serving file and
+# outside the `smt_model*.bin` pattern the model registry serves
+DEFAULT_INCREMENTAL_FILE = "models/smt_incremental.bin"
+
+
+class ModelState:
+    """
+    Count tables plus the translation model and bigram LM they define.
+    """
+
+    def __init__(
+        self,
+        co_occurrence: Dict[str, Dict[str, int]],
+        source_counts: Dict[str, int],
+        unigram_counts: Dict[str, int],
+        bigram_counts: Dict[Tuple[str, str], int]
+    ):
+        self.co_occurrence = co_occurrence
+        self.source_counts = source_counts
+        self.unigram_counts = unigram_counts
+        self.bigram_counts = bigram_counts
+
+        self.translation_probs = normalize_cooccurrences(
+            co_occurrence, source_counts
+        )
+        self.bigram_model = normalize_bigram_counts(
+            unigram_counts, bigram_counts
+        )
+
+        # w1 -> second words of its bigrams, to renormalize one row
+        self._successors = defaultdict(list)
+        for w1, w2 in bigram_counts:
+            self._successors[w1].append(w2)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: Iterable[Tuple[List[str], List[str]]],
+        workers: int = 1,
+        chunk_size: int = 10000
+    ) -> "ModelState":
+        """
+        Count a corpus from scratch.
+
+        Args:
+            pairs (Iterable[Tuple[List[str], List[str]]]): Tokenized pairs
+            workers (int): Counting processes (see `count_tables`)
+            chunk_size (int): Pairs per shard when workers > 1
+
+        Returns:
+            ModelState: Counts and models of the corpus
+        """
+        return cls(*count_tables(pairs, workers, chunk_size))
+
+    def models(
+        self
+    ) -> Tuple[Dict[str, Dict[str, float]], Dict[Tuple[str, str], float]]:
+        """
+        Current translation probabilities and bigram log-probabilities.
+
+        Returns:
+            Dict, Dict: Translation model and bigram LM
+        """
+        return self.translation_probs, self.bigram_model
+
+    def update(
+        self,
+        new_pairs: Iterable[Tuple[List[str], List[str]]]
+    ) -> Dict[str, int]:
+        """
+        Fold new sentence pairs into the counts and models.
+
+        Args:
+            new_pairs (Iterable[Tuple[List[str], List[str]]]):
+                Tokenized pairs to add
+
+        Returns:
+            Dict[str, int]: pairs added and rows renormalized
+        """
+        pairs = 0
+
+        def counted():
+            nonlocal pairs
+            for pair in new_pairs:
+                pairs += 1
+                yield pair
+
+        part_co, part_source, part_unigram, part_bigram = \
+            count_tables(counted())
+
+        # New bigrams take their slot now, so the model keeps corpus
+        # order; their values are filled in with the rest of the row
+        for bigram in part_bigram:
+            if bigram not in self.bigram_counts:
+                self._successors[bigram[0]].append(bigram[1])
+                self.bigram_model[bigram] = 0.0
+
+        merge_cooccurrences(
+            self.co_occurrence, self.source_counts, part_co, part_source
+        )
+        merge_ngram_counts(
+            self.unigram_counts, self.bigram_counts,
+            part_unigram, part_bigram
+        )
+
+        # P(t | s) rows whose source count changed
+        for src_word in part_source:
+            total = self.source_counts[src_word]
+            row = self.translation_probs[src_word]
+            for tgt_word, count in self.co_occurrence[src_word].items():
+                row[tgt_word] = count / total
+
+        # Bigram rows whose first-word count changed
+        bigram_model = self.bigram_model
+        bigram_counts = self.bigram_counts
+        for w1 in part_unigram:
+            total = self.unigram_counts[w1]
+            for w2 in self._successors.get(w1, ()):
+                bigram_model[(w1, w2)] = math.log(
+                    bigram_counts[(w1, w2)] / total
+                )
+
+        return {
+            "pairs": pairs,
+            "translation_rows": len(part_source),
+            "bigram_rows": len(part_unigram),
+        }
+
+    def save(self, path: str = DEFAULT_STATE_FILE) -> None:
+        """
+        Persist the count tables (written atomically).
+
+        Args:
+            path (str): State file path
+        """
+        src_words = list(self.co_occurrence)
+        tgt_index = {}
+        indptr = [0]
+        tgt_ids = []
+        counts = []
+        for src_word in src_words:
+            for tgt_word, count in self.co_occurrence[src_word].items():
+                tgt_ids.append(tgt_index.setdefault(tgt_word, len(tgt_index)))
+                counts.append(count)
+            indptr.append(len(tgt_ids))
+
+        words = list(self.unigram_counts)
+        word_index = {word: i for i, word in enumerate(words)}
+
+        write_sections(path, {
+            "co_src_words": encode_words(src_words),
+            "co_tgt_words": encode_words(tgt_index),
+            "co_indptr": np.asarray(indptr, dtype=np.int64),
+            "co_tgt_ids": np.asarray(tgt_ids, dtype=np.int32),
+            "co_counts": np.asarray(counts, dtype=np.int64),
+            "source_counts": np.asarray(
+                [self.source_counts[w] for w in src_words], dtype=np.int64
+            ),
+            "uni_words": encode_words(words),
+            "uni_counts": np.asarray(
+                list(self.unigram_counts.values()), dtype=np.int64
+            ),
+            "bi_first": np.asarray(
+                [word_index[w1] for w1, _ in self.bigram_counts],
+                dtype=np.int32
+            ),
+            "bi_second": np.asarray(
+                [word_index[w2] for _, w2 in self.bigram_counts],
+                dtype=np.int32
+            ),
+            "bi_counts": np.asarray(
+                list(self.bigram_counts.values()), dtype=np.int64
+            ),
+        })
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_STATE_FILE) -> "ModelState":
+        """
+        Load count tables written by `save`.
+
+        Args:
+            path (str): State file path
+
+        Returns:
+            ModelState: Restored counts and models
+        """
+        sections = read_sections(path)
+
+        src_words = decode_words(sections["co_src_words"])
+        tgt_words = decode_words(sections["co_tgt_words"])
+        indptr = sections["co_indptr"].tolist()
+        tgt_ids = sections["co_tgt_ids"].tolist()
+        counts = sections["co_counts"].tolist()
+
+        co_occurrence = defaultdict(lambda: defaultdict(int))
+        for i, src_word in enumerate(src_words):
+            row = co_occurrence[src_word]
+            for j in range(indptr[i], indptr[i + 1]):
+                row[tgt_words[tgt_ids[j]]] = counts[j]
+
+        source_counts = defaultdict(
+            int, zip(src_words, sections["source_counts"].tolist())
+        )
+
+        words = decode_words(sections["uni_words"])
+        unigram_counts = defaultdict(
+            int, zip(words, sections["uni_counts"].tolist())
+        )
+        bigram_counts = defaultdict(int, (
+            ((words[w1], words[w2]), count)
+            for w1, w2, count in zip(
+                sections["bi_first"].tolist(),
+                sections["bi_second"].tolist(),
+                sections["bi_counts"].tolist(),
+            )
+        ))
+
+        return cls(co_occurrence, source_counts, unigram_counts, bigram_counts)
+
+    def publish(self, model_file: str) -> None:
+        """
+        Write the current models as a serving model file.
+
+        The file is renamed into place, so a server reloading it sees
+        either the old or the new model, never a mix; processes still
+        mapping the old file keep their consistent view.
+
+        Args:
+            model_file (str): Model file read by `load_model_file`
+        """
+        save_model_file(model_file, self.translation_probs, self.bigram_model)
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from src.translation.training import train_models_from_pairs
+    from src.translation.translation_model import load_parallel_corpus
+
+    src_sents, tgt_sents = load_parallel_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    pairs = list(zip(src_sents, tgt_sents)) * 20
+    split = len(pairs) * 99 // 100
+    base, delta = pairs[:split], pairs[split:]
+
+    state = ModelState.from_pairs(base)
+
+    start = time.perf_counter()
+    stats = state.update(delta)
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tm_full, lm_full = train_models_from_pairs(pairs)
+    retrain_time = time.perf_counter() - start
+
+    tm, lm = state.models()
+    same = (
+        tm == tm_full and lm == lm_full
+        and list(tm) == list(tm_full) and list(lm) == list(lm_full)
+    )
+
+    print(f"Corpus pairs       : {len(pairs)} (+{stats['pairs']} new)")
+    print(f"Rows renormalized  : {stats['translation_rows']} TM, "
+          f"{stats['bigram_rows']} LM")
+    print(f"Update (1% delta)  : {update_time * 1000:.1f} ms")
+    print(f"Full retrain       : {retrain_time * 1000:.1f} ms")
+    print(f"Identical to retrain: {same}")
+
+    tmp_dir = tempfile.mkdtemp()
+    state_file = os.path.join(tmp_dir, "smt_state.bin")
+    model_file = os.path.join(tmp_dir, "smt_model.bin")
+
+    state.save(state_file)
+    restored = ModelState.load(state_file)
+    print("State round trip   :", restored.models() == state.models())
+
+    start = time.perf_counter()
+    state.publish(model_file)
+    print(f"Publish            : {(time.perf_counter() - start) * 1000:.1f} ms")
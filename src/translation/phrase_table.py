@@ -0,0 +1,414 @@
+"""
+phrase_table.py
+----------------
+On-demand phrase translation lookups over a suffix array.
+
+Instead of materializing every phrase pair of the training corpus,
+`PhraseIndex` keeps the source side as one flat id array with a
+suffix array over it, plus the Viterbi word alignment of every target
+token. Looking up a source phrase:
+
+1. binary-searches the suffix array for the range of its occurrences,
+2. samples at most `sample_size` of them (evenly spaced),
+3. extracts the target phrase consistent with the alignment for each
+   sampled occurrence (vectorized over the samples),
+4. turns the target phrase counts into P(target phrase | source phrase).
+
+Memory is a few int32 arrays per corpus token, and a lookup costs the
+same however frequent the phrase is.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.preprocessing.corpus import Corpus, pair_positions
+from src.translation.cache import LRUCache
+from src.translation.ibm_model1 import NULL_TOKEN
+
+
+def viterbi_alignment(
+    src_corpus: Corpus,
+    tgt_corpus: Corpus,
+    translation_probs: Dict[str, Dict[str, float]]
+) -> np.ndarray:
+    """
+    Most probable source position of every target token under P(t | s).
+
+    Ties go to the leftmost source word. Target words whose best link
+    is the NULL word (if the model has one), or that have no nonzero
+    link, stay unaligned.
+
+    Args:
+        src_corpus (Corpus): Source sentences
+        tgt_corpus (Corpus): Target sentences (same count)
+        translation_probs (Dict or TranslationTable): P(target | source)
+
+    Returns:
+        np.ndarray: int32 flat source position per target token (-1 if
+        unaligned)
+    """
+    src_ids = src_corpus.token_ids()
+    tgt_ids = tgt_corpus.token_ids()
+    tgt_size = max(len(tgt_corpus.vocab), 1)
+
+    # Model probabilities keyed by corpus ids: src * |T| + tgt
+    keys, probs = [], []
+    lookup = tgt_corpus.vocab.lookup
+    for src_id, src_word in enumerate(src_corpus.vocab.words):
+        row = translation_probs.get(src_word)
+        for tgt_word, prob in (row or {}).items():
+            tgt_id = lookup(tgt_word)
+            if tgt_id >= 0:
+                keys.append(src_id * tgt_size + tgt_id)
+                probs.append(prob)
+
+    keys = np.asarray(keys, dtype=np.int64)
+    probs = np.asarray(probs, dtype=np.float64)
+    order = np.argsort(keys)
+    keys, probs = keys[order], probs[order]
+
+    def link_probs(key):
+        if len(keys) == 0:
+            return np.zeros(len(key))
+        pos = np.searchsorted(keys, key)
+        pos[pos == len(keys)] = 0
+        return np.where(keys[pos] == key, probs[pos], 0.0)
+
+    src_pos, tgt_pos = pair_positions(
+        src_corpus.offsets(), tgt_corpus.offsets()
+    )
+    link = link_probs(
+        src_ids[src_pos].astype(np.int64) * tgt_size + tgt_ids[tgt_pos]
+    )
+
+    # Best link per target token: highest probability, then leftmost
+    order = np.lexsort((src_pos, -link, tgt_pos))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = tgt_pos[order][1:] != tgt_pos[order][:-1]
+    best = order[first]
+
+    alignment = np.full(len(tgt_ids), -1, dtype=np.int32)
+    aligned = link[best] > 0
+
+    null_row = translation_probs.get(NULL_TOKEN)
+    if null_row:
+        words = tgt_corpus.vocab.words
+        null_probs = np.array([null_row.get(w, 0.0) for w in words])
+        aligned &= link[best] >= null_probs[tgt_ids[tgt_pos[best]]]
+
+    alignment[tgt_pos[best][aligned]] = src_pos[best][aligned]
+    return alignment
+
+
+def build_suffix_array(text: np.ndarray, depth: int) -> np.ndarray:
+    """
+    Suffix array of `text`, sorted on the first `depth` tokens.
+
+    Prefix doubling: each round re-ranks suffixes by the pair (rank
+    of the first half, rank of the second half), doubling the sorted
+    prefix length. Negative tokens (sentence separators) are not
+    indexed and sort before every word; suffixes with an equal prefix
+    stay in text order.
+
+    Args:
+        text (np.ndarray): Token ids, separators < 0
+        depth (int): Prefix length the order must be exact for
+
+    Returns:
+        np.ndarray: int32 text positions of all word suffixes
+    """
+    n = len(text)
+    rank = np.maximum(text.astype(np.int64) + 1, 0)
+
+    width = 1
+    while width < depth:
+        following = np.zeros(n, dtype=np.int64)
+        following[:n - width] = rank[width:]
+        _, rank = np.unique(
+            rank * (int(rank.max()) + 1) + following, return_inverse=True
+        )
+        rank = rank.astype(np.int64)
+        width *= 2
+
+    positions = np.flatnonzero(text >= 0)
+    order = np.argsort(rank[positions], kind="stable")
+    return positions[order].astype(np.int32)
+
+
+class PhraseIndex:
+    """
+    Suffix-array phrase translation provider.
+
+    `candidates(src_phrase, k)` returns the k most probable target
+    phrases of a source phrase as (tuple of words, probability).
+    """
+
+    def __init__(
+        self,
+        src_vocab,
+        tgt_words: List[str],
+        text: np.ndarray,
+        text_starts: np.ndarray,
+        suffix_array: np.ndarray,
+        first_link: np.ndarray,
+        last_link: np.ndarray,
+        tgt_ids: np.ndarray,
+        alignment: np.ndarray,
+        max_phrase_length: int = 5,
+        sample_size: int = 100,
+        cache_size: int = 0
+    ):
+        self.src_vocab = src_vocab
+        self.tgt_words = tgt_words
+        self.text = text
+        self.text_starts = text_starts
+        self.suffix_array = suffix_array
+        self.first_link = first_link
+        self.last_link = last_link
+        self.tgt_ids = tgt_ids
+        self.alignment = alignment
+        self.max_phrase_length = max_phrase_length
+        self.sample_size = sample_size
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
+
+    @classmethod
+    def build(
+        cls,
+        src_corpus: Corpus,
+        tgt_corpus: Corpus,
+        translation_probs: Dict[str, Dict[str, float]],
+        max_phrase_length: int = 5,
+        sample_size: int = 100,
+        cache_size: int = 0
+    ) -> "PhraseIndex":
+        """
+        Align the corpus and index its source side.
+
+        Args:
+            src_corpus (Corpus): Source training sentences
+            tgt_corpus (Corpus): Target training sentences
+            translation_probs (Dict or TranslationTable): P(target |
+                source) used for the Viterbi alignment (e.g. IBM Model-1)
+            max_phrase_length (int): Longest source / target phrase
+            sample_size (int): Occurrences sampled per lookup
+            cache_size (int): LRU cache of lookups (0 disables it)
+
+        Returns:
+            PhraseIndex: Index over the corpus
+        """
+        alignment = viterbi_alignment(src_corpus, tgt_corpus, translation_probs)
+
+        # Source ids with a -1 separator after every sentence
+        src_ids = src_corpus.token_ids()
+        offsets = src_corpus.offsets()
+        sentence = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        text = np.full(len(src_ids) + len(offsets) - 1, -1, dtype=np.int32)
+        text[np.arange(len(src_ids)) + sentence] = src_ids
+        text_starts = offsets[:-1] + np.arange(len(offsets) - 1)
+
+        # Target span linked to each source position
+        linked = np.flatnonzero(alignment >= 0)
+        first_link = np.full(len(src_ids), np.iinfo(np.int32).max, np.int32)
+        last_link = np.full(len(src_ids), -1, dtype=np.int32)
+        np.minimum.at(first_link, alignment[linked], linked)
+        np.maximum.at(last_link, alignment[linked], linked)
+
+        return cls(
+            src_corpus.vocab,
+            tgt_corpus.vocab.words,
+            text,
+            text_starts,
+            build_suffix_array(text, max_phrase_length),
+            first_link,
+            last_link,
+            tgt_corpus.token_ids().copy(),
+            alignment,
+            max_phrase_length,
+            sample_size,
+            cache_size,
+        )
+
+    def occurrences(self, phrase_ids: Sequence[int]) -> Tuple[int, int]:
+        """
+        Suffix array range [lo, hi) of the suffixes starting with a phrase.
+
+        Args:
+            phrase_ids (Sequence[int]): Source word ids
+
+        Returns:
+            int, int: Range bounds (empty if lo == hi)
+        """
+        text, suffix_array = self.text, self.suffix_array
+        lo, hi = 0, len(suffix_array)
+
+        for k, word_id in enumerate(phrase_ids):
+            def token(i, k=k):
+                return text[suffix_array[i] + k]
+
+            lo, hi = (
+                bisect_left(range(hi), word_id, lo, hi, key=token),
+                bisect_right(range(hi), word_id, lo, hi, key=token),
+            )
+            if lo == hi:
+                break
+
+        return lo, hi
+
+    def _extract(self, starts: np.ndarray, length: int) -> Counter:
+        """
+        Count the consistent target phrases of sampled occurrences.
+        """
+        max_len = self.max_phrase_length
+        span = starts[:, None] + np.arange(length)
+        tmin = self.first_link[span].min(axis=1)
+        tmax = self.last_link[span].max(axis=1)
+        tlen = tmax - tmin + 1
+
+        ok = (tmax >= 0) & (tlen <= max_len)
+        if not ok.any():
+            return Counter()
+        starts, tmin, tlen = starts[ok], tmin[ok], tlen[ok]
+
+        # No target word inside the span may link outside the source span
+        window = np.minimum(
+            tmin[:, None] + np.arange(max_len), len(self.alignment) - 1
+        )
+        inside = np.arange(max_len) < tlen[:, None]
+        links = self.alignment[window]
+        consistent = (
+            ~inside | (links < 0)
+            | ((links >= starts[:, None]) & (links < starts[:, None] + length))
+        ).all(axis=1)
+
+        phrases = Counter()
+        for row, size in zip(
+            self.tgt_ids[window[consistent]].tolist(),
+            tlen[consistent].tolist()
+        ):
+            phrases[tuple(row[:size])] += 1
+        return phrases
+
+    def candidates(
+        self,
+        src_phrase: Sequence[str],
+        k: int = 10
+    ) -> List[Tuple[Tuple[str, ...], float]]:
+        """
+        Most probable target phrases of a source phrase.
+
+        Args:
+            src_phrase (Sequence[str]): Source words
+            k (int): Candidates returned
+
+        Returns:
+            List[Tuple[Tuple[str, ...], float]]: (target phrase,
+            P(target phrase | source phrase)), most probable first
+            (empty for unseen or unalignable phrases)
+        """
+        if not src_phrase or len(src_phrase) > self.max_phrase_length:
+            return []
+
+        key = (tuple(src_phrase), k)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        phrase_ids = [self.src_vocab.lookup(word) for word in src_phrase]
+        result = []
+
+        if min(phrase_ids) >= 0:
+            lo, hi = self.occurrences(phrase_ids)
+            count = hi - lo
+            if count:
+                # Evenly spaced sample of the occurrences
+                sample = min(count, self.sample_size)
+                picks = lo + (np.arange(sample) * count) // sample
+                positions = self.suffix_array[picks].astype(np.int64)
+
+                # Text position -> flat source position
+                sentence = np.searchsorted(
+                    self.text_starts, positions, side="right"
+                ) - 1
+                phrases = self._extract(positions - sentence, len(phrase_ids))
+
+                total = sum(phrases.values())
+                words = self.tgt_words
+                result = [
+                    (tuple(words[t] for t in phrase), n / total)
+                    for phrase, n in heapq.nlargest(
+                        k, phrases.items(), key=lambda item: item[1]
+                    )
+                ]
+
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the index arrays (vocabularies excluded)."""
+        return sum(array.nbytes for array in (
+            self.text, self.text_starts, self.suffix_array,
+            self.first_link, self.last_link, self.tgt_ids, self.alignment,
+        ))
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import time
+
+    from src.evaluation.corpus_bleu import BleuAccumulator
+    from src.translation.decoder import decode_phrases, decode_sentence
+    from src.translation.ibm_model1 import train_ibm_model1
+    from src.translation.language_model import train_bigram_language_model
+    from src.translation.translation_model import load_compact_corpus
+
+    src_corpus, tgt_corpus = load_compact_corpus(
+        "data/train/source.txt", "data/train/target.txt"
+    )
+    tm, _ = train_ibm_model1(src_corpus, tgt_corpus)
+    lm = train_bigram_language_model(tgt_corpus)
+
+    start = time.perf_counter()
+    index = PhraseIndex.build(src_corpus, tgt_corpus, tm)
+    build_time = time.perf_counter() - start
+
+    print(f"Build time   : {build_time * 1000:.1f} ms "
+          f"({src_corpus.num_tokens} source tokens)")
+    print(f"Index size   : {index.nbytes / 1e6:.2f} MB "
+          f"({index.nbytes / src_corpus.num_tokens:.1f} bytes/token)")
+
+    # Every source n-gram (n <= 3) of the first sentences, hits only
+    queries = []
+    for tokens in list(src_corpus)[:300]:
+        for n in (1, 2, 3):
+            for i in range(len(tokens) - n + 1):
+                queries.append(tokens[i:i + n])
+
+    start = time.perf_counter()
+    found = sum(1 for q in queries if index.candidates(q))
+    lookup_time = time.perf_counter() - start
+    print(f"Lookups      : {len(queries) / lookup_time:,.0f} phrases/s "
+          f"({found}/{len(queries)} with candidates)")
+
+    for phrase in (["i", "am"], ["thank", "you"], ["how", "are", "you"]):
+        print(" ".join(phrase), "->", [
+            (" ".join(t), round(p, 3)) for t, p in index.candidates(phrase, 3)
+        ])
+
+    # Word-by-word vs phrase decoding on training sentences
+    word_bleu, phrase_bleu = BleuAccumulator(), BleuAccumulator()
+    index.cache = LRUCache(100000)
+    start = time.perf_counter()
+    for src, ref in list(zip(src_corpus, tgt_corpus))[:500]:
+        phrase_bleu.add(decode_phrases(src, index, lm), ref)
+        word_bleu.add(decode_sentence(src, tm, lm), ref)
+    decode_time = time.perf_counter() - start
+    print(f"\nBLEU word-by-word: {word_bleu.score()['bleu']:.4f}")
+    print(f"BLEU phrases     : {phrase_bleu.score()['bleu']:.4f}")
+    print(f"Decode time      : {decode_time:.2f} s (500 sentences, both)")
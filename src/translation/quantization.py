@@ -0,0 +1,205 @@
+"""
+quantization.py
+----------------
+Codebook quantization of model probabilities.
+
+A float64 array is replaced by 8- or 16-bit codes into a small sorted
+codebook of representative values. `QuantizedArray` indexes like the
+original array (slices, positions and index arrays return float64
+values looked up in the codebook), so the CSR translation table and
+the bigram table hold one in place of their value array and every
+lookup, `score_sentence` and the decoders work unchanged.
+
+Codebooks are built either by equal-population binning (each code
+covers the same number of values; a code's value is the mean of its
+bin) or by 1-D k-means (Lloyd iterations started from the bins).
+A codebook never has more bytes than its codes, so a quantized array
+is at most a quarter (8-bit) or half (16-bit) the size of the float64
+one, even for small arrays with mostly distinct values.
+Translation probabilities are quantized in the log domain, where their
+resolution matters.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+METHODS = ("binned", "kmeans")
+
+
+def build_codebook(
+    values: np.ndarray,
+    bits: int = 8,
+    method: str = "binned",
+    iterations: int = 20
+) -> np.ndarray:
+    """
+    Choose at most 2**bits representative values, and no more than
+    fit in the bytes taken by the codes (len(values) * bits / 64).
+
+    Args:
+        values (np.ndarray): Values to represent
+        bits (int): 8 or 16
+        method (str): "binned" or "kmeans"
+        iterations (int): Lloyd iterations for k-means
+
+    Returns:
+        np.ndarray: Sorted float64 codebook
+    """
+    if bits not in (8, 16):
+        raise ValueError("bits must be 8 or 16")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+
+    values = np.asarray(values, dtype=np.float64)
+    # 8-byte entries: a codebook as large as 2**bits would outweigh the
+    # codes of a small array (65,536 entries for ~70k 16-bit codes)
+    levels = max(1, min(1 << bits, len(values) * bits // 64))
+
+    unique = np.unique(values)
+    if len(unique) <= levels:
+        # Few distinct values: the codebook is exact
+        return unique
+
+    # Equal-population bins over the sorted values
+    ordered = np.sort(values)
+    bins = np.minimum(
+        np.arange(len(ordered)) * levels // len(ordered), levels - 1
+    )
+    sums = np.bincount(bins, weights=ordered, minlength=levels)
+    codebook = sums / np.bincount(bins, minlength=levels)
+
+    if method == "kmeans":
+        for _ in range(iterations):
+            codes = encode(ordered, codebook)
+            counts = np.bincount(codes, minlength=len(codebook))
+            sums = np.bincount(
+                codes, weights=ordered, minlength=len(codebook)
+            )
+            # Empty clusters keep their previous center
+            updated = np.where(
+                counts > 0, sums / np.maximum(counts, 1), codebook
+            )
+            if np.array_equal(updated, codebook):
+                break
+            codebook = np.sort(updated)
+
+    return np.unique(codebook)
+
+
+def encode(values: np.ndarray, codebook: np.ndarray) -> np.ndarray:
+    """
+    Index of the nearest codebook entry for every value.
+
+    Args:
+        values (np.ndarray): Values to encode
+        codebook (np.ndarray): Sorted codebook
+
+    Returns:
+        np.ndarray: uint8 codes for codebooks of up to 256 entries,
+        uint16 otherwise
+    """
+    dtype = np.uint8 if len(codebook) <= 256 else np.uint16
+    midpoints = (codebook[:-1] + codebook[1:]) / 2
+    return np.searchsorted(midpoints, values).astype(dtype)
+
+
+class QuantizedArray:
+    """
+    Read-only float64 array stored as codes into a codebook.
+    """
+
+    def __init__(self, codes: np.ndarray, codebook: np.ndarray):
+        self.codes = codes
+        self.codebook = codebook
+
+    @classmethod
+    def from_values(
+        cls,
+        values: np.ndarray,
+        bits: int = 8,
+        method: str = "binned",
+        log_domain: bool = False
+    ) -> "QuantizedArray":
+        """
+        Quantize an array of values.
+
+        Args:
+            values (np.ndarray): Values to quantize
+            bits (int): 8 or 16
+            method (str): "binned" or "kmeans"
+            log_domain (bool): Build the codebook over log(values)
+                (for probabilities; values must be positive)
+
+        Returns:
+            QuantizedArray: Codes and codebook
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not log_domain:
+            codebook = build_codebook(values, bits, method)
+            return cls(encode(values, codebook), codebook)
+
+        logs = np.log(np.maximum(values, np.finfo(np.float64).tiny))
+        codebook = build_codebook(logs, bits, method)
+        codes = encode(logs, codebook)
+
+        # An exact codebook keeps the original values bit for bit
+        # (exp(log(p)) may be off by one ulp and flip ties)
+        unique = np.unique(values)
+        if len(unique) == len(codebook):
+            return cls(codes, unique)
+        return cls(codes, np.exp(codebook))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.codebook.dtype
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the codes and the codebook."""
+        return self.codes.nbytes + self.codebook.nbytes
+
+    def __getitem__(self, key):
+        return self.codebook[self.codes[key]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy=None):
+        values = self.codebook[self.codes]
+        return values if dtype is None else values.astype(dtype)
+
+    def astype(self, dtype) -> np.ndarray:
+        """Dequantized copy of the whole array."""
+        return np.asarray(self, dtype=dtype)
+
+    def tolist(self):
+        return self.codebook[self.codes].tolist()
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    probs = rng.dirichlet(np.ones(50), size=20000).ravel()
+
+    print(f"{'Codebook':<14}{'Bytes':>10}{'Mean |log error|':>18}")
+    print(f"{'float64':<14}{probs.nbytes:>10}{0.0:>18.2e}")
+    for bits in (8, 16):
+        for method in METHODS:
+            quantized = QuantizedArray.from_values(
+                probs, bits, method, log_domain=True
+            )
+            error = np.mean(np.abs(np.log(np.asarray(quantized) / probs)))
+            print(f"{f'{method}-{bits}':<14}{quantized.nbytes:>10}"
+                  f"{error:>18.2e}")
+
+    # Mostly distinct values: the codebook is capped by the code size
+    small = rng.random(71542)
+    for bits in (8, 16):
+        quantized = QuantizedArray.from_values(small, bits)
+        print(f"{len(small)} values, {bits}-bit: {small.nbytes} -> "
+              f"{quantized.nbytes} bytes ({len(quantized.codebook)} codes)")
@@ -0,0 +1,456 @@
+"""
+tables.py
+----------
+Array-backed, read-only views of the translation model and the
+bigram language model.
+
+Both classes behave like the nested dicts produced by the trainers
+(`translation_probs[src][tgt]`, `bigram_model.get((w1, w2))`), so the
+decoders and `score_sentence` use them unchanged, but the data lives
+in a few flat NumPy arrays that can be memory-mapped from disk.
+
+Either table's value array may be a `QuantizedArray` (8/16-bit codes
+into a codebook, see `quantize`); it indexes like a float64 array.
+"""
+
+from collections.abc import Mapping
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.translation.quantization import QuantizedArray
+
+# Fibonacci hashing multiplier (2**64 / golden ratio)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _hash_slots(keys: np.ndarray, bits: int) -> np.ndarray:
+    """Home slot of every key in a table of 2**bits slots."""
+    hashed = keys.astype(np.uint64) * _HASH_MULTIPLIER
+    return (hashed >> np.uint64(64 - bits)).astype(np.int64)
+
+
+class TranslationTable(Mapping):
+    """
+    P(target | source) stored in CSR form over vocabulary ids.
+
+    Row i (source word `src_words[i]`) holds its candidates in
+    `tgt_ids[indptr[i]:indptr[i + 1]]` with matching `probs`.
+    """
+
+    def __init__(
+        self,
+        src_words: List[str],
+        tgt_words: List[str],
+        indptr: np.ndarray,
+        tgt_ids: np.ndarray,
+        probs: np.ndarray
+    ):
+        self.src_words = src_words
+        self.tgt_words = tgt_words
+        self.indptr = indptr
+        self.tgt_ids = tgt_ids
+        self.probs = probs
+        self._src_index = {word: i for i, word in enumerate(src_words)}
+
+    @classmethod
+    def from_dict(
+        cls,
+        translation_probs: Dict[str, Dict[str, float]]
+    ) -> "TranslationTable":
+        """
+        Build a table from nested translation probabilities.
+
+        Args:
+            translation_probs (Dict): P(target | source)
+
+        Returns:
+            TranslationTable: Equivalent CSR table (row order preserved)
+        """
+        src_words = list(translation_probs)
+        tgt_index = {}
+        indptr = [0]
+        tgt_ids = []
+        probs = []
+
+        for src_word in src_words:
+            for tgt_word, prob in translation_probs[src_word].items():
+                tgt_ids.append(tgt_index.setdefault(tgt_word, len(tgt_index)))
+                probs.append(prob)
+            indptr.append(len(tgt_ids))
+
+        return cls(
+            src_words,
+            list(tgt_index),
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(tgt_ids, dtype=np.int32),
+            np.asarray(probs, dtype=np.float64),
+        )
+
+    def row(self, src_word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Candidate target ids and probabilities of one source word.
+
+        Args:
+            src_word (str): Source word
+
+        Returns:
+            np.ndarray, np.ndarray: Target ids and probabilities
+            (empty for unknown words)
+        """
+        i = self._src_index.get(src_word)
+        if i is None:
+            return self.tgt_ids[:0], self.probs[:0]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.tgt_ids[start:end], self.probs[start:end]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the CSR arrays."""
+        return self.indptr.nbytes + self.tgt_ids.nbytes + self.probs.nbytes
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Size of the table.
+
+        Returns:
+            Dict[str, int]: source_words, target_words, entries, nbytes
+        """
+        return {
+            "source_words": len(self.src_words),
+            "target_words": len(self.tgt_words),
+            "entries": len(self.tgt_ids),
+            "nbytes": self.nbytes,
+        }
+
+    def prune(
+        self,
+        min_prob: float = 0.0,
+        top_k: Optional[int] = None,
+        cumulative_mass: Optional[float] = None,
+        renormalize: bool = False
+    ) -> "TranslationTable":
+        """
+        Drop unlikely candidates from every row (vectorized).
+
+        An entry is kept only if it passes every given criterion. The
+        best candidate of each row is always kept, so no source word
+        becomes unknown and greedy decoding output does not change.
+        Kept entries stay in their original row order.
+
+        Args:
+            min_prob (float): Drop entries below this probability
+            top_k (int): Keep at most this many entries per row
+            cumulative_mass (float): Keep the most probable entries of
+                each row until they cover this share of its mass
+                (threshold pruning by histogram, e.g. 0.95)
+            renormalize (bool): Rescale kept rows to sum to one
+
+        Returns:
+            TranslationTable: Pruned table (same vocabularies)
+        """
+        row_lens = np.diff(self.indptr)
+        rows = np.repeat(np.arange(len(row_lens)), row_lens)
+        probs = np.asarray(self.probs, dtype=np.float64)
+        if len(probs) == 0:
+            return self
+
+        # Stable sort by (row, -prob): ties keep their position in the
+        # row; rows stay in order, so rows[order] == rows
+        order = np.lexsort((-probs, rows))
+        sorted_probs = probs[order]
+        rank = np.arange(len(order)) - np.repeat(self.indptr[:-1], row_lens)
+
+        keep_sorted = sorted_probs >= min_prob
+        if top_k is not None:
+            keep_sorted &= rank < top_k
+        if cumulative_mass is not None:
+            # Mass of the more probable entries of the same row
+            before = np.cumsum(sorted_probs) - sorted_probs
+            starts = np.minimum(self.indptr[:-1], len(order) - 1)
+            before -= np.repeat(before[starts], row_lens)
+            totals = np.bincount(rows, weights=probs, minlength=len(row_lens))
+            keep_sorted &= before < cumulative_mass * totals[rows]
+        keep_sorted |= rank == 0
+
+        keep = np.empty(len(order), dtype=bool)
+        keep[order] = keep_sorted
+
+        kept_rows = rows[keep]
+        indptr = np.zeros(len(row_lens) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(kept_rows, minlength=len(row_lens)), out=indptr[1:]
+        )
+        new_probs = probs[keep]
+        if renormalize:
+            sums = np.bincount(
+                kept_rows, weights=new_probs, minlength=len(row_lens)
+            )
+            new_probs /= sums[kept_rows]
+
+        return TranslationTable(
+            self.src_words,
+            self.tgt_words,
+            indptr,
+            np.asarray(self.tgt_ids)[keep].astype(np.int32),
+            new_probs,
+        )
+
+    def quantize(
+        self,
+        bits: int = 8,
+        method: str = "binned"
+    ) -> "TranslationTable":
+        """
+        Store probabilities as codes into a log-domain codebook.
+
+        Args:
+            bits (int): 8 or 16
+            method (str): "binned" or "kmeans"
+
+        Returns:
+            TranslationTable: Table with a QuantizedArray of probs
+        """
+        return TranslationTable(
+            self.src_words,
+            self.tgt_words,
+            self.indptr,
+            self.tgt_ids,
+            QuantizedArray.from_values(
+                self.probs, bits, method, log_domain=True
+            ),
+        )
+
+    def __getitem__(self, src_word: str) -> Dict[str, float]:
+        if src_word not in self._src_index:
+            raise KeyError(src_word)
+        ids, probs = self.row(src_word)
+        tgt_words = self.tgt_words
+        return {
+            tgt_words[t]: p for t, p in zip(ids.tolist(), probs.tolist())
+        }
+
+    def __contains__(self, src_word: object) -> bool:
+        return src_word in self._src_index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.src_words)
+
+    def __len__(self) -> int:
+        return len(self.src_words)
+
+
+class BigramTable(Mapping):
+    """
+    Bigram log-probabilities keyed by sorted integer bigram ids.
+
+    A bigram (w1, w2) is stored under the key id(w1) * V + id(w2)
+    in the sorted `keys` array and found with binary search.
+    """
+
+    def __init__(
+        self,
+        words: List[str],
+        keys: np.ndarray,
+        log_probs: np.ndarray
+    ):
+        self.words = words
+        self.keys = keys
+        self.log_probs = log_probs
+        self._index = {word: i for i, word in enumerate(words)}
+        self._hash = None
+
+    @classmethod
+    def from_dict(
+        cls,
+        bigram_model: Dict[Tuple[str, str], float]
+    ) -> "BigramTable":
+        """
+        Build a table from a bigram log-probability dict.
+
+        Args:
+            bigram_model (Dict): (w1, w2) -> log-probability
+
+        Returns:
+            BigramTable: Equivalent sorted-key table
+        """
+        index = {}
+        for w1, w2 in bigram_model:
+            index.setdefault(w1, len(index))
+            index.setdefault(w2, len(index))
+
+        size = max(len(index), 1)
+        keys = np.fromiter(
+            (index[w1] * size + index[w2] for w1, w2 in bigram_model),
+            dtype=np.int64,
+            count=len(bigram_model),
+        )
+        log_probs = np.fromiter(
+            bigram_model.values(), dtype=np.float64, count=len(bigram_model)
+        )
+
+        order = np.argsort(keys, kind="stable")
+        return cls(list(index), keys[order], log_probs[order])
+
+    def _position(self, bigram: Tuple[str, str]) -> int:
+        """Index of a bigram in `keys`, or -1 when absent."""
+        try:
+            w1, w2 = bigram
+        except (TypeError, ValueError):
+            return -1
+
+        i1 = self._index.get(w1)
+        i2 = self._index.get(w2)
+        if i1 is None or i2 is None:
+            return -1
+
+        key = i1 * max(len(self.words), 1) + i2
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return pos
+        return -1
+
+    def word_ids(self, words: Iterable[str], count: int = -1) -> np.ndarray:
+        """
+        Vocabulary ids of many words, for `lookup`.
+
+        Args:
+            words (Iterable[str]): Words
+            count (int): Number of words, if known (saves a resize)
+
+        Returns:
+            np.ndarray: int64 ids (-1 for unknown words)
+        """
+        return np.fromiter(
+            map(self._index.get, words, repeat(-1)),
+            dtype=np.int64, count=count
+        )
+
+    def _hash_table(self) -> Tuple[np.ndarray, int]:
+        """
+        Open-addressing hash index over `keys`, built on first use.
+
+        Slot -> position in `keys` (-1 = empty), linear probing, at
+        most 25% full. Keys are inserted a probe step at a time for all
+        pending keys at once; a key only moves on from an occupied
+        slot, so lookups can stop at the first empty one.
+        """
+        if self._hash is None:
+            n = len(self.keys)
+            bits = max(1, (4 * n - 1).bit_length())
+            mask = (1 << bits) - 1
+            table = np.full(1 << bits, -1, dtype=np.int32)
+
+            slots = _hash_slots(self.keys, bits)
+            pending = np.arange(n)
+            while len(pending):
+                wanted = slots[pending]
+                free = table[wanted] < 0
+                claimed, first = np.unique(wanted[free], return_index=True)
+                winners = pending[free][first]
+                table[claimed] = winners
+
+                placed = np.zeros(n, dtype=bool)
+                placed[winners] = True
+                pending = pending[~placed[pending]]
+                slots[pending] = (slots[pending] + 1) & mask
+
+            self._hash = (table, bits)
+        return self._hash
+
+    def lookup(
+        self,
+        first: np.ndarray,
+        second: np.ndarray,
+        default: float
+    ) -> np.ndarray:
+        """
+        Log-probabilities of many bigrams given as word id arrays.
+
+        Uses a vectorized hash index (random lookups are several times
+        faster than binary search over `keys`).
+
+        Args:
+            first (np.ndarray): Ids of the first words (-1 = unknown)
+            second (np.ndarray): Ids of the second words (-1 = unknown)
+            default (float): Value for unseen bigrams
+
+        Returns:
+            np.ndarray: float64 log-probabilities
+        """
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        result = np.full(len(first), default, dtype=np.float64)
+        if len(self.keys) == 0:
+            return result
+
+        # Only bigrams of known words can be stored
+        active = np.flatnonzero((first >= 0) & (second >= 0))
+        keys = first[active] * max(len(self.words), 1) + second[active]
+
+        table, bits = self._hash_table()
+        mask = len(table) - 1
+        slots = _hash_slots(keys, bits)
+
+        while len(active):
+            pos = table[slots]
+            occupied = pos >= 0
+            hit = occupied & (self.keys[pos] == keys)
+            result[active[hit]] = self.log_probs[pos[hit]]
+
+            # Probe on while the slot holds some other key
+            probe = occupied & ~hit
+            active, keys = active[probe], keys[probe]
+            slots = (slots[probe] + 1) & mask
+
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the key and value arrays."""
+        return self.keys.nbytes + self.log_probs.nbytes
+
+    def quantize(self, bits: int = 8, method: str = "binned") -> "BigramTable":
+        """
+        Store log-probabilities as codes into a codebook.
+
+        Args:
+            bits (int): 8 or 16
+            method (str): "binned" or "kmeans"
+
+        Returns:
+            BigramTable: Table with a QuantizedArray of log-probs
+        """
+        table = BigramTable(
+            self.words,
+            self.keys,
+            QuantizedArray.from_values(self.log_probs, bits, method),
+        )
+        table._hash = self._hash
+        return table
+
+    def get(self, bigram: Tuple[str, str], default: float = None) -> float:
+        pos = self._position(bigram)
+        if pos < 0:
+            return default
+        return float(self.log_probs[pos])
+
+    def __getitem__(self, bigram: Tuple[str, str]) -> float:
+        pos = self._position(bigram)
+        if pos < 0:
+            raise KeyError(bigram)
+        return float(self.log_probs[pos])
+
+    def __contains__(self, bigram: object) -> bool:
+        return self._position(bigram) >= 0
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        size = max(len(self.words), 1)
+        words = self.words
+        for key in self.keys.tolist():
+            w1, w2 = divmod(key, size)
+            yield words[w1], words[w2]
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -0,0 +1,200 @@
+"""
+training.py
+------------
+Single-pass training of the translation model and the bigram
+language model from a stream of sentence pairs.
+
+Only the count tables are kept in memory, so training memory
+depends on the model size and not on the corpus size.
+
+Also provides `load_or_train_models`, the shared entry point for
+serving code that prefers a prebuilt model file.
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from src.translation.ibm_model1 import train_ibm_model1
+from src.translation.language_model import (
+    count_ngrams,
+    normalize_bigram_counts,
+    train_bigram_language_model,
+)
+from src.translation.model_io import DEFAULT_MODEL_FILE, load_model_file
+from src.translation.translation_model import (
+    count_cooccurrences,
+    load_compact_corpus,
+    normalize_cooccurrences,
+)
+from src.utils.helpers import count_row, parallel_count
+from src.utils.metrics import stage
+
+
+def _count_pair(
+    pair: Tuple[List[str], List[str]],
+    co_occurrence: Dict[str, Dict[str, int]],
+    source_counts: Dict[str, int],
+    unigram_counts: Dict[str, int],
+    bigram_counts: Dict[Tuple[str, str], int]
+) -> None:
+    src_tokens, tgt_tokens = pair
+    count_cooccurrences(src_tokens, tgt_tokens, co_occurrence, source_counts)
+    count_ngrams(tgt_tokens, unigram_counts, bigram_counts)
+
+
+def _count_tables() -> Tuple[Dict, Dict, Dict, Dict]:
+    """Empty (picklable) co-occurrence, source, unigram and bigram
+    count tables."""
+    return (
+        defaultdict(count_row), defaultdict(int),
+        defaultdict(int), defaultdict(int),
+    )
+
+
+def count_tables(
+    pairs: Iterable[Tuple[List[str], List[str]]],
+    workers: int = 1,
+    chunk_size: int = 10000
+) -> Tuple:
+    """
+    Count the co-occurrence, source, unigram and bigram tables.
+
+    Args:
+        pairs (Iterable[Tuple[List[str], List[str]]]): Tokenized pairs
+        workers (int): Count shards of `chunk_size` pairs in this many
+            processes (only a few shards are held in memory at a time)
+        chunk_size (int): Pairs per shard when workers > 1
+
+    Returns:
+        Tuple: co_occurrence, source_counts, unigram_counts and
+        bigram_counts (defaultdicts, keys in corpus order)
+    """
+    with stage("train.count") as timer:
+        tables, counted = parallel_count(
+            pairs, _count_pair, _count_tables, workers, chunk_size
+        )
+        timer.add(counted)
+
+    return tables
+
+
+def train_models_from_pairs(
+    pairs: Iterable[Tuple[List[str], List[str]]],
+    workers: int = 1,
+    chunk_size: int = 10000
+) -> Tuple[Dict[str, Dict[str, float]], Dict[Tuple[str, str], float]]:
+    """
+    Train both models in one pass over (source, target) sentence pairs.
+
+    Args:
+        pairs (Iterable[Tuple[List[str], List[str]]]): Tokenized pairs,
+            e.g. from `iter_parallel_corpus`
+        workers (int): Count shards of `chunk_size` pairs in this many
+            processes (only a few shards are held in memory at a time)
+        chunk_size (int): Pairs per shard when workers > 1
+
+    Returns:
+        Dict[str, Dict[str, float]], Dict[Tuple[str, str], float]:
+        Translation probabilities and bigram log-probabilities
+    """
+    co_occurrence, source_counts, unigram_counts, bigram_counts = \
+        count_tables(pairs, workers, chunk_size)
+
+    translation_probs = normalize_cooccurrences(co_occurrence, source_counts)
+    bigram_model = normalize_bigram_counts(unigram_counts, bigram_counts)
+
+    return translation_probs, bigram_model
+
+
+def load_or_train_models(
+    model_file: str = DEFAULT_MODEL_FILE,
+    source_file: str = "data/train/source.txt",
+    target_file: str = "data/train/target.txt"
+):
+    """
+    Load a prebuilt model file, or train both models if it is missing.
+
+    Args:
+        model_file (str): Model file written by `save_model_file`
+        source_file (str): Training source file (fallback)
+        target_file (str): Training target file (fallback)
+
+    Returns:
+        Translation model and bigram language model
+    """
+    if model_file and os.path.exists(model_file):
+        return load_model_file(model_file)
+
+    src_corpus, tgt_corpus = load_compact_corpus(source_file, target_file)
+    translation_model, _ = train_ibm_model1(src_corpus, tgt_corpus)
+    language_model = train_bigram_language_model(tgt_corpus)
+
+    return translation_model, language_model
+
+
+# Simple test (run this file directly)
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+    import tracemalloc
+
+    from src.translation.language_model import train_bigram_language_model
+    from src.translation.translation_model import (
+        iter_parallel_corpus,
+        load_parallel_corpus,
+        train_translation_model,
+    )
+
+    # Repeat the sample so the corpus outgrows the model
+    with open("data/train/source.txt", encoding="utf-8") as f:
+        source_text = f.read()
+    with open("data/train/target.txt", encoding="utf-8") as f:
+        target_text = f.read()
+
+    tmp_dir = tempfile.mkdtemp()
+    SOURCE_FILE = os.path.join(tmp_dir, "source.txt")
+    TARGET_FILE = os.path.join(tmp_dir, "target.txt")
+    with open(SOURCE_FILE, "w", encoding="utf-8") as f:
+        f.write(source_text * 20)
+    with open(TARGET_FILE, "w", encoding="utf-8") as f:
+        f.write(target_text * 20)
+
+    tracemalloc.start()
+    src_sents, tgt_sents = load_parallel_corpus(SOURCE_FILE, TARGET_FILE)
+    tm_lists = train_translation_model(src_sents, tgt_sents)
+    lm_lists = train_bigram_language_model(tgt_sents)
+    _, list_peak = tracemalloc.get_traced_memory()
+    del src_sents, tgt_sents
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    tm_stream, lm_stream = train_models_from_pairs(
+        iter_parallel_corpus(SOURCE_FILE, TARGET_FILE)
+    )
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Peak memory (load, then train): {list_peak / 1e6:.2f} MB")
+    print(f"Peak memory (streaming)       : {stream_peak / 1e6:.2f} MB")
+    print("Models identical:", tm_lists == tm_stream and lm_lists == lm_stream)
+
+    # Sharded training: same tables, counted across worker processes
+    import time
+
+    src_sents, tgt_sents = load_parallel_corpus(SOURCE_FILE, TARGET_FILE)
+    print("\nWorkers  Translation  Bigram LM  Identical")
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        tm = train_translation_model(src_sents, tgt_sents, workers=workers)
+        tm_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lm = train_bigram_language_model(tgt_sents, workers=workers)
+        lm_time = time.perf_counter() - start
+
+        print(f"{workers:>7}  {tm_time * 1000:>9.1f}ms  "
+              f"{lm_time * 1000:>7.1f}ms  {tm == tm_lists and lm == lm_lists}")
+
+    shutil.rmtree(tmp_dir)
@@ -6,79 +6,351 @@ model using word-to-word translation probabilities (IBM Model 1 style).
 """
 
 from collections import defaultdict
-from typing import List, Dict
+from itertools import zip_longest
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 
 from src.preprocessing.clean_text import clean_text
+from src.preprocessing.corpus import Corpus, count_unique, sentence_pairs
 from src.preprocessing.tokenizer import tokenize
+from src.translation.tables import TranslationTable
+from src.utils.helpers import (
+    count_row,
+    merge_counts,
+    parallel_count,
+    shard_size,
+)
+from src.utils.metrics import stage
 
 
-def load_parallel_corpus(source_file: str, target_file: str):
+def iter_parallel_corpus(
+    source_file: str,
+    target_file: str,
+    skip_empty: bool = False,
+    max_length: Optional[int] = None
+) -> Iterator[Tuple[List[str], List[str]]]:
     """
-    Load and preprocess parallel corpus.
+    Lazily read, clean and tokenize a parallel corpus.
+
+    Only one line pair is held in memory at a time.
 
     Args:
         source_file (str): Path to source language file
         target_file (str): Path to target language file
+        skip_empty (bool): Drop pairs where either side is empty
+        max_length (int): Drop pairs where either side is longer
 
-    Returns:
-        List[List[str]], List[List[str]]: Tokenized source and target sentences
+    Yields:
+        Tuple[List[str], List[str]]: Tokenized source and target sentence
+
+    Raises:
+        ValueError: As soon as one file runs out of lines before the other
     """
     with open(source_file, "r", encoding="utf-8") as sf, \
          open(target_file, "r", encoding="utf-8") as tf:
 
-        source_lines = sf.readlines()
-        target_lines = tf.readlines()
+        for line_no, (src, tgt) in enumerate(
+            zip_longest(sf, tf), start=1
+        ):
+            if src is None or tgt is None:
+                shorter = source_file if src is None else target_file
+                raise ValueError(
+                    "Source and target files must have same number of "
+                    f"lines: {shorter} ends before line {line_no}"
+                )
+
+            src_tokens = tokenize(clean_text(src.strip()))
+            tgt_tokens = tokenize(clean_text(tgt.strip()))
+
+            if skip_empty and not (src_tokens and tgt_tokens):
+                continue
+
+            if max_length is not None and (
+                len(src_tokens) > max_length or len(tgt_tokens) > max_length
+            ):
+                continue
+
+            yield src_tokens, tgt_tokens
+
+
+def load_parallel_corpus(source_file: str, target_file: str):
+    """
+    Load and preprocess parallel corpus.
 
-    assert len(source_lines) == len(target_lines), \
-        "Source and target files must have same number of lines"
+    Args:
+        source_file (str): Path to source language file
+        target_file (str): Path to target language file
 
+    Returns:
+        List[List[str]], List[List[str]]: Tokenized source and target sentences
+    """
     src_sentences = []
     tgt_sentences = []
 
-    for src, tgt in zip(source_lines, target_lines):
-        src_clean = clean_text(src.strip())
-        tgt_clean = clean_text(tgt.strip())
-
-        src_sentences.append(tokenize(src_clean))
-        tgt_sentences.append(tokenize(tgt_clean))
+    for src_tokens, tgt_tokens in iter_parallel_corpus(
+        source_file, target_file
+    ):
+        src_sentences.append(src_tokens)
+        tgt_sentences.append(tgt_tokens)
 
     return src_sentences, tgt_sentences
 
 
+def load_compact_corpus(
+    source_file: str,
+    target_file: str,
+    skip_empty: bool = False,
+    max_length: Optional[int] = None
+) -> Tuple[Corpus, Corpus]:
+    """
+    Load and preprocess a parallel corpus into compact id corpora.
+
+    Args:
+        source_file (str): Path to source language file
+        target_file (str): Path to target language file
+        skip_empty (bool): Drop pairs where either side is empty
+        max_length (int): Drop pairs where either side is longer
+
+    Returns:
+        Corpus, Corpus: Source and target corpora (one vocabulary each)
+    """
+    src_corpus = Corpus()
+    tgt_corpus = Corpus()
+
+    for src_tokens, tgt_tokens in iter_parallel_corpus(
+        source_file, target_file, skip_empty, max_length
+    ):
+        src_corpus.append(src_tokens)
+        tgt_corpus.append(tgt_tokens)
+
+    return src_corpus, tgt_corpus
+
+
+def count_cooccurrences(
+    src_tokens: List[str],
+    tgt_tokens: List[str],
+    co_occurrence: Dict[str, Dict[str, int]],
+    source_counts: Dict[str, int]
+) -> None:
+    """
+    Add the word co-occurrences of one sentence pair to running counts.
+
+    Args:
+        src_tokens (List[str]): Tokenized source sentence
+        tgt_tokens (List[str]): Tokenized target sentence
+        co_occurrence (Dict): source -> target -> count (updated in place)
+        source_counts (Dict): source -> pair count (updated in place)
+    """
+    if not tgt_tokens:
+        return
+
+    for src_word in src_tokens:
+        row = co_occurrence[src_word]
+        for tgt_word in tgt_tokens:
+            row[tgt_word] += 1
+        source_counts[src_word] += len(tgt_tokens)
+
+
+def _count_pair(
+    pair: Tuple[List[str], List[str]],
+    co_occurrence: Dict[str, Dict[str, int]],
+    source_counts: Dict[str, int]
+) -> None:
+    count_cooccurrences(pair[0], pair[1], co_occurrence, source_counts)
+
+
+def _cooccurrence_tables() -> Tuple[Dict, Dict]:
+    """Empty (picklable) co-occurrence and source count tables."""
+    return defaultdict(count_row), defaultdict(int)
+
+
+def merge_cooccurrences(
+    co_occurrence: Dict[str, Dict[str, int]],
+    source_counts: Dict[str, int],
+    part_co_occurrence: Dict[str, Dict[str, int]],
+    part_source_counts: Dict[str, int]
+) -> None:
+    """
+    Add partial co-occurrence counts into running totals.
+
+    Merging shards in corpus order keeps the same key order as
+    counting serially (see `merge_counts`; the partial tables are
+    consumed).
+
+    Args:
+        co_occurrence (Dict): source -> target -> count (updated in place)
+        source_counts (Dict): source -> pair count (updated in place)
+        part_co_occurrence (Dict): Partial co-occurrence counts
+        part_source_counts (Dict): Partial source counts
+    """
+    merge_counts(co_occurrence, part_co_occurrence)
+    merge_counts(source_counts, part_source_counts)
+
+
+def normalize_cooccurrences(
+    co_occurrence: Dict[str, Dict[str, int]],
+    source_counts: Dict[str, int]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Turn co-occurrence counts into translation probabilities.
+
+    Args:
+        co_occurrence (Dict): source -> target -> count
+        source_counts (Dict): source -> pair count
+
+    Returns:
+        Dict[str, Dict[str, float]]: P(target | source)
+    """
+    translation_probs = defaultdict(dict)
+    for src_word in co_occurrence:
+        total = source_counts[src_word]
+        row = translation_probs[src_word]
+        for tgt_word, count in co_occurrence[src_word].items():
+            row[tgt_word] = count / total
+
+    return translation_probs
+
+
+def _cooccurrence_entries(
+    src_corpus: Corpus,
+    tgt_corpus: Corpus
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Source ids, target ids and P(target | source) of every distinct
+    co-occurring pair, in first-occurrence order.
+    """
+    pair_src, pair_tgt, _ = sentence_pairs(
+        src_corpus.token_ids(), src_corpus.offsets(),
+        tgt_corpus.token_ids(), tgt_corpus.offsets()
+    )
+
+    tgt_size = max(len(tgt_corpus.vocab), 1)
+    keys, counts = count_unique(pair_src * tgt_size + pair_tgt)
+    entry_src = keys // tgt_size
+    entry_tgt = keys % tgt_size
+
+    source_counts = np.bincount(
+        entry_src, weights=counts, minlength=len(src_corpus.vocab)
+    )
+    return entry_src, entry_tgt, counts / source_counts[entry_src]
+
+
+def _train_from_corpus(
+    src_corpus: Corpus,
+    tgt_corpus: Corpus
+) -> Dict[str, Dict[str, float]]:
+    """
+    Array-based equivalent of the co-occurrence counting loop.
+    """
+    entry_src, entry_tgt, probs = _cooccurrence_entries(
+        src_corpus, tgt_corpus
+    )
+
+    src_words = src_corpus.vocab.words
+    tgt_words = tgt_corpus.vocab.words
+    translation_probs = defaultdict(dict)
+
+    for s, t, p in zip(entry_src.tolist(), entry_tgt.tolist(), probs.tolist()):
+        translation_probs[src_words[s]][tgt_words[t]] = p
+
+    return translation_probs
+
+
 def train_translation_model(
-    src_sentences: List[List[str]],
-    tgt_sentences: List[List[str]]
+    src_sentences: Union[Corpus, List[List[str]]],
+    tgt_sentences: Union[Corpus, List[List[str]]],
+    workers: int = 1
 ) -> Dict[str, Dict[str, float]]:
     """
     Train word-to-word translation probabilities.
 
     Args:
-        src_sentences (List[List[str]]): Tokenized source sentences
-        tgt_sentences (List[List[str]]): Tokenized target sentences
+        src_sentences (Corpus or List[List[str]]): Source sentences
+        tgt_sentences (Corpus or List[List[str]]): Target sentences
+        workers (int): Count token-list shards in this many processes
+            (Corpus input is always counted in-process with NumPy)
 
     Returns:
         Dict[str, Dict[str, float]]:
         Translation probabilities P(target | source)
     """
-    # Count co-occurrences
-    co_occurrence = defaultdict(lambda: defaultdict(int))
-    source_counts = defaultdict(int)
+    with stage("train.translation_model") as timer:
+        if isinstance(src_sentences, Corpus) and \
+                isinstance(tgt_sentences, Corpus):
+            timer.add(len(src_sentences))
+            return _train_from_corpus(src_sentences, tgt_sentences)
 
-    for src_tokens, tgt_tokens in zip(src_sentences, tgt_sentences):
-        for src_word in src_tokens:
-            for tgt_word in tgt_tokens:
-                co_occurrence[src_word][tgt_word] += 1
-                source_counts[src_word] += 1
+        # Count co-occurrences (in shards when workers > 1)
+        (co_occurrence, source_counts), sentences = parallel_count(
+            zip(src_sentences, tgt_sentences), _count_pair,
+            _cooccurrence_tables, workers,
+            shard_size(src_sentences, workers)
+        )
+        timer.add(sentences)
 
-    # Normalize counts to probabilities
-    translation_probs = defaultdict(dict)
-    for src_word in co_occurrence:
-        for tgt_word in co_occurrence[src_word]:
-            translation_probs[src_word][tgt_word] = (
-                co_occurrence[src_word][tgt_word] / source_counts[src_word]
-            )
+        # Normalize counts to probabilities
+        return normalize_cooccurrences(co_occurrence, source_counts)
 
-    return translation_probs
+
+def train_translation_table(
+    src_sentences: Union[Corpus, List[List[str]]],
+    tgt_sentences: Union[Corpus, List[List[str]]],
+    min_prob: float = 0.0,
+    top_k: Optional[int] = None,
+    cumulative_mass: Optional[float] = None
+) -> TranslationTable:
+    """
+    Train translation probabilities straight into a CSR table.
+
+    Same probabilities (and row order) as `train_translation_model`,
+    but no nested dict is ever built, and the table is optionally
+    pruned (see `TranslationTable.prune`).
+
+    Args:
+        src_sentences (Corpus or List[List[str]]): Source sentences
+        tgt_sentences (Corpus or List[List[str]]): Target sentences
+        min_prob (float): Drop entries below this probability
+        top_k (int): Keep at most this many candidates per source word
+        cumulative_mass (float): Keep each row's most probable
+            candidates up to this share of its probability mass
+
+    Returns:
+        TranslationTable: P(target | source)
+    """
+    if not isinstance(src_sentences, Corpus):
+        src_sentences = Corpus.from_sentences(src_sentences)
+    if not isinstance(tgt_sentences, Corpus):
+        tgt_sentences = Corpus.from_sentences(tgt_sentences)
+
+    with stage("train.translation_table") as timer:
+        timer.add(len(src_sentences))
+        entry_src, entry_tgt, probs = _cooccurrence_entries(
+            src_sentences, tgt_sentences
+        )
+
+        # Rows in order of first occurrence, like the dict trainer
+        row_src, row_lens = count_unique(entry_src)
+        row_of = np.zeros(len(src_sentences.vocab), dtype=np.int64)
+        row_of[row_src] = np.arange(len(row_src))
+        order = np.argsort(row_of[entry_src], kind="stable")
+
+        indptr = np.zeros(len(row_src) + 1, dtype=np.int64)
+        np.cumsum(row_lens, out=indptr[1:])
+        src_words = src_sentences.vocab.words
+
+        table = TranslationTable(
+            [src_words[i] for i in row_src.tolist()],
+            list(tgt_sentences.vocab.words),
+            indptr,
+            entry_tgt[order].astype(np.int32),
+            probs[order].astype(np.float64),
+        )
+
+        if min_prob > 0 or top_k is not None or cumulative_mass is not None:
+            table = table.prune(min_prob, top_k, cumulative_mass)
+
+    return table
 
 
 # Simple test (run this file directly)
@@ -93,3 +365,35 @@ if __name__ == "__main__":
     print("Sample translation probabilities:\n")
     for src_word in list(model.keys())[:5]:
         print(f"{src_word} -> {model[src_word]}")
+
+    # Compact CSR table, unpruned and pruned
+    import tracemalloc
+
+    def traced(build):
+        tracemalloc.start()
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, size
+
+    src_corpus, tgt_corpus = load_compact_corpus(SOURCE_FILE, TARGET_FILE)
+    _, dict_bytes = traced(
+        lambda: train_translation_model(src_corpus, tgt_corpus)
+    )
+    table, table_bytes = traced(
+        lambda: train_translation_table(src_corpus, tgt_corpus)
+    )
+    pruned, pruned_bytes = traced(
+        lambda: train_translation_table(src_corpus, tgt_corpus, top_k=5)
+    )
+
+    print("\nTable matches dict:", all(
+        table[word] == row for word, row in model.items()
+    ))
+    print(f"Entries (unpruned / top-5): {table.stats()['entries']} / "
+          f"{pruned.stats()['entries']}")
+    print(f"Memory dict   : {dict_bytes / 1e6:.2f} MB")
+    print(f"Memory table  : {table_bytes / 1e6:.2f} MB "
+          f"({dict_bytes / table_bytes:.1f}x smaller)")
+    print(f"Memory pruned : {pruned_bytes / 1e6:.2f} MB "
+          f"({dict_bytes / pruned_bytes:.1f}x smaller)")
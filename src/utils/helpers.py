@@ -0,0 +1,245 @@
+"""
+helpers.py
+-----------
+Small shared utilities for chunking work and running it
+across a process pool, and for counting in parallel shards.
+"""
+
+import math
+import pickle
+from collections import defaultdict, deque
+from collections.abc import Sized
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Split an iterable into consecutive lists of at most `size` items.
+
+    Args:
+        items (Iterable): Items to split (consumed lazily)
+        size (int): Chunk size
+
+    Yields:
+        List: Next chunk
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_map(
+    fn: Callable[[T], R],
+    chunks: Iterable[T],
+    workers: int,
+    max_pending: Optional[int] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = ()
+) -> Iterator[R]:
+    """
+    Apply `fn` to every chunk in a process pool, in input order.
+
+    At most `max_pending` chunks are in flight at once, so a lazy
+    chunk iterator is never materialized in full.
+
+    Args:
+        fn (Callable): Picklable, module-level function
+        chunks (Iterable): Work items
+        workers (int): Number of worker processes
+        max_pending (int): In-flight limit (default: 2 * workers)
+        initializer (Callable): Run once in every worker at startup
+        initargs (tuple): Arguments for `initializer`
+
+    Yields:
+        Results of `fn`, in the order of `chunks`
+    """
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(fn, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def count_row() -> DefaultDict:
+    """Picklable row factory: `defaultdict(count_row)` is a nested
+    count table that can be returned from worker processes."""
+    return defaultdict(int)
+
+
+def shard_size(items: Iterable, workers: int, default: int = 10000) -> int:
+    """
+    Shard size giving about four shards per worker for sized inputs
+    (`default` for iterators of unknown length).
+    """
+    if isinstance(items, Sized):
+        return max(1, math.ceil(len(items) / (4 * workers)))
+    return default
+
+
+def merge_counts(total: Dict, part: Dict) -> None:
+    """
+    Add the counts of `part` into `total` (in place).
+
+    Values are counts or dicts of counts (one level of nesting, e.g.
+    source -> target -> count). Keys new to `total` are appended in the
+    order of `part`, so merging shards in corpus order keeps the key
+    order of counting serially. `part` is consumed: its rows may become
+    rows of `total`.
+
+    Args:
+        total (Dict): Running counts (updated in place)
+        part (Dict): Counts of one shard
+    """
+    get = total.get
+    for key, value in part.items():
+        if isinstance(value, dict):
+            row = get(key)
+            if row is None:
+                total[key] = value
+            else:
+                row_get = row.get
+                for inner, count in value.items():
+                    row[inner] = row_get(inner, 0) + count
+        else:
+            total[key] = get(key, 0) + value
+
+
+# Shard ranges merged per reduce task (a wide tree keeps the number of
+# times big tables are pickled low)
+_FAN_IN = 8
+
+
+def _count_shard(task: Tuple[Callable, Callable, List]) -> Tuple[bytes, int]:
+    """
+    Count one shard into fresh tables (runs in a worker process).
+    """
+    count_item, new_tables, chunk = task
+    tables = new_tables()
+    for item in chunk:
+        count_item(item, *tables)
+    return pickle.dumps(tables, pickle.HIGHEST_PROTOCOL), len(chunk)
+
+
+def _merge_shards(task: List[bytes]) -> bytes:
+    """
+    Merge the tables of adjacent shard ranges in order (runs in a
+    worker process).
+    """
+    tables = pickle.loads(task[0])
+    for data in task[1:]:
+        for total, part in zip(tables, pickle.loads(data)):
+            merge_counts(total, part)
+    return pickle.dumps(tables, pickle.HIGHEST_PROTOCOL)
+
+
+def parallel_count(
+    items: Iterable[T],
+    count_item: Callable[..., None],
+    new_tables: Callable[[], Tuple[Dict, ...]],
+    workers: int = 1,
+    chunk_size: int = 10000
+) -> Tuple[Tuple[Dict, ...], int]:
+    """
+    Count items into a tuple of count tables, optionally in shards.
+
+    With workers > 1, shards of `chunk_size` items are counted in a
+    process pool (only a few are in flight at a time) and reduced by a
+    tree of merges that also runs in the pool, each task merging
+    `_FAN_IN` adjacent ranges: the parent only passes pickled tables
+    along and unpickles the final ones. Ranges are merged earlier-first
+    with `merge_counts`, so the tables (including key order) equal
+    those of counting serially.
+
+    Args:
+        items (Iterable): Items to count (consumed lazily)
+        count_item (Callable): `count_item(item, *tables)` adds one
+            item; module-level so it pickles
+        new_tables (Callable): Returns empty tables; module-level, and
+            the tables must pickle (use `count_row` for nested rows)
+        workers (int): Counting processes (1 counts in-process)
+        chunk_size (int): Items per shard when workers > 1
+
+    Returns:
+        Tuple[Tuple[Dict, ...], int]: Tables and number of items
+    """
+    if workers <= 1:
+        tables = new_tables()
+        counted = 0
+        for counted, item in enumerate(items, 1):
+            count_item(item, *tables)
+        return tables, counted
+
+    counted = 0
+    # Merge tree in corpus order: (level, pickled tables or future)
+    stack = []
+
+    def value(entry):
+        return entry.result() if isinstance(entry, Future) else entry
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def push(data: bytes) -> None:
+            stack.append((0, data))
+            level = 0
+            # FAN_IN adjacent ranges of one level become one range of
+            # the next
+            while len(stack) >= _FAN_IN and \
+                    all(lvl == level for lvl, _ in stack[-_FAN_IN:]):
+                ranges = [value(entry) for _, entry in stack[-_FAN_IN:]]
+                del stack[-_FAN_IN:]
+                level += 1
+                stack.append((level, executor.submit(_merge_shards, ranges)))
+
+        pending = deque()
+        for chunk in chunked(items, chunk_size):
+            pending.append(executor.submit(
+                _count_shard, (count_item, new_tables, chunk)
+            ))
+            if len(pending) >= 2 * workers:
+                data, size = pending.popleft().result()
+                counted += size
+                push(data)
+
+        while pending:
+            data, size = pending.popleft().result()
+            counted += size
+            push(data)
+
+        if not stack:
+            return new_tables(), 0
+
+        # Merge the remaining ranges (larger, earlier ones first)
+        ranges = [value(entry) for _, entry in stack]
+        result = (
+            ranges[0] if len(ranges) == 1
+            else executor.submit(_merge_shards, ranges).result()
+        )
+
+    return pickle.loads(result), counted